@@ -30,6 +30,7 @@ setup(
         "pydantic>=2.0.0",
         "pyyaml>=6.0",
         "aiofiles>=23.0.0",
+        "numpy>=1.24",
     ],
     extras_require={
         "dev": [
@@ -1,61 +1,264 @@
-"""Task analyzer combining keyword parsing and future LLM analysis."""
+"""Task analyzer combining keyword parsing, local classification and LLM analysis."""
 from __future__ import annotations
-from typing import List, Optional
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
 from pydantic import BaseModel
-from .parser import TaskParser, ParsedTask
-from ..utils.metrics import timed
+from .parser import KeywordAnalysis, TaskParser, ParsedTask, analysis_fields
+from .project_scanner import ProjectScanner
+from ..config.registry import ServerRegistry
+from ..utils.metrics import get_collector, timed
+
+if TYPE_CHECKING:
+    from .classifier import TaskClassifier
+    from .llm_analyzer import LLMTaskAnalyzer, SamplingFn
+    from .plugins import AnalyzerPlugins
 
 
 class TaskAnalysis(BaseModel):
     """Complete task analysis result."""
     aws_account: Optional[str]
     aws_region: Optional[str]
+    aws_accounts: List[str] = []
+    aws_regions: List[str] = []
     jira_project: Optional[str]
     jira_ticket: Optional[str]
     required_services: List[str]
     required_capabilities: List[str]
     confidence: float
-    source: str  # "keyword", "llm", or "hybrid"
+    source: str  # "keyword", "local", "llm", or "hybrid"
+    project_services: List[str] = []  # Services detected in the project tree
+    plugin_results: Dict[str, Dict[str, Any]] = {}  # Details by analyzer plugin
+    
+    def aws_targets(self) -> List[Tuple[str, str]]:
+        """Every (account, region) pair the task targets.
+        
+        Each mentioned account is paired with each mentioned region; a task
+        that names no region targets ``us-east-1``.
+        """
+        accounts = self.aws_accounts or ([self.aws_account] if self.aws_account else [])
+        regions = self.aws_regions or [self.aws_region or "us-east-1"]
+        return [(account, region) for account in accounts for region in regions]
 
 
 class TaskAnalyzer:
     """Analyze tasks to determine required MCP servers."""
     
-    def __init__(self) -> None:
-        self.parser = TaskParser()
+    # Cascade analyses below this confidence are escalated to the next stage
+    DEFAULT_ESCALATION_THRESHOLD = 0.6
+    
+    def __init__(
+        self,
+        registry: Optional[ServerRegistry] = None,
+        llm_analyzer: Optional[LLMTaskAnalyzer] = None,
+        escalation_threshold: float = DEFAULT_ESCALATION_THRESHOLD,
+        classifier: Optional[TaskClassifier] = None,
+        project_scanner: Optional[ProjectScanner] = None,
+        plugins: Optional[AnalyzerPlugins] = None,
+    ) -> None:
+        self.parser = TaskParser(registry)
+        self.llm_analyzer = llm_analyzer
+        self.escalation_threshold = escalation_threshold
+        self.classifier = classifier
+        self._project_scanner = project_scanner
+        self.plugins = plugins
+    
+    @property
+    def project_scanner(self) -> ProjectScanner:
+        """Scanner for project trees, created the first time a project is scanned."""
+        if self._project_scanner is None:
+            self._project_scanner = ProjectScanner()
+        return self._project_scanner
     
     @timed("task_analysis_ms")
     def analyze(self, task_description: str, project_path: str = "") -> TaskAnalysis:
-        """Analyze task and return structured analysis."""
-        # Parse with keywords
+        """Analyze task and return structured analysis.
+        
+        When ``project_path`` is given, services detected in the project
+        tree are added to the required services.
+        """
+        analysis = self.from_parsed(self._analyze(task_description))
+        return self.with_project_context(analysis, project_path)
+    
+    def with_project_context(self, analysis: TaskAnalysis, project_path: str = "") -> TaskAnalysis:
+        """Add the services detected in a project tree to an analysis.
+        
+        Project services come after those of the task description and do not
+        change the confidence, which describes the description alone. Only
+        actual scans are timed, as ``project_scan_ms``.
+        """
+        if not project_path:
+            return analysis
+        start = time.perf_counter()
+        services = self.project_scanner.scan(project_path).services
+        get_collector().record("project_scan_ms", (time.perf_counter() - start) * 1000)
+        if not services:
+            return analysis
+        
+        required_services = list(dict.fromkeys(analysis.required_services + services))
+        return analysis.model_copy(update={
+            "required_services": required_services,
+            "required_capabilities": list(dict.fromkeys(analysis.required_capabilities + services)),
+            "project_services": services,
+        })
+    
+    @timed("plugin_analysis_ms")
+    async def with_plugins(self, analysis: TaskAnalysis, task_description: str) -> TaskAnalysis:
+        """Merge the results of the analyzer plugins the task triggers.
+        
+        Triggered plugins run concurrently; their services and capabilities
+        are appended and their details kept under ``plugin_results``.
+        """
+        if self.plugins is None:
+            return analysis
+        results = await self.plugins.run(task_description)
+        if not results:
+            return analysis
+        
+        services = list(analysis.required_services)
+        capabilities = list(analysis.required_capabilities)
+        for result in results.values():
+            services.extend(result.required_services)
+            capabilities.extend(result.required_capabilities or result.required_services)
+        return analysis.model_copy(update={
+            "required_services": list(dict.fromkeys(services)),
+            "required_capabilities": list(dict.fromkeys(capabilities)),
+            "plugin_results": {name: result.details for name, result in results.items()},
+        })
+    
+    @timed("task_batch_analysis_ms")
+    def analyze_many(self, task_descriptions: Iterable[str]) -> List[KeywordAnalysis]:
+        """Analyze many tasks with the same compiled dictionary.
+        
+        Repeated descriptions within a batch are analyzed once and share a result.
+        Results are lightweight KeywordAnalysis tuples exposing the TaskAnalysis
+        fields; pass one to ``from_parsed`` when a pydantic model is needed.
+        
+        Args:
+            task_descriptions: Task descriptions to analyze
+        
+        Returns:
+            One KeywordAnalysis per description, in input order
+        """
+        seen: Dict[str, KeywordAnalysis] = {}
+        results = []
+        for description in task_descriptions:
+            analysis = seen.get(description)
+            if analysis is None:
+                analysis = seen[description] = self._analyze(description)
+            results.append(analysis)
+        return results
+    
+    @timed("cascade_analysis_ms")
+    async def analyze_cascade(
+        self,
+        task_description: str,
+        sampling_fn: Optional[SamplingFn] = None,
+        threshold: Optional[float] = None,
+        budget_ms: Optional[float] = None,
+    ) -> TaskAnalysis:
+        """Analyze a task, escalating to the LLM only when cheaper stages are not enough.
+        
+        Keyword analysis runs first. While the confidence is below the
+        escalation threshold the task moves on to the local classifier, whose
+        predicted services are added to the keyword analysis with the
+        classifier's probability as confidence, and then to the LLM analyzer,
+        whose result is merged with the previous stage. If the LLM fails or
+        misses ``budget_ms`` the previous stage's analysis is returned, its
+        source naming that stage (e.g. ``local_deadline``). Every request
+        increments ``cascade_requests`` and the ``cascade_<stage>_hits`` counter
+        of the stage that answered; stage latencies are recorded as
+        ``cascade_<stage>_ms``.
+        
+        Args:
+            task_description: Natural language task description
+            sampling_fn: MCP sampling function, or None to stay on keywords
+            threshold: Escalation threshold, defaults to ``escalation_threshold``
+            budget_ms: Maximum milliseconds to wait for the LLM stage
+        
+        Returns:
+            TaskAnalysis from the first stage confident enough to answer
+        """
+        collector = get_collector()
+        collector.increment("cascade_requests")
+        if threshold is None:
+            threshold = self.escalation_threshold
+        
+        start = time.perf_counter()
         parsed = self.parser.parse(task_description)
+        analysis = self.from_parsed(parsed)
+        collector.record("cascade_keyword_ms", (time.perf_counter() - start) * 1000)
+        stage = "keyword"
+        
+        if analysis.confidence < threshold:
+            start = time.perf_counter()
+            classified = self._classify(task_description, parsed)
+            collector.record("cascade_local_ms", (time.perf_counter() - start) * 1000)
+            if classified is not None:
+                parsed, analysis, stage = classified, self.from_parsed(classified), "local"
         
-        # For now, use keyword-based analysis only
-        # LLM sampling will be added in Task 2.2
-        return TaskAnalysis(
-            aws_account=parsed.aws_account,
-            aws_region=parsed.aws_region,
-            jira_project=parsed.jira_project,
-            jira_ticket=parsed.jira_ticket,
-            required_services=parsed.mentioned_services,
-            required_capabilities=parsed.mentioned_services,
-            confidence=self._calculate_confidence(parsed),
-            source="keyword",
+        if analysis.confidence >= threshold or sampling_fn is None or self.llm_analyzer is None:
+            collector.increment(f"cascade_{stage}_hits")
+            return analysis
+        
+        start = time.perf_counter()
+        try:
+            llm_result = await asyncio.wait_for(
+                self.llm_analyzer.analyze_with_llm(task_description, sampling_fn),
+                None if budget_ms is None else budget_ms / 1000,
+            )
+        except asyncio.TimeoutError:
+            # The sampling request is shielded and keeps running to fill the cache
+            collector.increment("llm_deadline_exceeded")
+            collector.increment(f"cascade_{stage}_hits")
+            analysis.source = f"{stage}_deadline"
+            return analysis
+        finally:
+            collector.record("cascade_llm_ms", (time.perf_counter() - start) * 1000)
+        
+        if llm_result.source != "llm":
+            # Fallbacks are labelled "keyword..." by the LLM analyzer; the
+            # answer is the previous stage's
+            collector.increment(f"cascade_{stage}_hits")
+            analysis.source = llm_result.source.replace("keyword", stage, 1)
+            return analysis
+        
+        collector.increment("cascade_llm_hits")
+        keyword_result = parsed.model_copy(update={
+            "required_services": analysis.required_services,
+            "required_capabilities": analysis.required_capabilities,
+            "confidence": analysis.confidence,
+        })
+        return self.from_parsed(
+            self.llm_analyzer.analyze_hybrid(task_description, llm_result, keyword_result)
         )
     
-    def _calculate_confidence(self, parsed: ParsedTask) -> float:
-        """Calculate confidence score based on extracted information."""
-        score = 0.0
-        
-        # More extracted info = higher confidence
-        if parsed.aws_account:
-            score += 0.2
-        if parsed.aws_region:
-            score += 0.2
-        if parsed.jira_ticket:
-            score += 0.2
-        if parsed.mentioned_services:
-            score += 0.3
-        
-        # Minimum baseline
-        return max(score, 0.3)
+    def _classify(self, task_description: str, parsed: ParsedTask) -> Optional[ParsedTask]:
+        """Add the local classifier's predicted services to a keyword parse.
+        
+        The parse's confidence becomes the classifier's probability for the
+        predicted labels. Returns None without a classifier or when it
+        predicts nothing.
+        """
+        if self.classifier is None:
+            return None
+        services, capabilities, probability = self.classifier.predict(task_description)
+        if not services and not capabilities:
+            return None
+        
+        merged_services = list(dict.fromkeys(parsed.mentioned_services + services))
+        return parsed.model_copy(update={
+            "mentioned_services": merged_services,
+            "required_services": merged_services,
+            "required_capabilities": list(dict.fromkeys(merged_services + capabilities)),
+            "confidence": probability,
+            "source": "local",
+        })
+    
+    def _analyze(self, task_description: str) -> KeywordAnalysis:
+        """Keyword analysis shared by single and batch entry points."""
+        return self.parser.scan(task_description)
+    
+    def from_parsed(self, parsed: Union[ParsedTask, KeywordAnalysis]) -> TaskAnalysis:
+        """Build a TaskAnalysis from a keyword, LLM or hybrid ParsedTask."""
+        return TaskAnalysis(**analysis_fields(parsed))
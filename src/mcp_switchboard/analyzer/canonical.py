@@ -0,0 +1,64 @@
+"""Canonical task descriptions shared as cache keys."""
+from __future__ import annotations
+import hashlib
+import re
+from typing import Dict
+from .parser import JIRA_TICKET_PATTERN, TaskParser
+
+# Placeholder for ticket IDs; uppercase so it never collides with lowercased words
+TICKET_PLACEHOLDER = "TICKET"
+
+# Region phrasings beyond the parser's city names
+REGION_SYNONYMS = {
+    "n. virginia": "us-east-1",
+    "n virginia": "us-east-1",
+    "northern virginia": "us-east-1",
+    "n. california": "us-west-1",
+    "n california": "us-west-1",
+    "northern california": "us-west-1",
+}
+
+# Standalone numbers, versions and dates; region codes and words such as
+# "ec2" are kept because the number is attached to a word or hyphen
+NUMERIC_NOISE = re.compile(r"(?<![\w-])\d[\d.,:/-]*(?![\w-])")
+
+PUNCTUATION = re.compile(r"[^\w\s-]|(?<![\w-])-+|-+(?![\w-])")
+
+
+def _synonym_pattern(synonyms: Dict[str, str]) -> re.Pattern:
+    """One alternation of every synonym phrase, longest first."""
+    phrases = sorted(synonyms, key=len, reverse=True)
+    alternation = "|".join(re.escape(p).replace(r"\ ", r"\s+") for p in phrases)
+    return re.compile(rf"(?<![\w-])(?:{alternation})(?![\w-])")
+
+
+SYNONYMS = {
+    **TaskParser.AWS_ACCOUNTS,
+    **TaskParser.AWS_REGIONS,
+    **REGION_SYNONYMS,
+}
+SYNONYM_PATTERN = _synonym_pattern(SYNONYMS)
+
+
+def canonicalize(task_description: str) -> str:
+    """Canonical form of a task description.
+    
+    Case and whitespace are collapsed, ticket IDs become a placeholder,
+    standalone numbers and punctuation are dropped, and account and region
+    synonyms are replaced by their normalized names, so near-identical
+    phrasings share one form. Ticket IDs are the only entity removed; callers
+    reusing a result across descriptions should restore the ticket with
+    ``parser.extract_jira_ticket``.
+    """
+    text = JIRA_TICKET_PATTERN.sub(f" {TICKET_PLACEHOLDER} ", task_description.lower())
+    text = SYNONYM_PATTERN.sub(lambda m: SYNONYMS[" ".join(m.group().split())], text)
+    text = NUMERIC_NOISE.sub(" ", text)
+    text = PUNCTUATION.sub(" ", text)
+    return " ".join(text.split())
+
+
+def canonical_key(task_description: str, *scope: str) -> str:
+    """Hash of the canonical description, optionally scoped (e.g. by model)."""
+    content = "\0".join((*scope, canonicalize(task_description)))
+    return hashlib.sha256(content.encode()).hexdigest()
+
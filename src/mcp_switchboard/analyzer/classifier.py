@@ -0,0 +1,248 @@
+"""Local task classifier trained from task history."""
+from __future__ import annotations
+import json
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .matcher import tokenize
+from ..config.registry import ServerRegistry
+from ..state.manager import StateManager, selected_servers
+
+# (task_description, services, capabilities)
+Example = Tuple[str, Sequence[str], Sequence[str]]
+
+SERVICE_PREFIX = "service:"
+CAPABILITY_PREFIX = "capability:"
+
+
+def hash_features(text: str, n_features: int) -> np.ndarray:
+    """Hashed unigram and bigram feature indices present in ``text``.
+    
+    CRC32 is used instead of ``hash()`` so indices are stable across
+    processes and a saved model can be reused.
+    """
+    tokens = tokenize(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return np.unique(np.fromiter(
+        (zlib.crc32(gram.encode()) % n_features for gram in grams),
+        dtype=np.int64,
+        count=len(grams),
+    ))
+
+
+def _labels(value: Any) -> List[str]:
+    """Labels of a stored analysis field, which must be a list of strings."""
+    if not isinstance(value, list):
+        return []
+    return [label for label in value if isinstance(label, str)]
+
+
+def examples_from_state(
+    state_manager: StateManager,
+    registry: Optional[ServerRegistry] = None,
+) -> Iterable[Example]:
+    """Training examples from successful tasks in the state database.
+    
+    Labels are the services and capabilities of the stored analysis plus
+    those of every server in the selection that worked; a server's primary
+    capability counts as a service.
+    
+    Rows whose stored analysis or selection cannot be decoded are skipped,
+    and label fields that are not lists are ignored.
+    """
+    registry = registry or ServerRegistry()
+    for row in state_manager.iter_successful_tasks():
+        try:
+            analysis = json.loads(row["analysis_json"] or "{}")
+            selection = json.loads(row["selection_json"] or "{}")
+            if not isinstance(analysis, dict) or not isinstance(selection, dict):
+                continue
+            servers = selected_servers(selection)
+            services = set(_labels(analysis.get("required_services")))
+            capabilities = set(_labels(analysis.get("required_capabilities")))
+        except (TypeError, ValueError, KeyError):
+            continue
+        
+        for server_name in servers:
+            server_caps = registry.get_server(server_name).get("capabilities", [])
+            if server_caps:
+                services.add(server_caps[0])
+                capabilities.update(server_caps)
+        
+        if services or capabilities:
+            yield row["task_description"], sorted(services), sorted(capabilities)
+
+
+class TaskClassifier:
+    """Hashed-feature naive Bayes model predicting services and capabilities.
+    
+    Each label is an independent one-vs-rest multinomial naive Bayes model
+    over hashed unigrams and bigrams, so prediction is a row gather and a sum
+    over a dense weight matrix and takes microseconds.
+    """
+    
+    DEFAULT_N_FEATURES = 2 ** 14
+    FILENAME = "task_classifier.npz"
+    
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: np.ndarray,
+        labels: Sequence[str],
+        trained_on: int = 0,
+    ) -> None:
+        self.weights = weights
+        self.bias = bias
+        self.labels = list(labels)
+        self.trained_on = trained_on
+    
+    @property
+    def n_features(self) -> int:
+        """Size of the hashed feature space."""
+        return int(self.weights.shape[0])
+    
+    @classmethod
+    def default_path(cls, db_path: str = "~/.mcp-switchboard/state.db") -> Path:
+        """Model path next to the state database."""
+        return Path(db_path).expanduser().with_name(cls.FILENAME)
+    
+    @classmethod
+    def train(
+        cls,
+        examples: Iterable[Example],
+        n_features: int = DEFAULT_N_FEATURES,
+        alpha: float = 1.0,
+        chunk_size: int = 5000,
+    ) -> TaskClassifier:
+        """Fit the model on (description, services, capabilities) examples.
+        
+        Examples are consumed in chunks and reduced to per-label feature
+        counts, so memory depends on the label count, not the history size.
+        
+        Args:
+            examples: Training examples, e.g. from ``examples_from_state``
+            n_features: Size of the hashed feature space
+            alpha: Additive smoothing
+            chunk_size: Examples per counting chunk
+        """
+        label_index: Dict[str, int] = {}
+        positive = np.zeros((n_features, 0))
+        doc_freq = np.zeros(n_features)
+        n_positive: List[int] = []
+        n_docs = 0
+        
+        examples = iter(examples)
+        while True:
+            chunk = [example for _, example in zip(range(chunk_size), examples)]
+            if not chunk:
+                break
+            
+            features = []
+            doc_labels = []
+            for description, services, capabilities in chunk:
+                features.append(hash_features(description, n_features))
+                labels = [SERVICE_PREFIX + s for s in services]
+                labels += [CAPABILITY_PREFIX + c for c in capabilities]
+                for label in labels:
+                    if label not in label_index:
+                        label_index[label] = len(label_index)
+                        n_positive.append(0)
+                doc_labels.append({label_index[label] for label in labels})
+            
+            if len(label_index) > positive.shape[1]:
+                positive = np.pad(positive, ((0, 0), (0, len(label_index) - positive.shape[1])))
+            
+            lengths = np.fromiter((len(f) for f in features), dtype=np.int64, count=len(chunk))
+            feature_idx = np.concatenate(features) if features else np.zeros(0, dtype=np.int64)
+            doc_idx = np.repeat(np.arange(len(chunk)), lengths)
+            doc_freq += np.bincount(feature_idx, minlength=n_features)
+            
+            y = np.zeros((len(chunk), len(label_index)))
+            for row, label_ids in enumerate(doc_labels):
+                y[row, list(label_ids)] = 1.0
+            for column in np.flatnonzero(y.any(axis=0)):
+                positive[:, column] += np.bincount(
+                    feature_idx, weights=y[doc_idx, column], minlength=n_features
+                )
+                n_positive[column] += int(y[:, column].sum())
+            n_docs += len(chunk)
+        
+        negative = doc_freq[:, None] - positive
+        log_pos = np.log(positive + alpha) - np.log(positive.sum(axis=0) + alpha * n_features)
+        log_neg = np.log(negative + alpha) - np.log(negative.sum(axis=0) + alpha * n_features)
+        pos_docs = np.asarray(n_positive, dtype=float)
+        bias = np.log(pos_docs + 1) - np.log(n_docs - pos_docs + 1)
+        
+        labels = sorted(label_index, key=lambda label: label_index[label])
+        return cls((log_pos - log_neg).astype(np.float32), bias.astype(np.float32), labels, n_docs)
+    
+    @classmethod
+    def train_from_state(
+        cls,
+        state_manager: Optional[StateManager] = None,
+        registry: Optional[ServerRegistry] = None,
+        **kwargs: Any,
+    ) -> TaskClassifier:
+        """Fit the model on the successful tasks of a state database."""
+        state_manager = state_manager or StateManager()
+        return cls.train(examples_from_state(state_manager, registry), **kwargs)
+    
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Probability of every label for ``text``."""
+        idx = hash_features(text, self.n_features)
+        scores = self.bias + self.weights[idx].sum(axis=0)
+        probabilities = 1.0 / (1.0 + np.exp(-np.clip(scores, -30.0, 30.0)))
+        return dict(zip(self.labels, probabilities.tolist()))
+    
+    def predict(
+        self,
+        text: str,
+        min_probability: float = 0.7,
+    ) -> Tuple[List[str], List[str], float]:
+        """Predict the services and capabilities a task needs.
+        
+        Returns:
+            Services, capabilities, and the lowest probability among the
+            predicted labels (0.0 when nothing is predicted)
+        """
+        services: List[str] = []
+        capabilities: List[str] = []
+        lowest = 1.0
+        for label, probability in self.predict_proba(text).items():
+            if probability < min_probability:
+                continue
+            lowest = min(lowest, probability)
+            if label.startswith(SERVICE_PREFIX):
+                services.append(label[len(SERVICE_PREFIX):])
+            else:
+                capabilities.append(label[len(CAPABILITY_PREFIX):])
+        return services, capabilities, lowest if services or capabilities else 0.0
+    
+    def save(self, path: Optional[Path] = None) -> Path:
+        """Serialize the model, by default next to the state database."""
+        path = Path(path).expanduser() if path else self.default_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                weights=self.weights,
+                bias=self.bias,
+                labels=np.array(self.labels, dtype=str),
+                trained_on=np.array(self.trained_on),
+            )
+        return path
+    
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> Optional[TaskClassifier]:
+        """Load a saved model, or None if none has been trained yet."""
+        path = Path(path).expanduser() if path else cls.default_path()
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["weights"],
+                data["bias"],
+                data["labels"].tolist(),
+                int(data["trained_on"]),
+            )
@@ -1,115 +1,378 @@
 """LLM-based semantic task analyzer using MCP sampling."""
-from typing import Optional
-from mcp.types import SamplingMessage, TextContent, Role
-from mcp_switchboard.analyzer.parser import TaskParser, ParsedTask
+import asyncio
+import json
+import time
+from contextlib import nullcontext
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from mcp.types import SamplingMessage, TextContent, ModelPreferences, ModelHint
+from mcp_switchboard.analyzer.parser import TaskParser, ParsedTask, extract_jira_ticket
+from mcp_switchboard.analyzer.llm_cache import LLMAnalysisCache
+from mcp_switchboard.analyzer.prompt_builder import PromptBuilder
+from mcp_switchboard.analyzer.sampling_limiter import SamplingLimiter
+from mcp_switchboard.observability import get_logger
+from mcp_switchboard.utils.metrics import get_collector, timed
+
+# MCP client session sampling function (``session.create_message``)
+SamplingFn = Callable[..., Awaitable[Any]]
 
 
 class LLMTaskAnalyzer:
     """Analyzes tasks using LLM sampling for semantic understanding."""
     
-    def __init__(self, model: str = "claude-3-5-sonnet-20241022"):
+    # Bump whenever the prompt format changes so cached analyses are not reused
+    PROMPT_VERSION = "2"
+    
+    # Output tokens allowed for one analysis, alone or as an item of a batch
+    MAX_TOKENS = 200
+    BATCH_ITEM_MAX_TOKENS = 120
+    
+    def __init__(
+        self,
+        model: str = "claude-3-5-sonnet-20241022",
+        cache: Optional[LLMAnalysisCache] = None,
+        prompt_builder: Optional[PromptBuilder] = None,
+        limiter: Optional[SamplingLimiter] = None
+    ):
         self.model = model
         self.parser = TaskParser()
+        self.cache = cache
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        # Shared admission control; requests it rejects are keyword parsed
+        self.limiter = limiter
+        self._inflight: Dict[str, asyncio.Future] = {}
     
     def _create_analysis_prompt(self, task_description: str) -> str:
         """Create prompt for LLM analysis."""
-        return f"""Analyze this DevOps task and extract structured information:
-
-Task: "{task_description}"
-
-Extract and return ONLY a JSON object with these fields:
-{{
-  "aws_account": "prod|staging|dev|uat or null",
-  "aws_region": "AWS region code or null",
-  "jira_project": "JIRA project key or null",
-  "jira_ticket": "Full ticket ID (e.g., DEVOPS-123) or null",
-  "required_services": ["list", "of", "services"],
-  "required_capabilities": ["list", "of", "capabilities"],
-  "confidence": 0.0-1.0
-}}
-
-Services can be: aws, jira, github, terraform, kubernetes, docker, etc.
-Capabilities can be: deployment, infrastructure, monitoring, security, etc.
-
-Return ONLY the JSON, no explanation."""
+        prompt = self.prompt_builder.build(task_description)
+        get_collector().record("llm_prompt_tokens", prompt.tokens)
+        return prompt.text
+    
+    def _create_batch_prompt(self, task_descriptions: Sequence[str]) -> str:
+        """Create prompt for analyzing several tasks in one LLM request."""
+        prompt = self.prompt_builder.build_batch(task_descriptions)
+        get_collector().record("llm_prompt_tokens", prompt.tokens)
+        return prompt.text
     
     async def analyze_with_llm(
         self,
         task_description: str,
-        sampling_fn
+        sampling_fn: SamplingFn
     ) -> ParsedTask:
         """Analyze task using LLM sampling.
         
         Args:
             task_description: Natural language task description
             sampling_fn: MCP sampling function from client session
-            
+        
         Returns:
             ParsedTask with LLM-enhanced analysis
         """
-        prompt = self._create_analysis_prompt(task_description)
-        
-        try:
-            # Use MCP sampling
-            result = await sampling_fn(
-                messages=[
-                    SamplingMessage(
-                        role=Role.user,
-                        content=TextContent(type="text", text=prompt)
-                    )
-                ],
-                modelPreferences={
-                    "hints": [{"name": self.model}]
-                },
-                maxTokens=500
-            )
+        key = LLMAnalysisCache.make_key(task_description, self.model, self.PROMPT_VERSION)
+        
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._for_description(cached, task_description)
+        
+        # Coalesce concurrent requests for the same description onto one sampling call
+        task = self._inflight.get(key)
+        if task is not None:
+            get_collector().increment("llm_coalesced_requests")
+            # Followers get a copy so callers never share one mutable result
+            return self._for_description(await asyncio.shield(task), task_description)
+        
+        task = asyncio.ensure_future(self._sample(task_description, sampling_fn, key))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # Shielded so a cancelled leader does not cancel its followers
+        return await asyncio.shield(task)
+    
+    async def _sample(self, task_description: str, sampling_fn: SamplingFn, cache_key: str) -> ParsedTask:
+        """Run one sampling request, falling back to keyword parsing on failure."""
+        async with self._admission() as admitted:
+            if not admitted:
+                return self._rate_limited(task_description)
             
-            # Parse LLM response
-            import json
-            response_text = result.content.text if hasattr(result.content, 'text') else str(result.content)
+            prompt = self._create_analysis_prompt(task_description)
             
-            # Extract JSON from response
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = response_text[json_start:json_end]
-                data = json.loads(json_str)
+            try:
+                # Use MCP sampling
+                result = await sampling_fn(
+                    messages=[
+                        SamplingMessage(
+                            role="user",
+                            content=TextContent(type="text", text=prompt)
+                        )
+                    ],
+                    model_preferences=ModelPreferences(
+                        hints=[ModelHint(name=self.model)]
+                    ),
+                    max_tokens=self.MAX_TOKENS
+                )
+                
+                # Parse LLM response
+                response_text = self._response_text(result)
                 
-                return ParsedTask(
-                    aws_account=data.get("aws_account"),
-                    aws_region=data.get("aws_region"),
-                    jira_project=data.get("jira_project"),
-                    jira_ticket=data.get("jira_ticket"),
-                    required_services=data.get("required_services", []),
-                    required_capabilities=data.get("required_capabilities", []),
-                    confidence=data.get("confidence", 0.9),
-                    source="llm"
+                # Extract JSON from response
+                json_start = response_text.find('{')
+                json_end = response_text.rfind('}') + 1
+                if json_start >= 0 and json_end > json_start:
+                    json_str = response_text[json_start:json_end]
+                    parsed = self._parsed_from_json(json.loads(json_str))
+                    
+                    # Only successful LLM analyses are cached, never fallbacks
+                    if self.cache is not None:
+                        self.cache.set(cache_key, parsed)
+                    return parsed
+            except Exception as e:
+                # Fallback to keyword-based parsing; stdout carries the stdio transport
+                get_logger().error("llm_analysis_failed", "llm_analyzer", error=str(e), fallback="keyword")
+            
+            # Fallback to keyword-based parser
+            return self._keyword_fallback(task_description)
+    
+    @staticmethod
+    def _response_text(result: Any) -> str:
+        """Text of a sampling result."""
+        return result.content.text if hasattr(result.content, 'text') else str(result.content)
+    
+    @staticmethod
+    def _parsed_from_json(data: Dict) -> ParsedTask:
+        """Build a ParsedTask from one JSON analysis object."""
+        return ParsedTask(
+            aws_account=data.get("aws_account"),
+            aws_region=data.get("aws_region"),
+            jira_project=data.get("jira_project"),
+            jira_ticket=data.get("jira_ticket"),
+            required_services=data.get("required_services", []),
+            required_capabilities=data.get("required_capabilities", []),
+            confidence=data.get("confidence", 0.9),
+            source="llm"
+        )
+    
+    def _keyword_fallback(self, task_description: str) -> ParsedTask:
+        """Keyword parse marked as an LLM fallback."""
+        parsed = self.parser.parse(task_description)
+        parsed.source = "keyword_fallback"
+        return parsed
+    
+    def _rate_limited(self, task_description: str) -> ParsedTask:
+        """Keyword parse for a request the sampling limiter turned away."""
+        parsed = self.parser.parse(task_description)
+        parsed.source = "keyword_rate_limited"
+        return parsed
+    
+    def _admission(self) -> AsyncContextManager[bool]:
+        """Slot of the sampling limiter, or an unconditional admission without one."""
+        if self.limiter is None:
+            return nullcontext(True)
+        return self.limiter.slot()
+    
+    @timed("llm_batch_analysis_ms")
+    async def analyze_many_with_llm(
+        self,
+        task_descriptions: Sequence[str],
+        sampling_fn: SamplingFn,
+        batch_size: int = 25
+    ) -> List[ParsedTask]:
+        """Analyze many tasks with one sampling request per batch.
+        
+        Cached descriptions are answered from the cache and duplicates are
+        analyzed once. The remaining descriptions are packed, batch_size at a
+        time, into indexed prompts whose JSON array answers are mapped back by
+        index. Batches are sent concurrently. Any task missing from or
+        malformed in its batch's answer falls back to keyword parsing on its
+        own; the others keep their LLM analysis.
+        
+        Args:
+            task_descriptions: Natural language task descriptions
+            sampling_fn: MCP sampling function from client session
+            batch_size: Maximum tasks per sampling request
+        
+        Returns:
+            One ParsedTask per description, in input order
+        """
+        keys = [
+            LLMAnalysisCache.make_key(description, self.model, self.PROMPT_VERSION)
+            for description in task_descriptions
+        ]
+        results: Dict[str, ParsedTask] = {}
+        pending: Dict[str, str] = {}
+        
+        for key, description in zip(keys, task_descriptions):
+            if key in results or key in pending:
+                continue
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                results[key] = cached
+            else:
+                pending[key] = description
+        
+        tasks = list(pending.items())
+        batches = [tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size)]
+        for batch_results in await asyncio.gather(
+            *(self._sample_batch(batch, sampling_fn) for batch in batches)
+        ):
+            results.update(batch_results)
+        
+        return [
+            self._for_description(results[key], description)
+            for key, description in zip(keys, task_descriptions)
+        ]
+    
+    async def _sample_batch(
+        self,
+        tasks: List[Tuple[str, str]],
+        sampling_fn: SamplingFn
+    ) -> Dict[str, ParsedTask]:
+        """Run one batch sampling request, falling back per task on failure.
+        
+        Args:
+            tasks: (cache key, description) pairs
+            sampling_fn: MCP sampling function from client session
+        
+        Returns:
+            Analyses by cache key
+        """
+        collector = get_collector()
+        items: Dict[int, Dict] = {}
+        
+        async with self._admission() as admitted:
+            if not admitted:
+                return {key: self._rate_limited(description) for key, description in tasks}
+            collector.increment("llm_batch_requests")
+            
+            try:
+                result = await sampling_fn(
+                    messages=[
+                        SamplingMessage(
+                            role="user",
+                            content=TextContent(
+                                type="text",
+                                text=self._create_batch_prompt([d for _, d in tasks])
+                            )
+                        )
+                    ],
+                    model_preferences=ModelPreferences(
+                        hints=[ModelHint(name=self.model)]
+                    ),
+                    max_tokens=self.BATCH_ITEM_MAX_TOKENS * len(tasks)
                 )
-        except Exception as e:
-            # Fallback to keyword-based parsing
-            print(f"LLM analysis failed: {e}, falling back to keyword parsing")
-            pass
+                
+                response_text = self._response_text(result)
+                json_start = response_text.find('[')
+                json_end = response_text.rfind(']') + 1
+                if json_start >= 0 and json_end > json_start:
+                    for item in json.loads(response_text[json_start:json_end]):
+                        if isinstance(item, dict) and isinstance(item.get("index"), int):
+                            items[item["index"]] = item
+            except Exception as e:
+                get_logger().error(
+                    "llm_batch_analysis_failed", "llm_analyzer",
+                    error=str(e), tasks=len(tasks), fallback="keyword",
+                )
+        
+        results = {}
+        for index, (key, description) in enumerate(tasks):
+            try:
+                parsed = self._parsed_from_json(items[index])
+            except Exception:
+                # Missing or malformed items fall back individually
+                collector.increment("llm_batch_fallbacks")
+                results[key] = self._keyword_fallback(description)
+                continue
+            
+            if self.cache is not None:
+                self.cache.set(key, parsed)
+            results[key] = parsed
+        
+        return results
+    
+    @staticmethod
+    def _for_description(parsed: ParsedTask, task_description: str) -> ParsedTask:
+        """Copy of a result shared by canonically equal descriptions.
         
-        # Fallback to keyword-based parser
+        Canonical keys ignore ticket numbers, so the ticket is taken from the
+        description itself.
+        """
+        ticket = extract_jira_ticket(task_description)
+        if ticket is None:
+            return parsed.model_copy()
+        return parsed.model_copy(update={"jira_ticket": ticket, "jira_project": ticket.split("-")[0]})
+    
+    @timed("hedged_analysis_ms")
+    async def analyze_hedged(
+        self,
+        task_description: str,
+        sampling_fn: SamplingFn,
+        budget_ms: Optional[float] = None
+    ) -> ParsedTask:
+        """Run keyword and LLM analysis concurrently under a latency budget.
+        
+        The sampling request is started first and keyword parsing runs while
+        it is in flight. If the LLM answers within the budget the two results
+        are merged with analyze_hybrid; otherwise the keyword result is
+        returned as soon as the budget expires (source ``keyword_deadline``)
+        and the LLM request finishes in the background, filling the cache.
+        
+        Args:
+            task_description: Natural language task description
+            sampling_fn: MCP sampling function from client session
+            budget_ms: Latency budget in milliseconds, or None to wait for the LLM
+        
+        Returns:
+            ParsedTask with hybrid or keyword analysis
+        """
+        start = time.perf_counter()
+        llm_task = asyncio.ensure_future(self.analyze_with_llm(task_description, sampling_fn))
+        await asyncio.sleep(0)  # let the sampling request go out before parsing
+        
+        keyword_result = self._keyword_result(task_description)
+        
+        timeout = None
+        if budget_ms is not None:
+            timeout = max(0.0, budget_ms / 1000 - (time.perf_counter() - start))
+        done, _ = await asyncio.wait({llm_task}, timeout=timeout)
+        
+        if not done:
+            get_collector().increment("llm_deadline_exceeded")
+            llm_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            keyword_result.source = "keyword_deadline"
+            return keyword_result
+        
+        llm_result = llm_task.result()
+        if llm_result.source != "llm":
+            keyword_result.source = llm_result.source
+            return keyword_result
+        
+        return self.analyze_hybrid(task_description, llm_result, keyword_result)
+    
+    def _keyword_result(self, task_description: str) -> ParsedTask:
+        """Keyword parse with mentioned services promoted to requirements."""
         parsed = self.parser.parse(task_description)
-        parsed.source = "keyword_fallback"
+        parsed.required_services = list(parsed.mentioned_services)
+        parsed.required_capabilities = list(parsed.mentioned_services)
         return parsed
     
     def analyze_hybrid(
         self,
         task_description: str,
-        llm_result: Optional[ParsedTask] = None
+        llm_result: Optional[ParsedTask] = None,
+        keyword_result: Optional[ParsedTask] = None
     ) -> ParsedTask:
         """Combine LLM and keyword-based analysis.
         
         Args:
             task_description: Natural language task description
             llm_result: Optional LLM analysis result
-            
+            keyword_result: Optional keyword result already parsed from the description
+        
         Returns:
             ParsedTask with hybrid analysis
         """
-        keyword_result = self.parser.parse(task_description)
+        if keyword_result is None:
+            keyword_result = self._keyword_result(task_description)
         
         if llm_result is None:
             return keyword_result
@@ -122,6 +385,8 @@ Return ONLY the JSON, no explanation."""
                 aws_region=llm_result.aws_region or keyword_result.aws_region,
                 jira_project=llm_result.jira_project or keyword_result.jira_project,
                 jira_ticket=llm_result.jira_ticket or keyword_result.jira_ticket,
+                aws_accounts=self._merge_targets(llm_result.aws_account, keyword_result.aws_accounts),
+                aws_regions=self._merge_targets(llm_result.aws_region, keyword_result.aws_regions),
                 required_services=list(set(
                     llm_result.required_services + keyword_result.required_services
                 )),
@@ -134,3 +399,9 @@ Return ONLY the JSON, no explanation."""
         else:
             # Low LLM confidence, prefer keyword parsing
             return keyword_result
+    
+    @staticmethod
+    def _merge_targets(llm_target: Optional[str], keyword_targets: List[str]) -> List[str]:
+        """Keyword-extracted targets led by the LLM's primary choice."""
+        targets = [llm_target] if llm_target else []
+        return targets + [t for t in keyword_targets if t != llm_target]
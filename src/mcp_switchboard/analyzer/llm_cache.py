@@ -0,0 +1,136 @@
+"""Persistent cache for LLM task analyses."""
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from .canonical import canonical_key
+from .parser import ParsedTask
+from ..utils.metrics import get_collector
+
+
+class LLMAnalysisCache:
+    """SQLite-backed LRU cache of LLM analyses with TTL.
+    
+    Entries are keyed by canonical description, model and prompt version, so
+    rephrasings share an entry while changing either the model or the prompt
+    never serves stale analyses.
+    Hits and misses are counted in the global metrics collector as
+    ``llm_cache_hits`` and ``llm_cache_misses``.
+    """
+    
+    def __init__(
+        self,
+        db_path: str = "~/.mcp-switchboard/llm_cache.db",
+        max_entries: int = 10000,
+        ttl_seconds: int = 7 * 24 * 3600,
+    ) -> None:
+        self.db_path = Path(db_path).expanduser()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Access times of hits not yet written back; flushed on the next write
+        self._touched: Dict[str, float] = {}
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._init_db()
+    
+    def _init_db(self) -> None:
+        """Create cache table."""
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                result_json TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(task_description: str, model: str, prompt_version: str) -> str:
+        """Build the cache key for a description, model and prompt version."""
+        return canonical_key(task_description, model, prompt_version)
+    
+    def get(self, key: str) -> Optional[ParsedTask]:
+        """Get a cached analysis, or None if missing or expired."""
+        collector = get_collector()
+        now = time.time()
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result_json, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            
+            if row is None:
+                collector.increment("llm_cache_misses")
+                return None
+            
+            self._touched[key] = now
+        
+        collector.increment("llm_cache_hits")
+        return ParsedTask.model_validate_json(row[0])
+    
+    def set(self, key: str, result: ParsedTask) -> None:
+        """Store an analysis, evicting least recently used entries over the limit."""
+        now = time.time()
+        
+        with self._lock:
+            self._flush_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, result_json, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, result.model_dump_json(), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+    
+    def _flush_touched(self) -> None:
+        """Write back access times recorded by cache hits."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._touched.items()],
+            )
+            self._touched.clear()
+    
+    def clear(self) -> None:
+        """Remove all cached analyses."""
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics."""
+        collector = get_collector()
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {
+            "total_entries": total,
+            "max_entries": self.max_entries,
+            "hits": collector.get_counter("llm_cache_hits"),
+            "misses": collector.get_counter("llm_cache_misses"),
+        }
+    
+    def close(self) -> None:
+        """Flush pending access times and close the database."""
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,140 @@
+"""Multi-pattern keyword matching for task descriptions."""
+from __future__ import annotations
+import re
+from collections import deque
+from typing import Dict, Generic, Hashable, Iterable, List, Set, Tuple, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+# Words and single punctuation characters. Matching on these tokens gives
+# word-boundary semantics for free ("pr" never matches inside "prod") while
+# still allowing keywords such as "devops-" or "eu-west-1".
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split lowercased text into match tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def normalize(token: str) -> str:
+    """Strip a plural ending so "repos", "bugs" and "repositories" match their keywords.
+    
+    Harman's S-stemmer on tokens longer than three characters: "ies" becomes
+    "y", and a final "s" is dropped unless the token ends in "aes", "ees",
+    "oes", "ss" or "us". Short tokens such as "aws" or "ecs" are kept whole.
+    """
+    if len(token) <= 3 or token[-1] != "s" or token.endswith(("ss", "us", "aes", "ees", "oes")):
+        return token
+    if token.endswith("ies") and not token.endswith(("aies", "eies")):
+        return token[:-3] + "y"
+    return token[:-1]
+
+
+class KeywordMatcher(Generic[T]):
+    """Aho-Corasick automaton over word tokens.
+    
+    Every keyword is compiled once into a token trie with failure links, so a
+    single left-to-right pass over the text reports all keyword hits no matter
+    how many keywords are registered. Keywords and text tokens are both
+    normalized, so plurals match, and a multi-word keyword also matches with
+    hyphens between its words ("pull-request").
+    """
+    
+    def __init__(self, keywords: Iterable[Tuple[str, T]]) -> None:
+        """Compile the automaton.
+        
+        Args:
+            keywords: (keyword, payload) pairs. A keyword may appear several
+                times with different payloads.
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[T, ...]] = [()]
+        self._size = 0
+        
+        for keyword, payload in keywords:
+            tokens = [normalize(token) for token in tokenize(keyword)]
+            if not tokens:
+                continue
+            self._add(tokens, payload)
+            words = keyword.split()
+            if len(words) > 1:
+                self._add([normalize(token) for token in tokenize("-".join(words))], payload)
+            self._size += 1
+        self._link()
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def _add(self, tokens: List[str], payload: T) -> None:
+        """Insert the normalized tokens of a keyword into the trie."""
+        state = 0
+        for token in tokens:
+            nxt = self._goto[state].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        
+        if payload not in self._out[state]:
+            self._out[state] += (payload,)
+    
+    def _link(self) -> None:
+        """Build failure links breadth-first and merge suffix outputs."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                extra = tuple(p for p in self._out[self._fail[nxt]] if p not in self._out[nxt])
+                self._out[nxt] += extra
+    
+    def advance(self, state: int, token: str) -> int:
+        """Follow one token from ``state`` and return the next state."""
+        token = normalize(token)
+        goto = self._goto
+        fail = self._fail
+        while True:
+            nxt = goto[state].get(token)
+            if nxt is not None:
+                return nxt
+            if state == 0:
+                return 0
+            state = fail[state]
+    
+    def outputs(self, state: int) -> Tuple[T, ...]:
+        """Payloads of every keyword ending at ``state``."""
+        return self._out[state]
+    
+    def scan_tokens(self, tokens: Iterable[str], state: int = 0) -> Tuple[List[T], int]:
+        """Run the automaton over tokens.
+        
+        Returns:
+            Payload hits in order of occurrence and the final automaton state,
+            so a caller can resume scanning where it left off.
+        """
+        hits: List[T] = []
+        advance = self.advance
+        out = self._out
+        for token in tokens:
+            state = advance(state, token)
+            if out[state]:
+                hits.extend(out[state])
+        return hits, state
+    
+    def find_all(self, text: str) -> List[T]:
+        """Return every payload hit in ``text`` in order of occurrence."""
+        return self.scan_tokens(tokenize(text))[0]
+    
+    def find(self, text: str) -> Set[T]:
+        """Return the distinct payloads hit in ``text``."""
+        return set(self.find_all(text))
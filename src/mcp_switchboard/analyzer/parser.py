@@ -1,27 +1,246 @@
 """Task parser for extracting structured information from task descriptions."""
 from __future__ import annotations
 import re
-from typing import Optional, List
+from typing import Any, ClassVar, Dict, Iterable, NamedTuple, Optional, List, Set, Tuple, Union
 from pydantic import BaseModel
+from .matcher import TOKEN_PATTERN, KeywordMatcher
+from ..config.registry import ServerRegistry
+
+Hit = Tuple[str, str]
+
+# The lookbehind keeps region codes such as "eu-west-1" from matching
+JIRA_TICKET_PATTERN = re.compile(r'(?<![\w-])([A-Z]+-\d+)', re.IGNORECASE)
+
+WORD_PATTERN = re.compile(r'\w')
 
 
 class ParsedTask(BaseModel):
     """Structured information extracted from task description."""
     aws_account: Optional[str] = None
     aws_region: Optional[str] = None
+    aws_accounts: List[str] = []
+    aws_regions: List[str] = []
     jira_project: Optional[str] = None
     jira_ticket: Optional[str] = None
     mentioned_services: List[str] = []
-    keywords: List[str] = []
     required_services: List[str] = []
     required_capabilities: List[str] = []
     confidence: float = 0.0
     source: str = "keyword"
 
 
+def extract_jira_ticket(text: str) -> Optional[str]:
+    """Extract the first Jira ticket ID from text."""
+    match = JIRA_TICKET_PATTERN.search(text)
+    return match.group(1).upper() if match else None
+
+
+def keyword_confidence(parsed: Any) -> float:
+    """Confidence score of a parse based on how much information it extracted."""
+    score = 0.0
+    
+    # More extracted info = higher confidence
+    if parsed.aws_account:
+        score += 0.2
+    if parsed.aws_region:
+        score += 0.2
+    if parsed.jira_ticket:
+        score += 0.2
+    if parsed.mentioned_services:
+        score += 0.3
+    
+    # Minimum baseline
+    return max(score, 0.3)
+
+
+# Fields a TaskAnalysis is built from, read alike from a ParsedTask or a KeywordAnalysis
+ANALYSIS_FIELDS = (
+    "aws_account", "aws_region", "aws_accounts", "aws_regions", "jira_project",
+    "jira_ticket", "required_services", "required_capabilities", "confidence", "source",
+)
+
+
+def analysis_fields(parsed: Union[ParsedTask, KeywordAnalysis]) -> Dict[str, Any]:
+    """Keyword arguments of the TaskAnalysis equivalent to a parse.
+    
+    Required services default to the mentioned ones, required capabilities
+    to the required services, and a zero confidence to the keyword confidence.
+    """
+    fields = {name: getattr(parsed, name) for name in ANALYSIS_FIELDS}
+    fields["aws_accounts"] = list(parsed.aws_accounts)
+    fields["aws_regions"] = list(parsed.aws_regions)
+    services = list(parsed.required_services or parsed.mentioned_services)
+    fields["required_services"] = services
+    fields["required_capabilities"] = list(parsed.required_capabilities or services)
+    fields["confidence"] = parsed.confidence or keyword_confidence(parsed)
+    return fields
+
+
+class KeywordAnalysis(NamedTuple):
+    """Keyword analysis result for the hot path.
+    
+    A plain immutable tuple built without validation. It exposes the fields
+    of both ParsedTask and TaskAnalysis, with the derived ones computed on
+    access, so it can be passed wherever those are read. Convert it with
+    ``to_parsed`` or ``TaskAnalyzer.from_parsed`` where a model is needed.
+    """
+    aws_accounts: Tuple[str, ...]
+    aws_regions: Tuple[str, ...]
+    jira_ticket: Optional[str]
+    mentioned_services: Tuple[str, ...]
+    source: str = "keyword"
+    
+    @property
+    def aws_account(self) -> Optional[str]:
+        """Primary AWS account."""
+        return self.aws_accounts[0] if self.aws_accounts else None
+    
+    @property
+    def aws_region(self) -> Optional[str]:
+        """Primary AWS region."""
+        return self.aws_regions[0] if self.aws_regions else None
+    
+    @property
+    def jira_project(self) -> Optional[str]:
+        """Jira project key of the ticket."""
+        return self.jira_ticket.split('-')[0] if self.jira_ticket else None
+    
+    @property
+    def required_services(self) -> Tuple[str, ...]:
+        """Services the task needs, as mentioned."""
+        return self.mentioned_services
+    
+    @property
+    def required_capabilities(self) -> Tuple[str, ...]:
+        """Capabilities the task needs, as mentioned."""
+        return self.mentioned_services
+    
+    @property
+    def confidence(self) -> float:
+        """Confidence computed from the extracted information."""
+        return keyword_confidence(self)
+    
+    def aws_targets(self) -> List[Tuple[str, str]]:
+        """Every (account, region) pair the task targets, as TaskAnalysis.aws_targets."""
+        regions = self.aws_regions or ("us-east-1",)
+        return [(account, region) for account in self.aws_accounts for region in regions]
+    
+    def model_dump(self) -> Dict[str, Any]:
+        """The equivalent TaskAnalysis as a dict, for the JSON boundary."""
+        from .analyzer import TaskAnalysis
+        return TaskAnalysis(**analysis_fields(self)).model_dump()
+    
+    def to_parsed(self) -> ParsedTask:
+        """Convert to a ParsedTask model."""
+        return ParsedTask(
+            aws_account=self.aws_account,
+            aws_region=self.aws_region,
+            aws_accounts=list(self.aws_accounts),
+            aws_regions=list(self.aws_regions),
+            jira_project=self.jira_project,
+            jira_ticket=self.jira_ticket,
+            mentioned_services=list(self.mentioned_services),
+        )
+
+
+class KeywordDictionary:
+    """Account, region, service and server keywords compiled into one matcher.
+    
+    Hits are ``(kind, value)`` pairs where kind is ``account``, ``region``,
+    ``service`` or ``server``.
+    """
+    
+    def __init__(self, matcher: KeywordMatcher[Hit], services: List[str]) -> None:
+        self.matcher = matcher
+        self.services = services
+    
+    @classmethod
+    def build(
+        cls,
+        accounts: Dict[str, str],
+        regions: Dict[str, str],
+        region_codes: Iterable[str],
+        service_keywords: Dict[str, List[str]],
+        registry: ServerRegistry,
+    ) -> "KeywordDictionary":
+        """Compile built-in tables and registry entries."""
+        entries: List[Tuple[str, Hit]] = []
+        services: Dict[str, None] = {}
+        
+        entries.extend((alias, ("account", account)) for alias, account in accounts.items())
+        entries.extend((alias, ("region", code)) for alias, code in regions.items())
+        entries.extend((code, ("region", code)) for code in region_codes)
+        
+        for service, keywords in service_keywords.items():
+            services[service] = None
+            entries.extend((kw, ("service", service)) for kw in keywords)
+        # Words the built-in table already maps keep their meaning
+        known = {kw.lower() for keywords in service_keywords.values() for kw in keywords}
+        known.update(service_keywords)
+        
+        for server_name in registry.list_servers():
+            config = registry.get_server(server_name)
+            capabilities = config.get("capabilities", [])
+            if not capabilities:
+                continue
+            
+            # A server covered by the built-in table is required as those
+            # services; any other server as its capabilities
+            provided = [c for c in capabilities if c in service_keywords] or capabilities
+            keywords = config.get("confidence_keywords", [])
+            named = {kw.lower() for kw in keywords}
+            for keyword in keywords:
+                entries.append((keyword, ("server", server_name)))
+                word = keyword.lower()
+                if word in known:
+                    continue
+                # A keyword naming a capability requires just that capability
+                for service in [word] if word in capabilities else provided:
+                    services[service] = None
+                    entries.append((keyword, ("service", service)))
+            # Other capabilities named outright stand for the provided services
+            for capability in capabilities:
+                if capability in known or capability in named:
+                    continue
+                for service in provided:
+                    services[service] = None
+                    entries.append((capability, ("service", service)))
+        
+        return cls(KeywordMatcher(entries), list(services))
+    
+    def services_in(self, hits: Set[Hit]) -> Tuple[str, ...]:
+        """Services hit, in dictionary order."""
+        return tuple(s for s in self.services if ("service", s) in hits)
+    
+    def servers_for(self, terms: Iterable[str]) -> Set[str]:
+        """Servers whose confidence keywords occur in any of ``terms``."""
+        # "|" never occurs inside a keyword, so matches cannot span terms
+        hits = self.matcher.find(" | ".join(terms))
+        return {value for kind, value in hits if kind == "server"}
+
+
 class TaskParser:
     """Parse task descriptions to extract structured information."""
     
+    # Account aliases in priority order, mapped to their normalized name
+    AWS_ACCOUNTS = {
+        "prod": "prod",
+        "production": "prod",
+        "dev": "dev",
+        "development": "dev",
+        "prd": "prod",
+        "staging": "staging",
+        "stage": "staging",
+        "stg": "staging",
+        "uat": "uat",
+        "sandbox": "sandbox",
+        "test": "test",
+    }
+    
+    # Accounts that are also everyday words; only used when no other account is named
+    AMBIGUOUS_ACCOUNTS = ("test",)
+    
+    # Region names and aliases; literal region codes are recognized as well
     AWS_REGIONS = {
         "tokyo": "ap-northeast-1",
         "singapore": "ap-southeast-1",
@@ -35,8 +254,41 @@ class TaskParser:
         "london": "eu-west-2",
         "paris": "eu-west-3",
         "frankfurt": "eu-central-1",
+        "osaka": "ap-northeast-3",
+        "hong kong": "ap-east-1",
+        "taipei": "ap-east-2",
+        "hyderabad": "ap-south-2",
+        "jakarta": "ap-southeast-3",
+        "melbourne": "ap-southeast-4",
+        "malaysia": "ap-southeast-5",
+        "kuala lumpur": "ap-southeast-5",
+        "thailand": "ap-southeast-7",
+        "bangkok": "ap-southeast-7",
+        "canada": "ca-central-1",
+        "montreal": "ca-central-1",
+        "calgary": "ca-west-1",
+        "ireland": "eu-west-1",
+        "dublin": "eu-west-1",
+        "zurich": "eu-central-2",
+        "milan": "eu-south-1",
+        "spain": "eu-south-2",
+        "stockholm": "eu-north-1",
+        "tel aviv": "il-central-1",
+        "israel": "il-central-1",
+        "bahrain": "me-south-1",
+        "uae": "me-central-1",
+        "cape town": "af-south-1",
+        "sao paulo": "sa-east-1",
+        "são paulo": "sa-east-1",
+        "mexico": "mx-central-1",
+        "beijing": "cn-north-1",
+        "ningxia": "cn-northwest-1",
+        "govcloud": "us-gov-west-1",
     }
     
+    # Codes without a city alias above
+    AWS_REGION_CODES = ("us-gov-east-1",)
+    
     SERVICE_KEYWORDS = {
         "jira": ["jira", "ticket", "story", "bug", "devops-"],
         "aws": ["aws", "ec2", "ecs", "lambda", "s3", "rds", "dynamodb", "cloudwatch"],
@@ -45,64 +297,174 @@ class TaskParser:
         "cloudwatch": ["cloudwatch", "logs", "metrics", "alarms"],
     }
     
+    # Compiled dictionaries keyed by registry version
+    _dictionaries: ClassVar[Dict[str, KeywordDictionary]] = {}
+    _dictionary_cache_size: ClassVar[int] = 8
+    _default_registry: ClassVar[Optional[ServerRegistry]] = None
+    
+    def __init__(self, registry: Optional[ServerRegistry] = None) -> None:
+        self.registry = registry or self._get_default_registry()
+    
+    @classmethod
+    def _get_default_registry(cls) -> ServerRegistry:
+        """Load the built-in registry once per process."""
+        if cls._default_registry is None:
+            cls._default_registry = ServerRegistry()
+        return cls._default_registry
+    
+    @classmethod
+    def compile_dictionary(cls, registry: ServerRegistry) -> KeywordDictionary:
+        """Get the keyword dictionary for a registry, compiling it on first use.
+        
+        Built-in account, region and service tables are combined with every
+        server's ``confidence_keywords`` and ``capabilities``. The result is
+        cached by ``registry.version`` and only rebuilt when the registry changes.
+        """
+        version = registry.version
+        dictionary = cls._dictionaries.get(version)
+        if dictionary is None:
+            dictionary = KeywordDictionary.build(
+                cls.AWS_ACCOUNTS,
+                cls.AWS_REGIONS,
+                {*cls.AWS_REGIONS.values(), *cls.AWS_REGION_CODES},
+                cls.SERVICE_KEYWORDS,
+                registry,
+            )
+            if len(cls._dictionaries) >= cls._dictionary_cache_size:
+                cls._dictionaries.pop(next(iter(cls._dictionaries)))
+            cls._dictionaries[version] = dictionary
+        return dictionary
+    
+    @property
+    def dictionary(self) -> KeywordDictionary:
+        """Keyword dictionary for this parser's registry."""
+        return self.compile_dictionary(self.registry)
+    
     def parse(self, task_description: str) -> ParsedTask:
         """Parse task description and extract structured information."""
-        text = task_description.lower()
+        return self.scan(task_description).to_parsed()
+    
+    def scan(self, task_description: str) -> KeywordAnalysis:
+        """Parse task description into a lightweight KeywordAnalysis."""
+        # Single pass over the text for every dictionary keyword
+        dictionary = self.dictionary
+        ordered_hits = dictionary.matcher.find_all(task_description)
+        hits = set(ordered_hits)
         
-        # Extract AWS account
-        aws_account = self._extract_aws_account(text)
+        return KeywordAnalysis(
+            # Extract every AWS account and region mentioned
+            self._extract_aws_accounts(hits),
+            self._extract_aws_regions(ordered_hits),
+            self._extract_jira_ticket(task_description),
+            dictionary.services_in(hits),
+        )
+    
+    def session(self) -> ParseSession:
+        """Start an incremental parse of a description that grows over time."""
+        return ParseSession(self)
+    
+    def _extract_aws_accounts(self, hits: Set[Hit]) -> Tuple[str, ...]:
+        """Extract AWS account names from keyword hits, in priority order."""
+        accounts = tuple(
+            account for account in dict.fromkeys(self.AWS_ACCOUNTS.values())
+            if ("account", account) in hits
+        )
+        specific = tuple(a for a in accounts if a not in self.AMBIGUOUS_ACCOUNTS)
+        return specific or accounts
+    
+    def _extract_aws_regions(self, hits: List[Hit]) -> Tuple[str, ...]:
+        """Extract AWS region codes from keyword hits, in order of mention."""
+        return tuple(dict.fromkeys(value for kind, value in hits if kind == "region"))
+    
+    def _extract_jira_ticket(self, text: str) -> Optional[str]:
+        """Extract Jira ticket ID from text."""
+        return extract_jira_ticket(text)
+
+
+class ParseSession:
+    """Incremental parse of a task description typed one keystroke at a time.
+    
+    Each update with an extension of the previous text only scans the
+    appended part: the automaton state and the hits of every completed token
+    are kept. A trailing word that may still grow is scanned provisionally and
+    rescanned on the next update. Text that does not extend the previous
+    update, such as after a deletion, restarts the session.
+    """
+    
+    def __init__(self, parser: TaskParser) -> None:
+        self.parser = parser
+        self.reset()
+    
+    def reset(self) -> None:
+        """Forget all text seen so far."""
+        self._dictionary = self.parser.dictionary
+        self._text = ""
+        self._end = 0  # end of the last committed token
+        self._state = 0
+        self._hits: List[Hit] = []
+        self._hit_set: Set[Hit] = set()
+        self._jira_ticket: Optional[str] = None
+        self._jira_final = False
+        self._jira_from = 0
+    
+    def update(self, task_description: str) -> KeywordAnalysis:
+        """Analyze the current text, scanning only what was appended."""
+        if (
+            not task_description.startswith(self._text)
+            or self._dictionary is not self.parser.dictionary
+        ):
+            self.reset()
         
-        # Extract AWS region
-        aws_region = self._extract_aws_region(text)
+        matcher = self._dictionary.matcher
+        state = self._state
+        end = self._end
+        pending = None
         
-        # Extract Jira ticket
-        jira_ticket = self._extract_jira_ticket(task_description)
-        jira_project = jira_ticket.split('-')[0] if jira_ticket else None
+        for match in TOKEN_PATTERN.finditer(task_description, end):
+            token = match.group().lower()
+            if match.end() == len(task_description) and WORD_PATTERN.match(token):
+                # The last word may still grow; scan it without committing
+                pending = token
+                break
+            state = matcher.advance(state, token)
+            for hit in matcher.outputs(state):
+                self._hits.append(hit)
+                self._hit_set.add(hit)
+            end = match.end()
         
-        # Identify mentioned services
-        mentioned_services = self._identify_services(text)
+        self._state = state
+        self._end = end
+        self._text = task_description
         
-        # Extract keywords
-        keywords = text.split()
+        hits = self._hits
+        hit_set = self._hit_set
+        if pending is not None:
+            extra = matcher.outputs(matcher.advance(state, pending))
+            if extra:
+                hits = hits + list(extra)
+                hit_set = hit_set | set(extra)
         
-        return ParsedTask(
-            aws_account=aws_account,
-            aws_region=aws_region,
-            jira_project=jira_project,
-            jira_ticket=jira_ticket,
-            mentioned_services=mentioned_services,
-            keywords=keywords,
+        return KeywordAnalysis(
+            self.parser._extract_aws_accounts(hit_set),
+            self.parser._extract_aws_regions(hits),
+            self._update_jira_ticket(task_description),
+            self._dictionary.services_in(hit_set),
         )
     
-    def _extract_aws_account(self, text: str) -> Optional[str]:
-        """Extract AWS account name from text."""
-        accounts = ["prod", "production", "dev", "development", "staging", "uat", "test"]
-        for account in accounts:
-            if account in text:
-                # Normalize
-                if account == "production":
-                    return "prod"
-                elif account == "development":
-                    return "dev"
-                return account
-        return None
-    
-    def _extract_aws_region(self, text: str) -> Optional[str]:
-        """Extract AWS region from text."""
-        for city, region in self.AWS_REGIONS.items():
-            if city in text:
-                return region
-        return None
-    
-    def _extract_jira_ticket(self, text: str) -> Optional[str]:
-        """Extract Jira ticket ID from text."""
-        match = re.search(r'([A-Z]+-\d+)', text, re.IGNORECASE)
-        return match.group(1).upper() if match else None
-    
-    def _identify_services(self, text: str) -> List[str]:
-        """Identify mentioned services from text."""
-        services = []
-        for service, keywords in self.SERVICE_KEYWORDS.items():
-            if any(kw in text for kw in keywords):
-                services.append(service)
-        return services
+    def _update_jira_ticket(self, text: str) -> Optional[str]:
+        """First Jira ticket in ``text``, searching only where one may appear."""
+        if self._jira_final:
+            return self._jira_ticket
+        
+        match = JIRA_TICKET_PATTERN.search(text, self._jira_from)
+        if match is None:
+            # Tickets contain no whitespace, so only the last word can still become one
+            self._jira_from = max(text.rfind(c) for c in " \t\n\r") + 1
+            self._jira_ticket = None
+            return None
+        
+        self._jira_from = match.start()
+        self._jira_ticket = match.group(1).upper()
+        # Trailing digits may still be typed until something follows the match
+        self._jira_final = match.end() < len(text)
+        return self._jira_ticket
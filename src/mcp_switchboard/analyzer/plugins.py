@@ -0,0 +1,128 @@
+"""Third-party analyzer plugins loaded lazily from entry points."""
+from __future__ import annotations
+import asyncio
+import inspect
+import time
+from importlib.metadata import EntryPoint, entry_points
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from pydantic import BaseModel
+from .matcher import KeywordMatcher
+from ..observability import get_logger
+from ..utils.metrics import get_collector
+
+
+class PluginResult(BaseModel):
+    """What an analyzer plugin adds to a task analysis."""
+    required_services: List[str] = []
+    required_capabilities: List[str] = []
+    details: Dict[str, Any] = {}
+
+
+class AnalyzerPlugins:
+    """Analyzer plugins registered under the ``mcp_switchboard.analyzers`` group.
+    
+    Each entry point's name is a trigger keyword and its value the analyzer,
+    a sync or async callable taking the task description and returning a
+    PluginResult, an equivalent dict, or None. One analyzer may be listed
+    under several keywords::
+        
+        [project.entry-points."mcp_switchboard.analyzers"]
+        "terraform plan" = "tfplan_analyzer:analyze"
+        tfplan = "tfplan_analyzer:analyze"
+    
+    Discovery only reads installed package metadata; an analyzer's module is
+    imported the first time one of its keywords appears in a task.
+    """
+    
+    GROUP = "mcp_switchboard.analyzers"
+    
+    def __init__(
+        self,
+        plugin_entry_points: Optional[Iterable[EntryPoint]] = None,
+        timeout: float = 2.0,
+    ) -> None:
+        """Set up lazy discovery.
+        
+        Args:
+            plugin_entry_points: Entry points to use instead of discovering
+                the installed ones
+            timeout: Seconds each analyzer may take before it is skipped
+        """
+        self._entry_points = None if plugin_entry_points is None else list(plugin_entry_points)
+        self.timeout = timeout
+        self._matcher: Optional[KeywordMatcher[str]] = None
+        self._by_value: Dict[str, EntryPoint] = {}
+        self._loaded: Dict[str, Optional[Callable]] = {}
+    
+    def _compile(self) -> KeywordMatcher[str]:
+        """Discover entry points once and compile their trigger keywords."""
+        if self._matcher is None:
+            if self._entry_points is None:
+                self._entry_points = list(entry_points(group=self.GROUP))
+            self._by_value = {ep.value: ep for ep in self._entry_points}
+            self._matcher = KeywordMatcher((ep.name, ep.value) for ep in self._entry_points)
+        return self._matcher
+    
+    def __len__(self) -> int:
+        """Number of distinct analyzers registered."""
+        self._compile()
+        return len(self._by_value)
+    
+    def triggered(self, task_description: str) -> List[str]:
+        """Analyzers whose trigger keywords appear in the task, in hit order."""
+        matcher = self._compile()
+        if not len(matcher):
+            return []
+        return list(dict.fromkeys(matcher.find_all(task_description)))
+    
+    def _load(self, name: str) -> Optional[Callable]:
+        """Import an analyzer on first use; failures are remembered."""
+        if name not in self._loaded:
+            try:
+                self._loaded[name] = self._by_value[name].load()
+                get_collector().increment("plugin_loads")
+            except Exception as e:
+                get_logger().error("plugin_load_failed", "plugins", plugin=name, error=str(e))
+                get_collector().increment("plugin_errors")
+                self._loaded[name] = None
+        return self._loaded[name]
+    
+    async def run(self, task_description: str) -> Dict[str, PluginResult]:
+        """Run every triggered analyzer concurrently.
+        
+        Sync analyzers run in worker threads. Analyzers that fail, time out
+        or return nothing are left out.
+        
+        Returns:
+            Results by analyzer name, in trigger order
+        """
+        names = self.triggered(task_description)
+        if not names:
+            return {}
+        
+        results = await asyncio.gather(*(self._run_one(name, task_description) for name in names))
+        return {name: result for name, result in zip(names, results) if result is not None}
+    
+    async def _run_one(self, name: str, task_description: str) -> Optional[PluginResult]:
+        """Run one analyzer with the timeout, isolating its failures."""
+        analyzer = self._load(name)
+        if analyzer is None:
+            return None
+        
+        collector = get_collector()
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(analyzer):
+                pending = analyzer(task_description)
+            else:
+                pending = asyncio.to_thread(analyzer, task_description)
+            result = await asyncio.wait_for(pending, self.timeout)
+            if result is None:
+                return None
+            return result if isinstance(result, PluginResult) else PluginResult.model_validate(result)
+        except Exception as e:
+            get_logger().error("plugin_failed", "plugins", plugin=name, error=repr(e))
+            collector.increment("plugin_errors")
+            return None
+        finally:
+            collector.record("plugin_ms", (time.perf_counter() - start) * 1000)
@@ -0,0 +1,351 @@
+"""Incremental project scanner detecting which services a project uses."""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Files and directories whose presence reveals a service
+NAME_SIGNALS = {
+    "serverless.yml": "aws",
+    "serverless.yaml": "aws",
+    "cdk.json": "aws",
+    "samconfig.toml": "aws",
+    ".terraform.lock.hcl": "terraform",
+}
+SUFFIX_SIGNALS = {
+    ".tf": "terraform",
+    ".tfvars": "terraform",
+}
+DIR_SIGNALS = {
+    ".github": "github",
+}
+
+# Directories never scanned, ignored or not
+SKIP_DIRS = frozenset({".git"})
+
+
+def signal_for(name: str, is_dir: bool) -> Optional[str]:
+    """Service revealed by a file or directory name, if any."""
+    if is_dir:
+        return DIR_SIGNALS.get(name)
+    service = NAME_SIGNALS.get(name)
+    if service is None:
+        service = SUFFIX_SIGNALS.get(os.path.splitext(name)[1])
+    return service
+
+
+class IgnoreRule(NamedTuple):
+    """One compiled .gitignore pattern."""
+    pattern: re.Pattern
+    negate: bool
+    dir_only: bool
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Translate a gitignore glob into a regex over '/'-separated paths."""
+    parts = []
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif glob.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif glob[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif glob[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif glob[i] == "[" and "]" in glob[i + 2:]:
+            end = glob.index("]", i + 2)
+            body = glob[i + 1:end].replace("\\", "\\\\")
+            parts.append(f"[^{body[1:]}]" if body.startswith("!") else f"[{body}]")
+            i = end + 1
+        elif glob[i] == "\\" and i + 1 < len(glob):
+            parts.append(re.escape(glob[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(glob[i]))
+            i += 1
+    return "".join(parts)
+
+
+@lru_cache(maxsize=256)
+def parse_gitignore(text: str) -> Tuple[IgnoreRule, ...]:
+    """Compile the patterns of a .gitignore file.
+    
+    Patterns match paths relative to the directory of the .gitignore.
+    Patterns containing a slash are anchored there; others match at any depth.
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.strip("/") if dir_only else line
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if not line:
+            continue
+        prefix = "" if anchored else "(?:.*/)?"
+        rules.append(IgnoreRule(re.compile(f"{prefix}{_glob_to_regex(line)}"), negate, dir_only))
+    return tuple(rules)
+
+
+class IgnoreRules:
+    """The .gitignore rules in effect for a directory, inherited from its parents."""
+    
+    def __init__(self, layers: Tuple[Tuple[str, Tuple[IgnoreRule, ...]], ...] = ()) -> None:
+        self.layers = layers
+    
+    def extended(self, base: str, text: str) -> IgnoreRules:
+        """Rules with a child directory's .gitignore added."""
+        return IgnoreRules(self.layers + ((base, parse_gitignore(text)),))
+    
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Whether a path relative to the project root is ignored.
+        
+        Like git, the last matching rule wins, and deeper .gitignore files
+        take precedence over their parents.
+        """
+        ignored = False
+        for base, rules in self.layers:
+            if base:
+                if not rel_path.startswith(base + "/"):
+                    continue
+                path = rel_path[len(base) + 1:]
+            else:
+                path = rel_path
+            for rule in rules:
+                if rule.dir_only and not is_dir:
+                    continue
+                if rule.pattern.fullmatch(path):
+                    ignored = not rule.negate
+        return ignored
+
+
+class ProjectContext(NamedTuple):
+    """Services a project uses, with the path that revealed each."""
+    root: str
+    evidence: Dict[str, str]
+    scanned: int
+    reused: int
+    
+    @property
+    def services(self) -> List[str]:
+        """Detected services, in name order."""
+        return sorted(self.evidence)
+
+
+class ProjectScanner:
+    """Detect service signals in a project tree, rescanning only what changed.
+    
+    The tree is walked with ``os.scandir``, skipping paths excluded by the
+    project's .gitignore files. Each directory's signals and subdirectories
+    are recorded together with its mtime and a key of the ignore rules in
+    effect. Since a directory's mtime changes whenever an entry is added,
+    removed or renamed, a rescan only stats unchanged directories and lists
+    the changed ones. The index is kept in memory and persisted per project,
+    so it also survives restarts.
+    """
+    
+    DIRNAME = "project_index"
+    
+    def __init__(self, index_dir: Optional[Path] = None) -> None:
+        self.index_dir = Path(index_dir).expanduser() if index_dir else self.default_path()
+        self._indexes: Dict[str, Dict[str, Dict]] = {}
+    
+    @classmethod
+    def default_path(cls, db_path: str = "~/.mcp-switchboard/state.db") -> Path:
+        """Index directory next to the state database."""
+        return Path(db_path).expanduser().with_name(cls.DIRNAME)
+    
+    def _index_path(self, root: str) -> Path:
+        """File persisting the directory index of one project."""
+        return self.index_dir / f"{hashlib.sha256(root.encode()).hexdigest()[:16]}.json"
+    
+    def _read_index(self, root: str) -> Dict[str, Dict]:
+        """Directory index of a project persisted on disk, or an empty one."""
+        try:
+            with open(self._index_path(root)) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return index if isinstance(index, dict) else {}
+    
+    def _load(self, root: str) -> Dict[str, Dict]:
+        """Directory index of a project, from memory or disk."""
+        index = self._indexes.get(root)
+        if index is None:
+            index = self._indexes[root] = self._read_index(root)
+        return index
+    
+    def _save(self, root: str, index: Dict[str, Dict]) -> None:
+        """Persist a project's directory index atomically."""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        path = self._index_path(root)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, path)
+    
+    @staticmethod
+    def project_root(project_path: str) -> str:
+        """Canonical absolute path identifying a project."""
+        return os.path.realpath(os.path.expanduser(project_path))
+    
+    def directories(self, project_path: str) -> List[str]:
+        """Absolute paths of the directories indexed for a project."""
+        root = self.project_root(project_path)
+        return [os.path.join(root, rel) if rel else root for rel in self._indexes.get(root, {})]
+    
+    def scan(self, project_path: str) -> ProjectContext:
+        """Scan a project, reusing the index for unchanged directories."""
+        root = self.project_root(project_path)
+        context, index = self.walk(root, self._load(root))
+        if index is not None:
+            self._indexes[root] = index
+            self._save(root, index)
+        return context
+    
+    def walk(self, root: str, old: Dict[str, Dict]) -> Tuple[ProjectContext, Optional[Dict[str, Dict]]]:
+        """Walk a project against its previous directory index.
+        
+        The walk only reads ``old`` and changes no scanner state, so callers
+        decide when to publish the new index.
+        
+        Args:
+            root: Canonical project root
+            old: Index of the previous scan, empty if none
+        
+        Returns:
+            The project context, and the new index if it differs from ``old``
+        """
+        if not os.path.isdir(root):
+            return ProjectContext(root, {}, 0, 0), None
+        
+        index: Dict[str, Dict] = {}
+        scanned = reused = 0
+        stack: List[Tuple[str, IgnoreRules, str]] = [("", IgnoreRules(), "")]
+        while stack:
+            rel, rules, parent_key = stack.pop()
+            path = os.path.join(root, rel) if rel else root
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            
+            entry = self._reuse(path, rel, old.get(rel), mtime_ns, parent_key)
+            if entry is None:
+                entry = self._scan_dir(path, rel, mtime_ns, rules, parent_key)
+                scanned += 1
+            else:
+                reused += 1
+            if entry is None:
+                continue
+            
+            index[rel] = entry
+            if entry["gitignore"] is not None:
+                rules = rules.extended(rel, entry["gitignore"][1])
+            for name in entry["subdirs"]:
+                stack.append((f"{rel}/{name}" if rel else name, rules, entry["key"]))
+        
+        evidence: Dict[str, str] = {}
+        for rel in sorted(index):
+            for service, signal_path in index[rel]["signals"].items():
+                evidence.setdefault(service, signal_path)
+        changed = scanned or len(index) != len(old)
+        return ProjectContext(root, evidence, scanned, reused), index if changed else None
+    
+    @staticmethod
+    def _rules_key(parent_key: str, rel: str, gitignore: Optional[str]) -> str:
+        """Key of the ignore rules in effect for a directory's entries."""
+        if gitignore is None:
+            return parent_key
+        return hashlib.sha256(f"{parent_key}\0{rel}\0{gitignore}".encode()).hexdigest()[:16]
+    
+    def _reuse(
+        self,
+        path: str,
+        rel: str,
+        entry: Optional[Dict],
+        mtime_ns: int,
+        parent_key: str,
+    ) -> Optional[Dict]:
+        """The indexed entry of a directory, if its listing and rules are unchanged."""
+        if entry is None or entry["mtime_ns"] != mtime_ns:
+            return None
+        gitignore = entry["gitignore"]
+        if gitignore is not None:
+            # Edits in place change the .gitignore's mtime but not the directory's
+            try:
+                if os.stat(os.path.join(path, ".gitignore")).st_mtime_ns != gitignore[0]:
+                    return None
+            except OSError:
+                return None
+        text = gitignore[1] if gitignore is not None else None
+        if entry["key"] != self._rules_key(parent_key, rel, text):
+            return None
+        return entry
+    
+    def _scan_dir(
+        self,
+        path: str,
+        rel: str,
+        mtime_ns: int,
+        rules: IgnoreRules,
+        parent_key: str,
+    ) -> Optional[Dict]:
+        """List one directory and record its signals and subdirectories."""
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            return None
+        
+        # [mtime_ns, text] of the directory's .gitignore, as stored in the index
+        gitignore: Optional[List[Any]] = None
+        for dir_entry in entries:
+            if dir_entry.name == ".gitignore" and dir_entry.is_file():
+                try:
+                    with open(dir_entry.path, errors="replace") as f:
+                        gitignore = [dir_entry.stat().st_mtime_ns, f.read()]
+                except OSError:
+                    pass
+                break
+        if gitignore is not None:
+            rules = rules.extended(rel, gitignore[1])
+        
+        signals: Dict[str, str] = {}
+        subdirs = []
+        for dir_entry in entries:
+            name = dir_entry.name
+            is_dir = dir_entry.is_dir(follow_symlinks=False)
+            if is_dir and name in SKIP_DIRS:
+                continue
+            child = f"{rel}/{name}" if rel else name
+            if rules.ignored(child, is_dir):
+                continue
+            service = signal_for(name, is_dir)
+            if service is not None and service not in signals:
+                signals[service] = child
+            if is_dir:
+                subdirs.append(name)
+        
+        return {
+            "mtime_ns": mtime_ns,
+            "key": self._rules_key(parent_key, rel, gitignore[1] if gitignore else None),
+            "gitignore": gitignore,
+            "signals": signals,
+            "subdirs": sorted(subdirs),
+        }
@@ -0,0 +1,348 @@
+"""Project context kept current by filesystem notifications."""
+from __future__ import annotations
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from .project_scanner import ProjectContext, ProjectScanner
+from ..observability import get_logger
+from ..utils.metrics import get_collector
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+# Events that change a directory listing, and so possibly its signals
+LISTING_EVENTS = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+WATCH_MASK = LISTING_EVENTS | IN_CLOSE_WRITE | IN_ONLYDIR
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal ctypes binding of Linux inotify."""
+    
+    def __init__(self) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        """Watch a directory and return its watch descriptor."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return int(wd)
+    
+    def rm_watch(self, wd: int) -> None:
+        """Stop watching a descriptor; already removed watches are ignored."""
+        self._libc.inotify_rm_watch(self.fd, wd)
+    
+    def read(self, timeout: float, wakeup_fd: Optional[int] = None) -> List[Tuple[int, int, str]]:
+        """(wd, mask, name) events, waiting up to ``timeout`` seconds for the first.
+        
+        The wait also ends early when ``wakeup_fd`` becomes readable.
+        """
+        fds = [self.fd] if wakeup_fd is None else [self.fd, wakeup_fd]
+        if self.fd not in select.select(fds, [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+    
+    def close(self) -> None:
+        """Close the inotify descriptor, dropping all watches."""
+        os.close(self.fd)
+
+
+class WatchedProjectScanner(ProjectScanner):
+    """Project scanner that keeps the context of scanned projects hot.
+    
+    The first scan of a project walks it as usual; afterwards a background
+    thread watches every indexed directory with inotify and refreshes the
+    context when a listing or a .gitignore changes, so ``scan`` answers from
+    memory without touching the filesystem. Where inotify is unavailable or
+    out of watches, projects are instead rescanned every ``poll_interval``
+    seconds, which only stats unchanged directories. Contexts may lag changes
+    by up to ``debounce`` seconds (inotify) or ``poll_interval`` (polling).
+    
+    Walks run outside the shared lock, which is only held to publish their
+    results, so a refresh never delays requests for watched projects. Walks
+    of the same project are serialized.
+    """
+    
+    def __init__(
+        self,
+        index_dir: Optional[Path] = None,
+        poll_interval: float = 2.0,
+        debounce: float = 0.2,
+        max_projects: int = 16,
+        use_inotify: bool = True,
+    ) -> None:
+        super().__init__(index_dir)
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.max_projects = max_projects
+        # Guards the scanner index, contexts and watch tables, but not walks
+        self._lock = threading.RLock()
+        self._walk_locks: Dict[str, threading.RLock] = {}
+        self._contexts: "OrderedDict[str, ProjectContext]" = OrderedDict()
+        self._polled: Set[str] = set()
+        self._watches: Dict[str, Dict[str, int]] = {}
+        self._wd_roots: Dict[int, Tuple[str, str]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+        # Written by stop() to interrupt a pending inotify wait
+        self._wakeup = os.pipe() if self._inotify is not None else None
+    
+    @property
+    def mode(self) -> str:
+        """How changes are detected: ``inotify`` or ``polling``."""
+        return "inotify" if self._inotify is not None else "polling"
+    
+    def cached(self, project_path: str) -> Optional[ProjectContext]:
+        """Context of a project if it is already watched, without scanning."""
+        with self._lock:
+            return self._contexts.get(self.project_root(project_path))
+    
+    def scan(self, project_path: str) -> ProjectContext:
+        """Context of a project, from memory once the project is watched."""
+        root = self.project_root(project_path)
+        context = self._hit(root)
+        if context is None:
+            with self._walk_lock(root):
+                # Another request may have scanned the project meanwhile
+                context = self._hit(root)
+                if context is None:
+                    context = self._refresh(root, cold=True)
+            self._start()
+        return context
+    
+    def _hit(self, root: str) -> Optional[ProjectContext]:
+        """Context of a watched project, marking it recently used."""
+        with self._lock:
+            context = self._contexts.get(root)
+            if context is not None:
+                self._contexts.move_to_end(root)
+                get_collector().increment("project_context_hot_hits")
+            return context
+    
+    def _walk_lock(self, root: str) -> threading.RLock:
+        """Lock serializing the walks of one project."""
+        with self._lock:
+            return self._walk_locks.setdefault(root, threading.RLock())
+    
+    def _refresh(self, root: str, cold: bool = False) -> ProjectContext:
+        """Rescan a project incrementally and watch any new directories.
+        
+        Args:
+            root: Canonical project root
+            cold: Whether this is the first scan of the project, which is
+                kept even though the project is not watched yet
+        """
+        start = time.perf_counter()
+        with self._walk_lock(root):
+            context, index = self._rescan(root)
+            if self._publish(root, context, index, cold):
+                # Catch changes made before the new directories were watched
+                context, index = self._rescan(root)
+                self._publish(root, context, index, cold)
+        get_collector().record("project_refresh_ms", (time.perf_counter() - start) * 1000)
+        return context
+    
+    def _rescan(self, root: str) -> Tuple[ProjectContext, Dict[str, Dict]]:
+        """Walk a project against its latest index without holding the lock.
+        
+        Returns:
+            The project context and the directory index it was built from
+        """
+        with self._lock:
+            old = self._indexes.get(root)
+        if old is None:
+            old = self._read_index(root)
+        context, index = self.walk(root, old)
+        if index is None:
+            return context, old
+        self._save(root, index)
+        return context, index
+    
+    def _publish(self, root: str, context: ProjectContext, index: Dict[str, Dict], cold: bool) -> int:
+        """Publish a walk and watch the directories it found.
+        
+        The refresh of a project evicted during its walk is dropped.
+        
+        Returns:
+            Number of watches added
+        """
+        with self._lock:
+            if not cold and root not in self._contexts:
+                return 0
+            self._indexes[root] = index
+            self._contexts[root] = context
+            added = self._watch(root)
+            while len(self._contexts) > self.max_projects:
+                self._unwatch(next(iter(self._contexts)))
+            return added
+    
+    def _watch(self, root: str) -> int:
+        """Add inotify watches for indexed directories not yet watched.
+        
+        Returns:
+            Number of watches added
+        """
+        if self._inotify is None or root in self._polled:
+            self._polled.add(root)
+            return 0
+        
+        added = 0
+        watches = self._watches.setdefault(root, {})
+        for path in self.directories(root):
+            if path in watches:
+                continue
+            try:
+                wd = self._inotify.add_watch(path)
+            except OSError as e:
+                if os.path.isdir(path):
+                    # Typically out of watches (ENOSPC): poll this project instead
+                    get_logger().info(
+                        "project_watch_failed", "project_watcher",
+                        path=path, error=str(e), project=root, fallback="polling",
+                    )
+                    self._remove_watches(root)
+                    self._polled.add(root)
+                    return 0
+                continue
+            watches[path] = wd
+            self._wd_roots[wd] = (root, path)
+            added += 1
+        return added
+    
+    def _remove_watches(self, root: str) -> None:
+        """Drop every inotify watch of a project."""
+        for wd in self._watches.pop(root, {}).values():
+            self._wd_roots.pop(wd, None)
+            if self._inotify is not None:
+                self._inotify.rm_watch(wd)
+    
+    def _unwatch(self, root: str) -> None:
+        """Forget a project's context and stop watching it."""
+        self._contexts.pop(root, None)
+        self._indexes.pop(root, None)
+        self._walk_locks.pop(root, None)
+        self._polled.discard(root)
+        if self._inotify is not None:
+            self._remove_watches(root)
+    
+    def _start(self) -> None:
+        """Start the background refresh thread once."""
+        with self._lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(
+                    target=self._run, name="project-watcher", daemon=True
+                )
+                self._thread.start()
+    
+    def _run(self) -> None:
+        """Refresh projects on notifications, and polled projects on an interval."""
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stop.is_set():
+            dirty: Set[str] = set()
+            if self._inotify is not None and self._wakeup is not None:
+                events = self._inotify.read(
+                    max(0.0, next_poll - time.monotonic()), self._wakeup[0]
+                )
+                if events:
+                    # Let bursts such as checkouts settle, then take everything queued
+                    self._stop.wait(self.debounce)
+                    events += self._inotify.read(0)
+                dirty |= self._dirty_roots(events)
+            else:
+                self._stop.wait(max(0.0, next_poll - time.monotonic()))
+            
+            if time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + self.poll_interval
+                with self._lock:
+                    dirty |= self._polled & set(self._contexts)
+            
+            for root in dirty:
+                if self._stop.is_set():
+                    break
+                try:
+                    self._refresh(root)
+                except Exception as e:
+                    # Runs beside the stdio transport, so never print to stdout
+                    get_logger().error("project_refresh_failed", "project_watcher", project=root, error=str(e))
+    
+    def _dirty_roots(self, events: List[Tuple[int, int, str]]) -> Set[str]:
+        """Projects affected by a batch of inotify events."""
+        dirty: Set[str] = set()
+        with self._lock:
+            for wd, mask, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    dirty.update(self._contexts)
+                    continue
+                watched = self._wd_roots.get(wd)
+                if watched is None:
+                    continue
+                root, path = watched
+                if mask & IN_IGNORED:
+                    # The kernel dropped the watch (directory deleted or moved)
+                    self._wd_roots.pop(wd, None)
+                    self._watches.get(root, {}).pop(path, None)
+                    dirty.add(root)
+                elif mask & LISTING_EVENTS or name == ".gitignore":
+                    dirty.add(root)
+        return dirty
+    
+    def stop(self) -> None:
+        """Stop the background thread and release the inotify descriptor."""
+        self._stop.set()
+        if self._wakeup is not None:
+            os.write(self._wakeup[1], b"\0")
+        if self._thread is not None:
+            self._thread.join()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        if self._wakeup is not None:
+            for fd in self._wakeup:
+                os.close(fd)
+            self._wakeup = None
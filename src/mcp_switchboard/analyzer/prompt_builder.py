@@ -0,0 +1,166 @@
+"""Compact LLM analysis prompts with few-shot examples from task history."""
+from __future__ import annotations
+import json
+import math
+import time
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set
+from .matcher import tokenize
+from ..state.manager import StateManager
+
+INSTRUCTIONS = (
+    "Extract JSON for the DevOps task. Keys: aws_account (prod|staging|dev|uat|null), "
+    "aws_region (region code|null), jira_project, jira_ticket (e.g. DEVOPS-123|null), "
+    "required_services, required_capabilities (lists), confidence (0-1). JSON only."
+)
+
+# Optional vocabulary hints, dropped first when the budget is tight
+HINTS = (
+    "Services: aws, jira, github, terraform, kubernetes, docker. "
+    "Capabilities: deployment, infrastructure, monitoring, security."
+)
+
+# Analysis fields shown in few-shot answers
+EXAMPLE_FIELDS = (
+    "aws_account", "aws_region", "jira_project", "jira_ticket",
+    "required_services", "required_capabilities",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of ``text`` (about four characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+def _words(text: str) -> Set[str]:
+    """Distinct word tokens of ``text``."""
+    return {token for token in tokenize(text) if token[0].isalnum()}
+
+
+class Prompt(NamedTuple):
+    """A built prompt with its approximate token count."""
+    text: str
+    tokens: int
+    examples: int
+
+
+class PromptBuilder:
+    """Build token-budgeted analysis prompts.
+    
+    The k past successful tasks most similar to the new one (cosine over
+    word sets) are added as few-shot examples, most similar first, for as
+    long as the prompt stays within the token budget. History is loaded
+    from the state database and indexed by word, and reloaded when older
+    than ``refresh_interval`` seconds so newly completed tasks become
+    examples.
+    """
+    
+    def __init__(
+        self,
+        state_manager: Optional[StateManager] = None,
+        k: int = 3,
+        token_budget: int = 300,
+        history_limit: int = 1000,
+        refresh_interval: float = 60.0,
+    ) -> None:
+        self.state_manager = state_manager
+        self.k = k
+        self.token_budget = token_budget
+        self.history_limit = history_limit
+        self.refresh_interval = refresh_interval
+        self._refreshed: Optional[float] = None
+        self._examples: List[str] = []
+        self._words: List[Set[str]] = []
+        self._index: Dict[str, List[int]] = defaultdict(list)
+    
+    def refresh(self) -> None:
+        """Reload example history from the state database."""
+        self._examples = []
+        self._words = []
+        self._index = defaultdict(list)
+        self._refreshed = time.monotonic()
+        if self.state_manager is None:
+            return
+        
+        for task in self.state_manager.get_historical_patterns(limit=self.history_limit):
+            example = self._format_example(task)
+            if example is None:
+                continue
+            words = _words(task["task_description"])
+            for word in words:
+                self._index[word].append(len(self._examples))
+            self._examples.append(example)
+            self._words.append(words)
+    
+    @staticmethod
+    def _format_example(task: Dict) -> Optional[str]:
+        """Compact few-shot example from a task row, if it has an analysis."""
+        try:
+            analysis = json.loads(task.get("analysis_json") or "")
+        except ValueError:
+            return None
+        if not isinstance(analysis, dict):
+            return None
+        
+        answer = {field: analysis[field] for field in EXAMPLE_FIELDS if analysis.get(field)}
+        if not answer:
+            return None
+        return (
+            f"Task: {json.dumps(task['task_description'])}\n"
+            f"JSON: {json.dumps(answer, separators=(',', ':'))}"
+        )
+    
+    def similar_examples(self, task_description: str) -> List[str]:
+        """Up to k past examples most similar to ``task_description``."""
+        if self._refreshed is None or time.monotonic() - self._refreshed >= self.refresh_interval:
+            self.refresh()
+        
+        words = _words(task_description)
+        if not words:
+            return []
+        
+        overlap: Dict[int, int] = defaultdict(int)
+        for word in words:
+            for idx in self._index.get(word, ()):
+                overlap[idx] += 1
+        
+        ranked = sorted(
+            overlap,
+            key=lambda idx: overlap[idx] / math.sqrt(len(words) * len(self._words[idx])),
+            reverse=True,
+        )
+        return [self._examples[idx] for idx in ranked[:self.k]]
+    
+    def build(self, task_description: str) -> Prompt:
+        """Build the analysis prompt for one task within the token budget."""
+        task = f"Task: {json.dumps(task_description)}\nJSON:"
+        return self._fit([INSTRUCTIONS], self.similar_examples(task_description) + [HINTS], task)
+    
+    def build_batch(self, task_descriptions: Sequence[str]) -> Prompt:
+        """Build an indexed prompt analyzing several tasks at once."""
+        tasks = "\n".join(
+            f"{index}. {json.dumps(description)}"
+            for index, description in enumerate(task_descriptions)
+        )
+        instructions = (
+            f"{INSTRUCTIONS} For each numbered task return one object with its "
+            "\"index\"; answer with a JSON array only."
+        )
+        return self._fit([instructions], [HINTS], f"Tasks:\n{tasks}\nJSON:")
+    
+    def _fit(self, required: List[str], optional: List[str], task: str) -> Prompt:
+        """Join required sections, then optional ones while within budget."""
+        sections = list(required)
+        used = sum(estimate_tokens(s) for s in sections) + estimate_tokens(task)
+        examples = 0
+        for section in optional:
+            cost = estimate_tokens(section)
+            if used + cost > self.token_budget:
+                continue
+            sections.append(section)
+            used += cost
+            if section is not HINTS:
+                examples += 1
+        
+        text = "\n\n".join(sections + [task])
+        return Prompt(text, estimate_tokens(text), examples)
@@ -0,0 +1,143 @@
+"""Admission control for MCP sampling requests."""
+from __future__ import annotations
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque
+from ..utils.metrics import get_collector
+
+
+class SamplingLimiter:
+    """Bounds in-flight sampling requests and their rate.
+    
+    A request is admitted once it holds one of ``max_concurrent`` slots and
+    a token from a bucket refilled at ``rate`` tokens per second up to
+    ``burst``. Slots are handed to waiters in arrival order. A request that
+    cannot be admitted within ``max_wait`` seconds is rejected instead of
+    queuing, so callers can answer from a cheaper path.
+    
+    Time spent waiting is recorded as ``sampling_queue_ms`` and rejections
+    are counted as ``sampling_rejected``.
+    """
+    
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        rate: float = 4.0,
+        burst: int = 8,
+        max_wait: float = 0.5,
+    ) -> None:
+        """Set up the limits.
+        
+        Args:
+            max_concurrent: Sampling requests allowed in flight at once
+            rate: Requests started per second, on average
+            burst: Requests that may start at once after an idle period
+            max_wait: Seconds a request may queue before it is rejected
+        """
+        if max_concurrent < 1 or rate <= 0 or burst < 1:
+            raise ValueError("max_concurrent, rate and burst must be positive")
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+    
+    @property
+    def inflight(self) -> int:
+        """Requests currently admitted and not yet released."""
+        return self._inflight
+    
+    @property
+    def queued(self) -> int:
+        """Requests waiting for a slot."""
+        return sum(1 for waiter in self._waiters if not waiter.done())
+    
+    def _refill(self, now: float) -> None:
+        """Add the tokens accrued since the last refill."""
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+    
+    async def acquire(self) -> bool:
+        """Wait for a slot and a token, up to ``max_wait`` seconds.
+        
+        Returns:
+            True if admitted, in which case ``release`` must be called, or
+            False if the request was rejected
+        """
+        start = time.monotonic()
+        deadline = start + self.max_wait
+        
+        if self._inflight < self.max_concurrent and not self._waiters:
+            self._inflight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                # The slot may have been handed over on the tick the timeout fired
+                if waiter.done() and not waiter.cancelled():
+                    self.release()
+                return self._reject(start)
+            except asyncio.CancelledError:
+                # A slot handed over just before cancellation must not leak
+                if waiter.done() and not waiter.cancelled():
+                    self.release()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        
+        # Tokens are reserved ahead, so concurrent waiters queue behind each other
+        now = time.monotonic()
+        self._refill(now)
+        delay = max(0.0, (1.0 - self._tokens) / self.rate)
+        if now + delay > deadline:
+            self.release()
+            return self._reject(start)
+        self._tokens -= 1.0
+        if delay:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self._tokens += 1.0
+                self.release()
+                raise
+        
+        get_collector().record("sampling_queue_ms", (time.monotonic() - start) * 1000)
+        return True
+    
+    def _reject(self, start: float) -> bool:
+        """Count a rejected request."""
+        collector = get_collector()
+        collector.increment("sampling_rejected")
+        collector.record("sampling_queue_ms", (time.monotonic() - start) * 1000)
+        return False
+    
+    def release(self) -> None:
+        """Free a slot, handing it to the oldest waiter if any."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._inflight -= 1
+    
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[bool]:
+        """Hold a slot for the duration of the block.
+        
+        Yields whether the request was admitted; the slot is only held, and
+        released on exit, if it was.
+        """
+        admitted = await self.acquire()
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.release()
@@ -1,12 +1,142 @@
 """CLI entry point for mcp-switchboard."""
+import os
 import sys
+import json
 import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
 from mcp_switchboard.analyzer.analyzer import TaskAnalyzer
 from mcp_switchboard.selector.selector import ServerSelector
 from mcp_switchboard.config.registry import ServerRegistry
 
 
+# Per-process analyzer and selector used by batch workers
+_worker_analyzer: Optional[TaskAnalyzer] = None
+_worker_selector: Optional[ServerSelector] = None
+
+
+def _init_worker() -> Tuple[TaskAnalyzer, ServerSelector]:
+    """Build the analyzer and selector once per worker process."""
+    global _worker_analyzer, _worker_selector
+    registry = ServerRegistry()
+    _worker_analyzer = TaskAnalyzer(registry)
+    _worker_selector = ServerSelector(registry)
+    return _worker_analyzer, _worker_selector
+
+
+def _process_chunk(lines: List[Tuple[int, str]]) -> List[str]:
+    """Analyze and select servers for a chunk of JSONL task records.
+    
+    Each record is a JSON object with a ``task_description`` field (any other
+    fields such as ``id`` are echoed back) or a bare JSON string. An invalid
+    record yields an ``error`` result with its input ``line`` number and the
+    fields that could be parsed.
+    
+    Args:
+        lines: (line number, line) pairs
+    
+    Returns:
+        One JSON result line per input line, in the same order
+    """
+    if _worker_analyzer is None or _worker_selector is None:
+        analyzer, selector = _init_worker()
+    else:
+        analyzer, selector = _worker_analyzer, _worker_selector
+    
+    records: List[Tuple[Dict[str, Any], str, Optional[str]]] = []
+    for line_number, line in lines:
+        record: Any = {}
+        try:
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"task_description": record}
+            records.append((record, str(record["task_description"]), None))
+        except (ValueError, KeyError, TypeError) as e:
+            fields = record if isinstance(record, dict) else {}
+            records.append(({**fields, "line": line_number}, "", f"Invalid task record: {e}"))
+    
+    analyses = analyzer.analyze_many(
+        description for _, description, error in records if error is None
+    )
+    
+    results = []
+    analysis_iter = iter(analyses)
+    for record, description, error in records:
+        if error is not None:
+            results.append(json.dumps({**record, "error": error}))
+            continue
+        
+        analysis = next(analysis_iter)
+        selection = selector.select(analysis)
+        results.append(json.dumps({
+            **record,
+            "analysis": analysis.model_dump(),
+            "selected_servers": [
+                {"name": s.server_name, "confidence": s.confidence}
+                for s in selection.selected_servers
+            ],
+        }))
+    return results
+
+
+def _read_chunks(stream: TextIO, chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Yield numbered non-blank input lines in chunks, reading lazily."""
+    lines = ((number, line) for number, line in enumerate(stream, 1) if line.strip())
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(
+    input_stream: TextIO,
+    output_stream: TextIO,
+    workers: Optional[int] = None,
+    chunk_size: int = 500,
+) -> int:
+    """Analyze a JSONL stream of tasks across a process pool.
+    
+    Results are written as JSONL in input order. At most ``2 * workers``
+    chunks are in flight at a time, so memory stays bounded regardless of
+    input size.
+    
+    Args:
+        input_stream: JSONL task records
+        output_stream: Destination for JSONL results
+        workers: Worker processes (defaults to the CPU count)
+        chunk_size: Records sent to a worker per task
+    
+    Returns:
+        Number of records processed
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers
+    count = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending: deque = deque()
+        
+        def drain(limit: int) -> int:
+            written = 0
+            while len(pending) > limit:
+                for line in pending.popleft().result():
+                    output_stream.write(line + "\n")
+                    written += 1
+            return written
+        
+        for chunk in _read_chunks(input_stream, chunk_size):
+            pending.append(pool.submit(_process_chunk, chunk))
+            count += drain(max_pending)
+        count += drain(0)
+    
+    output_stream.flush()
+    return count
+
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -27,9 +157,62 @@ def main():
         action="store_true",
         help="Analyze task and show recommended servers"
     )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Analyze JSONL task records from FILE ('-' for stdin) and write JSONL results"
+    )
+    parser.add_argument(
+        "--output",
+        metavar="FILE",
+        help="Write batch results to FILE instead of stdout"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for batch mode (default: CPU count)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=500,
+        help="Records per worker task in batch mode (default: 500)"
+    )
+    parser.add_argument(
+        "--train-classifier",
+        action="store_true",
+        help="Train the local task classifier from successful tasks in the state database"
+    )
+    parser.add_argument(
+        "--build-history-index",
+        action="store_true",
+        help="Rebuild the nearest-neighbour index of successful tasks used to reuse past selections"
+    )
     
     args = parser.parse_args()
     
+    if args.train_classifier:
+        from mcp_switchboard.analyzer.classifier import TaskClassifier
+        classifier = TaskClassifier.train_from_state()
+        path = classifier.save()
+        print(f"Trained on {classifier.trained_on} tasks ({len(classifier.labels)} labels), saved to {path}")
+        return 0
+    
+    if args.build_history_index:
+        from mcp_switchboard.selector.history_index import TaskHistoryIndex
+        index = TaskHistoryIndex.build()
+        print(f"Indexed {len(index)} tasks in {index.path}")
+        return 0
+    
+    if args.batch:
+        with ExitStack() as stack:
+            input_stream = sys.stdin if args.batch == "-" else stack.enter_context(open(args.batch))
+            output_stream = stack.enter_context(open(args.output, "w")) if args.output else sys.stdout
+            # Results written before a failure still reach the output
+            stack.callback(output_stream.flush)
+            run_batch(input_stream, output_stream, args.workers, args.chunk_size)
+        return 0
+    
     if not args.task:
         parser.print_help()
         return 0
@@ -1,11 +1,28 @@
 """MCP server registry loader."""
 from __future__ import annotations
+import hashlib
+import json
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, NamedTuple, Optional
 import yaml
 from .models import MCPServerConfig
 
 
+class RegistryIndex(NamedTuple):
+    """Registry positions and capability index, listing servers in registry order."""
+    positions: Dict[str, int]
+    by_capability: Dict[str, List[str]]
+    
+    @classmethod
+    def build(cls, servers: Dict[str, Dict]) -> RegistryIndex:
+        """Index every server's capabilities."""
+        by_capability: Dict[str, List[str]] = {}
+        for name, config in servers.items():
+            for capability in dict.fromkeys(config.get("capabilities", [])):
+                by_capability.setdefault(capability, []).append(name)
+        return cls({name: i for i, name in enumerate(servers)}, by_capability)
+
+
 class ServerRegistry:
     """Load and manage MCP server registry."""
     
@@ -13,6 +30,8 @@ class ServerRegistry:
     
     def __init__(self) -> None:
         self.servers: Dict[str, Dict] = {}
+        self._version: Optional[str] = None
+        self._index: Optional[RegistryIndex] = None
         self._load_builtin()
     
     def _load_builtin(self) -> None:
@@ -20,6 +39,51 @@ class ServerRegistry:
         with open(self.BUILTIN_REGISTRY) as f:
             data = yaml.safe_load(f)
         self.servers = data.get("servers", {})
+        self._invalidate()
+    
+    def _invalidate(self) -> None:
+        """Forget the version and indexes after a change to the entries."""
+        self._version = None
+        self._index = None
+    
+    @property
+    def index(self) -> RegistryIndex:
+        """Capability index, built on first use after a change."""
+        if self._index is None:
+            self._index = RegistryIndex.build(self.servers)
+        return self._index
+    
+    @property
+    def version(self) -> str:
+        """Content hash of the registry.
+        
+        Identical registries share a version, so artifacts compiled from one
+        instance can be reused by another. Changes made through
+        ``load_file``, ``add_server`` or ``remove_server`` produce a new version.
+        """
+        if self._version is None:
+            content = json.dumps(self.servers, sort_keys=True, default=str)
+            self._version = hashlib.sha256(content.encode()).hexdigest()[:16]
+        return self._version
+    
+    def load_file(self, path: Path) -> None:
+        """Merge servers from an additional registry file."""
+        with open(Path(path).expanduser()) as f:
+            data = yaml.safe_load(f) or {}
+        self.servers.update(data.get("servers", {}))
+        self._invalidate()
+    
+    def add_server(self, name: str, config: Dict) -> None:
+        """Add or replace a server entry."""
+        self.servers[name] = config
+        self._invalidate()
+    
+    def remove_server(self, name: str) -> bool:
+        """Remove a server entry."""
+        if self.servers.pop(name, None) is None:
+            return False
+        self._invalidate()
+        return True
     
     def get_server(self, name: str) -> Dict:
         """Get server configuration by name."""
@@ -31,7 +95,4 @@ class ServerRegistry:
     
     def get_servers_by_capability(self, capability: str) -> List[str]:
         """Get servers that provide a specific capability."""
-        return [
-            name for name, config in self.servers.items()
-            if capability in config.get("capabilities", [])
-        ]
+        return list(self.index.by_capability.get(capability, []))
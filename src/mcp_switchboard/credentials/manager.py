@@ -1,5 +1,6 @@
 """Unified credential management."""
 from __future__ import annotations
+import asyncio
 from typing import Dict, List
 from .aws_sso import AWSSSOManager
 from .oauth import OAuthManager
@@ -13,18 +14,27 @@ class CredentialManager:
         self.aws_sso = AWSSSOManager()
         self.oauth = OAuthManager(automation_enabled=oauth_automation)
         self.token_store = TokenStore()
+        # Error of each AWS profile whose last renewal raised
+        self.renewal_errors: Dict[str, BaseException] = {}
     
     async def prepare_credentials(self, server_configs: List[Dict]) -> Dict[str, bool]:
-        """Prepare all required credentials for selected servers."""
-        results = {}
+        """Prepare all required credentials for selected servers.
+        
+        AWS SSO renewals run concurrently, once per distinct profile, so
+        several server instances sharing a profile trigger a single login.
+        A renewal that raises fails only the servers using its profile; the
+        error is kept in ``renewal_errors`` under the profile name.
+        """
+        results: Dict[str, bool] = {}
+        profiles: Dict[str, str] = {}
         
         for config in server_configs:
             auth_type = config.get("authentication_type")
             server_name = config.get("name", "unknown")
             
             if auth_type == "aws_sso":
-                profile = config.get("env", {}).get("AWS_PROFILE", "default")
-                results[server_name] = await self.aws_sso.renew_if_needed(profile)
+                profiles[server_name] = config.get("env", {}).get("AWS_PROFILE", "default")
+                results[server_name] = False
             
             elif auth_type == "api_token":
                 token_key = self._get_token_key(config)
@@ -34,6 +44,23 @@ class CredentialManager:
             else:
                 results[server_name] = True  # No auth needed
         
+        distinct = list(dict.fromkeys(profiles.values()))
+        outcomes = await asyncio.gather(
+            *(self.aws_sso.renew_if_needed(profile) for profile in distinct),
+            return_exceptions=True,
+        )
+        renewed: Dict[str, bool] = {}
+        self.renewal_errors = {}
+        for profile, outcome in zip(distinct, outcomes):
+            if isinstance(outcome, BaseException):
+                self.renewal_errors[profile] = outcome
+                renewed[profile] = False
+            else:
+                renewed[profile] = bool(outcome)
+        
+        for server_name, profile in profiles.items():
+            results[server_name] = renewed[profile]
+        
         return results
     
     def _get_token_key(self, config: Dict) -> str:
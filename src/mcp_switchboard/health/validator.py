@@ -2,6 +2,7 @@
 from __future__ import annotations
 import asyncio
 import json
+import os
 from typing import Dict, List, Optional
 from pydantic import BaseModel
 
@@ -28,20 +29,18 @@ class HealthValidator:
         self._server_manager = manager
     
     async def validate_servers(self, server_configs: List[Dict]) -> List[ServerHealth]:
-        """Validate health of all servers."""
-        results = []
-        
-        for config in server_configs:
-            health = await self._validate_server(config)
-            results.append(health)
-        
-        return results
+        """Validate health of all servers, starting them concurrently."""
+        results = await asyncio.gather(
+            *(self._validate_server(config) for config in server_configs)
+        )
+        return list(results)
     
     async def _validate_server(self, config: Dict) -> ServerHealth:
         """Validate a single server with retries."""
         server_name = config.get("name", "unknown")
         command = config.get("command", "uvx")
-        args = config.get("args", [server_name])
+        args = config.get("args", [config.get("server", server_name)])
+        env = {**os.environ, **config["env"]} if config.get("env") else None
         
         for attempt in range(self.max_retries):
             try:
@@ -51,7 +50,7 @@ class HealthValidator:
                 if self._server_manager:
                     try:
                         server = await self._server_manager.start_server(
-                            server_name, command, args
+                            server_name, command, args, env=env
                         )
                         
                         # Wait a bit for server to initialize
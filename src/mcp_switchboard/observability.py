@@ -2,6 +2,7 @@
 from __future__ import annotations
 import json
 import logging
+import sys
 from datetime import datetime
 from typing import Dict, Any, Optional
 from pathlib import Path
@@ -22,9 +23,10 @@ class StructuredLogger:
         
         if self.log_path:
             self.log_path.parent.mkdir(parents=True, exist_ok=True)
-            handler = logging.FileHandler(self.log_path)
+            handler: logging.Handler = logging.FileHandler(self.log_path)
         else:
-            handler = logging.StreamHandler()
+            # Never stdout, which carries the stdio JSON-RPC transport
+            handler = logging.StreamHandler(sys.stderr)
         
         handler.setFormatter(logging.Formatter('%(message)s'))
         self.logger.addHandler(handler)
@@ -61,6 +63,18 @@ class StructuredLogger:
         self.log("DEBUG", event, component, **kwargs)
 
 
+# Global stderr logger, created on first use so importing adds no handler
+_logger: Optional[StructuredLogger] = None
+
+
+def get_logger() -> StructuredLogger:
+    """Get the global structured logger, which writes to stderr."""
+    global _logger
+    if _logger is None:
+        _logger = StructuredLogger()
+    return _logger
+
+
 class MetricsCollector:
     """Collect and track performance metrics."""
     
@@ -0,0 +1,237 @@
+"""Nearest-neighbour index over past task descriptions."""
+from __future__ import annotations
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from ..analyzer.canonical import canonicalize
+from ..state.manager import StateManager
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    """Unit-length signed hashed vector of the canonical word n-grams of ``text``.
+    
+    Unigrams and bigrams of the canonical form are hashed with CRC32, which
+    is stable across processes, and the top hash bit picks the sign so that
+    collisions cancel out on average instead of inflating similarity.
+    """
+    words = canonicalize(text).split()
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(dim, dtype=np.float32)
+    if not grams:
+        return vector
+    
+    hashes = np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.int64, count=len(grams))
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, hashes % dim, signs)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class HistoryMatch(NamedTuple):
+    """A past task similar to a query, with its cosine distance."""
+    rowid: int
+    distance: float
+
+
+class TaskHistoryIndex:
+    """Memory-mapped vector index of successful past tasks.
+    
+    Vectors are stored row by row in a float32 file next to the state
+    database, with the task rowid of each row in a parallel file. A query is
+    one matrix-vector product per block of rows plus a partial sort, so a
+    million tasks are searched in tens of milliseconds without loading the
+    index into memory. New completions are appended incrementally by
+    ``sync``.
+    """
+    
+    DEFAULT_DIM = 256
+    DIRNAME = "task_index"
+    # Rows scored per matrix-vector product during a query
+    BLOCK_ROWS = 65536
+    
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        dim: int = DEFAULT_DIM,
+        state_manager: Optional[StateManager] = None,
+        sync_interval: float = 5.0,
+    ) -> None:
+        """Open the index at ``path``, creating it if missing.
+        
+        Args:
+            path: Index directory, by default next to the state database
+            dim: Vector size; ignored when opening an existing index
+            state_manager: Task history to index
+            sync_interval: Minimum seconds between automatic syncs on query
+        """
+        self.state_manager = state_manager or StateManager()
+        self.path = Path(path).expanduser() if path else self.default_path(str(self.state_manager.db_path))
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.sync_interval = sync_interval
+        self._last_sync = 0.0
+        
+        meta = self._read_meta()
+        self.dim: int = meta.get("dim", dim)
+        self.count: int = meta.get("count", 0)
+        self.mark: Tuple[str, int] = tuple(meta.get("mark", ("", 0)))
+        self._vectors, self._rowids = self._map(max(self.count, 1024))
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    @classmethod
+    def default_path(cls, db_path: str = "~/.mcp-switchboard/state.db") -> Path:
+        """Index directory next to the state database."""
+        return Path(db_path).expanduser().with_name(cls.DIRNAME)
+    
+    @property
+    def capacity(self) -> int:
+        """Rows allocated on disk."""
+        return int(self._rowids.shape[0])
+    
+    def _read_meta(self) -> Dict[str, Any]:
+        """Index metadata, or an empty dict for a new index."""
+        try:
+            with open(self.path / "meta.json") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return meta if isinstance(meta, dict) else {}
+    
+    def _write_meta(self) -> None:
+        """Atomically record the row count, vector size and sync mark."""
+        tmp = self.path / "meta.json.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"dim": self.dim, "count": self.count, "mark": list(self.mark)}, f)
+        os.replace(tmp, self.path / "meta.json")
+    
+    def _map(self, capacity: int) -> Tuple[np.memmap, np.memmap]:
+        """Map the vector and rowid files, growing them to at least ``capacity`` rows."""
+        vectors_path = self.path / "vectors.f32"
+        rowids_path = self.path / "rowids.i64"
+        for file_path, row_bytes in ((vectors_path, 4 * self.dim), (rowids_path, 8)):
+            with open(file_path, "ab") as f:
+                if f.tell() < capacity * row_bytes:
+                    f.truncate(capacity * row_bytes)
+        
+        capacity = os.path.getsize(rowids_path) // 8
+        return (
+            np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)),
+            np.memmap(rowids_path, dtype=np.int64, mode="r+", shape=(capacity,)),
+        )
+    
+    def add(self, rows: Iterable[Tuple[int, str]]) -> int:
+        """Append (rowid, task_description) pairs and persist them.
+        
+        Returns:
+            Number of rows added
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        if self.count + len(rows) > self.capacity:
+            capacity = max(self.count + len(rows), self.capacity * 2)
+            # Unmap before the files grow, which some platforms require
+            del self._vectors, self._rowids
+            self._vectors, self._rowids = self._map(capacity)
+        
+        for offset, (rowid, description) in enumerate(rows, start=self.count):
+            self._vectors[offset] = embed(description, self.dim)
+            self._rowids[offset] = rowid
+        
+        # Rows only become visible once the metadata counting them is written
+        self._vectors.flush()
+        self._rowids.flush()
+        self.count += len(rows)
+        self._write_meta()
+        return len(rows)
+    
+    def sync(self) -> int:
+        """Index successful tasks completed since the last sync.
+        
+        Returns:
+            Number of tasks added
+        """
+        added = 0
+        batch: List[Tuple[int, str]] = []
+        mark = self.mark
+        for task in self.state_manager.iter_completed_successes(mark):
+            batch.append((task["rowid"], task["task_description"]))
+            mark = (task["completed_at"], task["rowid"])
+            if len(batch) >= self.BLOCK_ROWS:
+                self.mark = mark
+                added += self.add(batch)
+                batch = []
+        if batch:
+            # Skips the metadata write when nothing completed since the last sync
+            self.mark = mark
+            added += self.add(batch)
+        self._last_sync = time.monotonic()
+        return added
+    
+    def distance(self, text: str, other: str) -> float:
+        """Cosine distance between two descriptions, as reported by ``query``."""
+        return float(max(0.0, 1.0 - embed(text, self.dim) @ embed(other, self.dim)))
+    
+    def query(self, text: str, k: int = 5) -> List[HistoryMatch]:
+        """The k indexed tasks closest to ``text`` by cosine distance.
+        
+        Pending completions are synced first if the last sync is older than
+        ``sync_interval``.
+        """
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+        
+        vector = embed(text, self.dim)
+        if not self.count or k <= 0 or not vector.any():
+            return []
+        
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+        for start in range(0, self.count, self.BLOCK_ROWS):
+            scores = self._vectors[start:min(start + self.BLOCK_ROWS, self.count)] @ vector
+            top = np.argpartition(scores, -k)[-k:] if len(scores) > k else np.arange(len(scores))
+            best_rows = np.concatenate((best_rows, top + start))
+            best_scores = np.concatenate((best_scores, scores[top]))
+            if len(best_rows) > k:
+                keep = np.argpartition(best_scores, -k)[-k:]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+        
+        order = np.argsort(-best_scores, kind="stable")
+        return [
+            HistoryMatch(int(self._rowids[best_rows[i]]), float(max(0.0, 1.0 - best_scores[i])))
+            for i in order
+        ]
+    
+    @classmethod
+    def build(
+        cls,
+        path: Optional[Path] = None,
+        state_manager: Optional[StateManager] = None,
+        dim: int = DEFAULT_DIM,
+    ) -> TaskHistoryIndex:
+        """Rebuild the index from scratch over the whole task history."""
+        state_manager = state_manager or StateManager()
+        path = Path(path).expanduser() if path else cls.default_path(str(state_manager.db_path))
+        for name in ("meta.json", "vectors.f32", "rowids.i64"):
+            (path / name).unlink(missing_ok=True)
+        index = cls(path, dim=dim, state_manager=state_manager)
+        index.sync()
+        return index
+    
+    @classmethod
+    def load(
+        cls,
+        path: Optional[Path] = None,
+        state_manager: Optional[StateManager] = None,
+    ) -> Optional[TaskHistoryIndex]:
+        """Open a built index, or None if none has been built yet."""
+        state_manager = state_manager or StateManager()
+        path = Path(path).expanduser() if path else cls.default_path(str(state_manager.db_path))
+        if not (path / "meta.json").exists():
+            return None
+        return cls(path, state_manager=state_manager)
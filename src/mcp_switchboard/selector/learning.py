@@ -1,50 +1,101 @@
 """Historical pattern learning for server selection."""
-from typing import Dict, List, Optional
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from collections import defaultdict
-from mcp_switchboard.state.manager import StateManager
+from mcp_switchboard.state.manager import StateManager, selected_servers
+
+
+def task_fingerprint(aws_account: Optional[str], required_services: Iterable[str]) -> str:
+    """Fingerprint grouping tasks by account and required services."""
+    return f"{aws_account}:{','.join(required_services)}"
 
 
 class PatternLearner:
-    """Learn from historical patterns to improve server recommendations."""
+    """Learn from historical patterns to improve server recommendations.
     
-    def __init__(self, state_manager: Optional[StateManager] = None):
+    Successful tasks are aggregated in memory as per-fingerprint task and
+    server counts. The history is read once; afterwards only tasks completed
+    since the last sync are fetched, at most every ``sync_interval`` seconds,
+    so recommendations and boosts are dictionary lookups.
+    """
+    
+    def __init__(
+        self,
+        state_manager: Optional[StateManager] = None,
+        sync_interval: float = 5.0,
+    ) -> None:
         self.state_manager = state_manager or StateManager()
+        self.sync_interval = sync_interval
+        self._last_sync: Optional[float] = None
+        self._mark: Tuple[str, int] = ("", 0)
+        # Successful tasks, and their uses of each server, by fingerprint
+        self._task_counts: Dict[str, int] = defaultdict(int)
+        self._server_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    
+    def sync(self) -> int:
+        """Add successful tasks completed since the last sync to the counts.
+        
+        Returns:
+            Number of tasks added
+        """
+        added = 0
+        for task in self.state_manager.iter_completed_successes(self._mark):
+            self._mark = (task["completed_at"], task["rowid"])
+            # Malformed rows are skipped; the mark has already moved past them
+            try:
+                analysis = json.loads(task["analysis_json"] or "{}")
+                selection = json.loads(task["selection_json"] or "{}")
+                if not isinstance(analysis, dict) or not isinstance(selection, dict):
+                    continue
+                servers = set(selected_servers(selection))
+            except (TypeError, ValueError, KeyError):
+                continue
+            services = analysis.get("required_services") or []
+            if not isinstance(services, list):
+                continue
+            
+            fingerprint = task_fingerprint(analysis.get("aws_account"), services)
+            self._task_counts[fingerprint] += 1
+            for server in servers:
+                self._server_counts[fingerprint][server] += 1
+            added += 1
+        
+        self._last_sync = time.monotonic()
+        return added
+    
+    def _counts(self, task_fingerprint: str) -> Tuple[int, Dict[str, int]]:
+        """Task count and server counts of a fingerprint, syncing when due."""
+        if self._last_sync is None or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+        return self._task_counts.get(task_fingerprint, 0), self._server_counts.get(task_fingerprint, {})
     
     def get_recommendations(
         self,
         task_fingerprint: str,
         current_servers: List[str],
         limit: int = 3
-    ) -> List[Dict[str, float]]:
+    ) -> List[Dict[str, Any]]:
         """Get server recommendations based on historical patterns.
         
         Args:
             task_fingerprint: Fingerprint of current task
             current_servers: Servers already selected
             limit: Max number of recommendations
-            
+        
         Returns:
-            List of {server_name, confidence} dicts
+            List of {server_name, confidence, usage_count} dicts
         """
-        # Get historical patterns
-        patterns = self.state_manager.get_historical_patterns(task_fingerprint)
+        total_tasks, server_counts = self._counts(task_fingerprint)
         
-        if not patterns:
+        if not total_tasks:
             return []
         
-        # Count server usage frequency
-        server_counts = defaultdict(int)
-        total_tasks = len(patterns)
-        
-        for pattern in patterns:
-            servers = pattern.get("servers", [])
-            for server in servers:
-                if server not in current_servers:
-                    server_counts[server] += 1
-        
         # Calculate confidence scores
-        recommendations = []
+        recommendations: List[Dict[str, Any]] = []
         for server, count in server_counts.items():
+            if server in current_servers:
+                continue
             confidence = count / total_tasks
             recommendations.append({
                 "server_name": server,
@@ -68,25 +119,29 @@ class PatternLearner:
             server_name: Server to boost
             base_confidence: Original confidence score
             task_fingerprint: Current task fingerprint
-            
+        
         Returns:
             Boosted confidence score (0.0-1.0)
         """
-        patterns = self.state_manager.get_historical_patterns(task_fingerprint)
-        
-        if not patterns:
-            return base_confidence
-        
-        # Count successful uses
-        successful_uses = sum(
-            1 for p in patterns
-            if server_name in p.get("servers", [])
-        )
+        total_tasks, server_counts = self._counts(task_fingerprint)
+        successful_uses = server_counts.get(server_name, 0)
         
         if successful_uses == 0:
             return base_confidence
         
         # Boost by up to 0.2 based on usage frequency
-        boost = min(0.2, successful_uses / len(patterns) * 0.2)
+        boost = min(0.2, successful_uses / total_tasks * 0.2)
         
         return min(1.0, base_confidence + boost)
+    
+    def server_shares(self, task_fingerprint: str) -> Dict[str, float]:
+        """Share of successful past tasks with this fingerprint that used each server.
+        
+        Args:
+            task_fingerprint: Current task fingerprint
+        
+        Returns:
+            Fraction of matching tasks (0.0-1.0) by server name
+        """
+        total_tasks, server_counts = self._counts(task_fingerprint)
+        return {server: count / total_tasks for server, count in server_counts.items()}
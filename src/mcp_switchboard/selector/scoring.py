@@ -0,0 +1,142 @@
+"""Vectorized confidence scoring of every server in a registry."""
+from __future__ import annotations
+from typing import ClassVar, Dict, Iterable, List, Mapping, Optional
+import numpy as np
+from ..config.registry import ServerRegistry
+
+# Confidence contributed by each kind of evidence
+CAPABILITY_WEIGHT = 0.6
+KEYWORD_WEIGHT = 0.2
+MAX_LEARNING_BOOST = 0.2
+
+
+class RegistryMatrix:
+    """Registry compiled into a sparse capability-by-server incidence matrix.
+    
+    Row ``c`` of the matrix holds, in CSR ``indptr``/``indices`` form, the
+    positions of the servers providing capability ``c``. A task's required
+    capabilities are encoded as row ids, and every server's confidence is
+    computed from the selected rows with a few array operations, keyword
+    hits and learning boosts being added as server vectors. The matrix is
+    sparse because a dense one would not fit in memory for catalogs with
+    many distinct capabilities.
+    """
+    
+    _compiled: ClassVar[Dict[str, RegistryMatrix]] = {}
+    _cache_size: ClassVar[int] = 4
+    
+    def __init__(
+        self,
+        names: List[str],
+        positions: Dict[str, int],
+        capabilities: Dict[str, int],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+    ) -> None:
+        self.names = names
+        self.positions = positions
+        self.capabilities = capabilities
+        self.indptr = indptr
+        self.indices = indices
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    @classmethod
+    def build(cls, registry: ServerRegistry) -> RegistryMatrix:
+        """Compile the capability index of a registry."""
+        index = registry.index
+        rows = index.by_capability.values()
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(servers) for servers in rows], out=indptr[1:])
+        indices = np.fromiter(
+            (index.positions[name] for servers in rows for name in servers),
+            dtype=np.int64,
+            count=int(indptr[-1]),
+        )
+        return cls(
+            list(index.positions),
+            index.positions,
+            {capability: row for row, capability in enumerate(index.by_capability)},
+            indptr,
+            indices,
+        )
+    
+    @classmethod
+    def compile(cls, registry: ServerRegistry) -> RegistryMatrix:
+        """Matrix of a registry, built on first use and cached by ``registry.version``."""
+        version = registry.version
+        matrix = cls._compiled.get(version)
+        if matrix is None:
+            matrix = cls.build(registry)
+            if len(cls._compiled) >= cls._cache_size:
+                cls._compiled.pop(next(iter(cls._compiled)))
+            cls._compiled[version] = matrix
+        return matrix
+    
+    def query(self, capabilities: Iterable[str]) -> np.ndarray:
+        """Row ids of the known capabilities among ``capabilities``."""
+        rows = {self.capabilities[c] for c in capabilities if c in self.capabilities}
+        return np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+    
+    def capability_hits(self, rows: np.ndarray) -> np.ndarray:
+        """Whether each server provides any capability of the queried rows."""
+        hits = np.zeros(len(self.names), dtype=bool)
+        if len(rows):
+            hits[np.concatenate([self.indices[self.indptr[r]:self.indptr[r + 1]] for r in rows])] = True
+        return hits
+    
+    def mask(self, names: Iterable[str]) -> np.ndarray:
+        """Whether each server is among ``names``; unknown names are ignored."""
+        positions = [self.positions[name] for name in names if name in self.positions]
+        mask = np.zeros(len(self.names), dtype=bool)
+        mask[positions] = True
+        return mask
+    
+    def scores(
+        self,
+        capabilities: Iterable[str],
+        keyword_servers: Iterable[str] = (),
+        shares: Optional[Mapping[str, float]] = None,
+    ) -> np.ndarray:
+        """Confidence of every server, in registry order.
+        
+        A capability match is worth 0.6 and a keyword match 0.2, capped at 1.
+        Servers used by past similar tasks are then boosted by up to 0.2 in
+        proportion to their share of those tasks.
+        
+        Args:
+            capabilities: Capabilities the task requires
+            keyword_servers: Servers whose confidence keywords matched
+            shares: Share of similar past tasks that used each server
+        """
+        scores = CAPABILITY_WEIGHT * self.capability_hits(self.query(capabilities))
+        scores += KEYWORD_WEIGHT * self.mask(keyword_servers)
+        np.minimum(scores, 1.0, out=scores)
+        
+        if shares:
+            boost = np.zeros(len(self.names))
+            for name, share in shares.items():
+                position = self.positions.get(name)
+                if position is not None:
+                    boost[position] = min(MAX_LEARNING_BOOST, share * MAX_LEARNING_BOOST)
+            np.minimum(scores + boost, 1.0, out=scores)
+        return scores
+    
+    def rank(self, scores: np.ndarray, count: Optional[int] = None) -> np.ndarray:
+        """Positions of the ``count`` best positive scores, best first.
+        
+        Ties keep registry order. Only the best ``count`` are sorted; the rest
+        are set aside with a linear-time partition.
+        """
+        hits = np.flatnonzero(scores > 0)
+        if count is not None and count <= 0:
+            return hits[:0]
+        if count is not None and count < len(hits):
+            hit_scores = scores[hits]
+            kth = np.partition(hit_scores, len(hits) - count)[len(hits) - count]
+            above = hits[hit_scores > kth]
+            # Positions are ascending, so the ties kept are the first in registry order
+            ties = hits[hit_scores == kth][:count - len(above)]
+            hits = np.concatenate((above, ties))
+        return hits[np.lexsort((hits, -scores[hits]))]
@@ -1,9 +1,21 @@
 """Server selector for choosing MCP servers based on task analysis."""
 from __future__ import annotations
-from typing import List, Dict, Any, Optional
+import json
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Set, Tuple, Union
+import numpy as np
 from pydantic import BaseModel
 from ..config.registry import ServerRegistry
 from ..analyzer.analyzer import TaskAnalysis
+from ..analyzer.parser import KeywordAnalysis, TaskParser, analysis_fields
+from ..state.manager import selected_servers
+from .learning import PatternLearner, task_fingerprint
+from .scoring import RegistryMatrix
+
+if TYPE_CHECKING:
+    from .history_index import TaskHistoryIndex
+
+# Selection only reads analysis fields, so keyword results need no conversion
+Analysis = Union[TaskAnalysis, KeywordAnalysis]
 
 
 class ServerMatch(BaseModel):
@@ -27,92 +39,177 @@ class ServerSelector:
         self,
         registry: ServerRegistry,
         confidence_threshold: float = 0.7,
-        use_learning: bool = True
+        use_learning: bool = True,
+        history_index: Optional[TaskHistoryIndex] = None,
+        reuse_distance: float = 0.1,
+        learner: Optional[PatternLearner] = None,
     ) -> None:
         self.registry = registry
         self.threshold = confidence_threshold
         self.use_learning = use_learning
-        self._learner = None
+        self.history_index = history_index
+        self.reuse_distance = reuse_distance
+        # A learner shared between selectors keeps its pattern counts loaded
+        self._learner = learner if use_learning else None
         
-        if use_learning:
+        if use_learning and learner is None:
             try:
-                from .learning import PatternLearner
                 self._learner = PatternLearner()
             except Exception:
                 self.use_learning = False
     
-    def select(self, analysis: TaskAnalysis) -> ServerSelection:
-        """Select servers based on task analysis."""
-        # Get all potential matches
-        all_matches = self._match_servers(analysis)
+    def select(
+        self,
+        analysis: Analysis,
+        task_description: Optional[str] = None,
+        top_k: Optional[int] = None,
+        cursor: int = 0,
+    ) -> ServerSelection:
+        """Select servers based on task analysis.
+        
+        With a history index and the task description, the selection of a
+        near-identical past success is reused instead of scoring servers.
+        
+        Matches are ranked by confidence, best first. With ``top_k`` only one
+        page of that ranking is returned: the ``top_k`` matches after the
+        first ``cursor``, split by threshold. Only returned matches are built,
+        so a page costs the same however many servers match. The report's
+        ``next_cursor`` is the cursor of the next page, or None after the last.
+        """
+        if top_k is not None and top_k < 1:
+            raise ValueError("top_k must be positive")
+        cursor = max(cursor, 0)
+        
+        if task_description and self.history_index is not None:
+            reused = self._reuse_selection(analysis, task_description, top_k, cursor)
+            if reused is not None:
+                return reused
+        
+        # Get the requested page of matches
+        page, total = self._match_servers(analysis, top_k, cursor)
         
         # Split by threshold
-        selected = [m for m in all_matches if m.confidence >= self.threshold]
-        rejected = [m for m in all_matches if m.confidence < self.threshold]
+        selected = [m for m in page if m.confidence >= self.threshold]
+        rejected = [m for m in page if m.confidence < self.threshold]
         
         return ServerSelection(
             selected_servers=selected,
             rejected_servers=rejected,
-            decision_report=self._generate_report(analysis, selected, rejected),
+            decision_report=self._generate_report(analysis, selected, rejected, total, cursor),
         )
     
-    def _match_servers(self, analysis: TaskAnalysis) -> List[ServerMatch]:
-        """Match servers to task requirements."""
-        matches = []
-        
-        for server_name in self.registry.list_servers():
-            server_config = self.registry.get_server(server_name)
-            confidence = self._calculate_confidence(analysis, server_config)
-            
-            if confidence > 0:
-                matches.append(ServerMatch(
-                    server_name=server_name,
-                    confidence=confidence,
-                    reasoning=self._generate_reasoning(analysis, server_config),
-                ))
-        
-        # Sort by confidence
-        matches.sort(key=lambda x: x.confidence, reverse=True)
-        return matches
-    
-    def _calculate_confidence(self, analysis: TaskAnalysis, server_config: Dict) -> float:
-        """Calculate confidence score for a server."""
-        score = 0.0
+    def _reuse_selection(
+        self,
+        analysis: Analysis,
+        task_description: str,
+        top_k: Optional[int] = None,
+        cursor: int = 0,
+    ) -> Optional[ServerSelection]:
+        """Selection of the closest past success, if within ``reuse_distance``."""
+        history_index = self.history_index
+        if history_index is None:
+            return None
+        matches = history_index.query(task_description, k=1)
+        if not matches or matches[0].distance > self.reuse_distance:
+            return None
         
-        # Check capability matches
-        server_caps = set(server_config.get("capabilities", []))
-        required_caps = set(analysis.required_capabilities)
+        match = matches[0]
+        task = history_index.state_manager.get_tasks_by_rowid([match.rowid]).get(match.rowid)
+        # The index may be stale or built from another database, so the row must still match
+        if task is None or history_index.distance(task_description, task["task_description"]) > self.reuse_distance:
+            return None
+        try:
+            selection = json.loads(task["selection_json"])
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(selection, dict):
+            return None
+        
+        confidences = {
+            s["server_name"]: s.get("confidence")
+            for s in selection.get("selected_servers", [])
+        }
+        names = [name for name in selected_servers(selection) if self.registry.get_server(name)]
+        if not names:
+            return None
         
-        if server_caps & required_caps:
-            score += 0.6
+        end = None if top_k is None else cursor + top_k
+        selected = [
+            ServerMatch(
+                server_name=name,
+                confidence=confidences.get(name) or 1.0 - match.distance,
+                reasoning=f"Reused from similar past task {task['id']} (distance {match.distance:.3f})",
+            )
+            for name in names[cursor:end]
+        ]
         
-        # Check keyword matches
-        keywords = server_config.get("confidence_keywords", [])
-        for keyword in keywords:
-            if any(keyword in service for service in analysis.required_services):
-                score += 0.2
-                break
+        report = self._generate_report(analysis, selected, [], len(names), cursor)
+        report["history_match"] = {
+            "task_id": task["id"],
+            "task_description": task["task_description"],
+            "distance": match.distance,
+        }
+        return ServerSelection(
+            selected_servers=selected,
+            rejected_servers=[],
+            decision_report=report,
+        )
+    
+    def _match_servers(
+        self,
+        analysis: Analysis,
+        top_k: Optional[int] = None,
+        cursor: int = 0,
+    ) -> Tuple[List[ServerMatch], int]:
+        """Match servers to task requirements.
         
-        base_score = min(score, 1.0)
+        Every server of the registry is scored at once by its compiled
+        matrix; servers with no confidence are left out. Only the matches up
+        to the end of the page are ranked, and only the page is built.
         
-        # Boost with historical learning if available
-        if self.use_learning and self._learner:
-            try:
-                # Create task fingerprint
-                task_fp = f"{analysis.aws_account}:{','.join(analysis.required_services)}"
-                server_name = server_config.get("name", "")
-                
-                # Boost confidence based on historical success
-                boosted_score = self._learner.boost_confidence(
-                    server_name, base_score, task_fp
-                )
-                return boosted_score
-            except Exception:
-                pass
+        Returns:
+            The page of matches, best first, and the total number of matches
+        """
+        matrix = RegistryMatrix.compile(self.registry)
+        scores = matrix.scores(
+            analysis.required_capabilities,
+            self._keyword_servers(analysis),
+            self._learned_shares(analysis),
+        )
         
-        return base_score
+        total = int(np.count_nonzero(scores > 0))
+        ranked = matrix.rank(scores, None if top_k is None else cursor + top_k)
+        return [
+            ServerMatch(
+                server_name=matrix.names[i],
+                confidence=float(scores[i]),
+                reasoning=self._generate_reasoning(
+                    analysis, self.registry.get_server(matrix.names[i])
+                ),
+            )
+            for i in ranked[cursor:]
+        ], total
+    
+    @staticmethod
+    def _fingerprint(analysis: Analysis) -> str:
+        """Fingerprint grouping tasks for historical learning."""
+        return task_fingerprint(analysis.aws_account, analysis.required_services)
     
-    def _generate_reasoning(self, analysis: TaskAnalysis, server_config: Dict) -> str:
+    def _learned_shares(self, analysis: Analysis) -> Dict[str, float]:
+        """Share of similar past tasks that used each server, if learning is on."""
+        if not (self.use_learning and self._learner):
+            return {}
+        try:
+            return self._learner.server_shares(self._fingerprint(analysis))
+        except Exception:
+            return {}
+    
+    def _keyword_servers(self, analysis: Analysis) -> Set[str]:
+        """Servers whose confidence keywords match the required services."""
+        dictionary = TaskParser.compile_dictionary(self.registry)
+        return dictionary.servers_for(analysis.required_services)
+    
+    def _generate_reasoning(self, analysis: Analysis, server_config: Dict) -> str:
         """Generate reasoning for server selection."""
         reasons = []
         
@@ -127,14 +224,27 @@ class ServerSelector:
     
     def _generate_report(
         self,
-        analysis: TaskAnalysis,
+        analysis: Analysis,
         selected: List[ServerMatch],
         rejected: List[ServerMatch],
+        total: Optional[int] = None,
+        cursor: int = 0,
     ) -> Dict[str, Any]:
-        """Generate decision report."""
+        """Generate decision report.
+        
+        Args:
+            total: Number of matches across all pages; defaults to this page's
+            cursor: Number of matches ranked before this page
+        """
+        total = len(selected) + len(rejected) if total is None else total
+        end = cursor + len(selected) + len(rejected)
         return {
-            "task_analysis": analysis.dict(),
+            "task_analysis": (
+                analysis.model_dump() if isinstance(analysis, TaskAnalysis) else analysis_fields(analysis)
+            ),
             "selected_count": len(selected),
             "rejected_count": len(rejected),
             "threshold": self.threshold,
+            "total_matches": total,
+            "next_cursor": end if end < total else None,
         }
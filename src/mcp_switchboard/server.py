@@ -2,21 +2,64 @@
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-from mcp_switchboard.analyzer.analyzer import TaskAnalyzer
-from mcp_switchboard.analyzer.llm_analyzer import LLMTaskAnalyzer
+from mcp_switchboard.analyzer.analyzer import TaskAnalyzer, TaskAnalysis
+from mcp_switchboard.analyzer.classifier import TaskClassifier
+from mcp_switchboard.analyzer.llm_analyzer import LLMTaskAnalyzer, SamplingFn
+from mcp_switchboard.analyzer.llm_cache import LLMAnalysisCache
+from mcp_switchboard.analyzer.plugins import AnalyzerPlugins
+from mcp_switchboard.analyzer.parser import KeywordAnalysis, ParseSession
+from mcp_switchboard.analyzer.project_watcher import WatchedProjectScanner
+from mcp_switchboard.analyzer.prompt_builder import PromptBuilder
+from mcp_switchboard.analyzer.sampling_limiter import SamplingLimiter
+from mcp_switchboard.selector.history_index import TaskHistoryIndex
+from mcp_switchboard.selector.learning import PatternLearner
 from mcp_switchboard.selector.selector import ServerSelector
 from mcp_switchboard.config.registry import ServerRegistry
 from mcp_switchboard.credentials.manager import CredentialManager
 from mcp_switchboard.config.writer import ConfigWriter
 from mcp_switchboard.config.models import AgentPlatform
 from mcp_switchboard.lifecycle.server_manager import ServerManager
+from mcp_switchboard.state.manager import StateManager, selected_servers
 from mcp_switchboard.prompts import get_prompts, get_prompt_messages
+import asyncio
 import json
+from collections import OrderedDict
+from typing import Optional, Sequence, Union
 
 
 app = Server("mcp-switchboard")
-llm_analyzer = LLMTaskAnalyzer()
+state_manager = StateManager()
+# One limiter for all sessions, so many agents using the LLM at once cannot
+# overload the sampling host; requests over the limit are keyword parsed
+llm_analyzer = LLMTaskAnalyzer(
+    cache=LLMAnalysisCache(),
+    prompt_builder=PromptBuilder(state_manager),
+    limiter=SamplingLimiter(),
+)
+# Contexts of projects seen by the server are kept current in the background,
+# so requests never walk a project tree after its first scan
+project_scanner = WatchedProjectScanner()
+task_analyzer = TaskAnalyzer(
+    llm_analyzer=llm_analyzer,
+    classifier=TaskClassifier.load(),
+    project_scanner=project_scanner,
+    plugins=AnalyzerPlugins(),
+)
 server_manager = ServerManager()
+history_index = TaskHistoryIndex.load(state_manager=state_manager)
+# Shared by every selection so historical pattern counts are loaded only once
+pattern_learner = PatternLearner(state_manager)
+
+# Incremental parse sessions of as-you-type descriptions, least recently used first
+MAX_PARSE_SESSIONS = 256
+_parse_sessions: "OrderedDict[str, ParseSession]" = OrderedDict()
+
+# How long LLM analyses wait for the LLM before settling for keyword results
+DEFAULT_LLM_BUDGET_MS = 2000
+
+# Page size bounds of search_task_history
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 100
 
 
 @app.list_prompts()
@@ -58,6 +101,8 @@ async def list_tools() -> list[Tool]:
                             "(prod/dev/uat), region (e.g., Tokyo, Sydney, Virginia), and Jira ticket if applicable. "
                             "Examples: 'Deploy ECS service to prod Tokyo using DEVOPS-123', "
                             "'Fix Lambda timeout in dev us-east-1', 'Update DynamoDB table in uat Sydney'. "
+                            "Tasks that name several accounts or regions (e.g., 'compare prod Tokyo and "
+                            "prod Virginia') get one AWS server instance per account/region pair. "
                             "The more details you provide, the more accurate the configuration."
                         )
                     },
@@ -72,8 +117,9 @@ async def list_tools() -> list[Tool]:
                     "project_path": {
                         "type": "string",
                         "description": (
-                            "Optional path to your project directory. If provided, can be used for context-aware "
-                            "configuration in future versions. Currently not required."
+                            "Optional path to the project directory. Signals in the tree such as *.tf files, "
+                            ".github/, serverless.yml or cdk.json add the matching services (terraform, github, "
+                            "aws) to the required services. Rescans only revisit changed directories."
                         )
                     },
                     "dry_run": {
@@ -85,11 +131,20 @@ async def list_tools() -> list[Tool]:
                         )
                     },
                     "use_llm": {
-                        "type": "boolean",
+                        "type": ["boolean", "string"],
+                        "enum": [True, False, "auto"],
                         "description": (
                             "If true, use LLM sampling for semantic task analysis (95%+ accuracy but slower ~500ms). "
                             "If false, use keyword-based parsing (90% accuracy but faster <2ms). "
-                            "Defaults to false. Use true for complex or ambiguous task descriptions."
+                            "If \"auto\", keyword parsing is used and escalated to the LLM only when its "
+                            "confidence is low. Defaults to false. Use true for complex or ambiguous task descriptions."
+                        )
+                    },
+                    "latency_budget_ms": {
+                        "type": "number",
+                        "description": (
+                            "Maximum milliseconds to wait for LLM analysis. If the LLM has not answered "
+                            "in time the keyword analysis is used. Defaults to 2000."
                         )
                     }
                 },
@@ -117,22 +172,79 @@ async def list_tools() -> list[Tool]:
                             "The analyzer will extract AWS account, region, Jira ticket, and required services."
                         )
                     },
+                    "project_path": {
+                        "type": "string",
+                        "description": (
+                            "Optional path to the project directory. Signals in the tree such as *.tf files, "
+                            ".github/, serverless.yml or cdk.json add the matching services (terraform, github, "
+                            "aws) to the required services. Rescans only revisit changed directories."
+                        )
+                    },
+                    "session_id": {
+                        "type": "string",
+                        "description": (
+                            "Optional id for a description that is still being typed. Calls with the same "
+                            "id and a growing task_description only parse the newly typed text, making "
+                            "live suggestions cheap. Keyword analysis only; ignored unless use_llm is false."
+                        )
+                    },
                     "use_llm": {
-                        "type": "boolean",
+                        "type": ["boolean", "string"],
+                        "enum": [True, False, "auto"],
                         "description": (
                             "Use LLM for semantic analysis (more accurate, slower) vs keyword parsing (faster, less flexible). "
-                            "Defaults to false."
+                            "With \"auto\", the LLM is only asked when keyword confidence is low. Defaults to false."
+                        )
+                    },
+                    "latency_budget_ms": {
+                        "type": "number",
+                        "description": (
+                            "Maximum milliseconds to wait for LLM analysis. If the LLM has not answered "
+                            "in time the keyword analysis is used. Defaults to 2000."
                         )
                     }
                 },
                 "required": ["task_description"]
             }
         ),
+        Tool(
+            name="analyze_tasks_batch",
+            description=(
+                "Analyze many task descriptions in one call. Returns the same structured information "
+                "as analyze_task (AWS accounts and regions, Jira ticket, required services, confidence) "
+                "for each description, in input order. Use this instead of repeated analyze_task calls "
+                "when triaging a backlog, planning a sprint, or scoring many tickets at once. "
+                "Uses fast keyword analysis unless use_llm is set, in which case tasks are sent to the LLM "
+                "in batched requests. Read-only - does not modify any configuration."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "task_descriptions": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": (
+                            "Task descriptions to analyze, e.g. the summaries of Jira tickets. "
+                            "Example: ['DEVOPS-1: deploy ECS to prod Tokyo', 'DEVOPS-2: fix lambda in dev']."
+                        )
+                    },
+                    "use_llm": {
+                        "type": "boolean",
+                        "description": (
+                            "Use LLM for semantic analysis. Many tasks are packed into each LLM request, "
+                            "and tasks the LLM cannot answer fall back to keyword parsing. Defaults to false."
+                        )
+                    }
+                },
+                "required": ["task_descriptions"]
+            }
+        ),
         Tool(
             name="select_servers",
             description=(
                 "Recommend which MCP servers to use for a task based on requirements analysis. "
-                "Returns a ranked list of servers with confidence scores (0.0-1.0) and reasoning for each recommendation. "
+                "Returns a ranked list of servers with confidence scores (0.0-1.0) and reasoning for each recommendation, "
+                "optionally one page at a time (top_k, cursor). "
                 "Use this to understand which tools you'll need before actually configuring them. "
                 "Internally calls analyze_task first, then matches requirements to available servers in the registry. "
                 "Useful for planning, manual review of recommendations, or when you want to see alternatives. "
@@ -148,6 +260,14 @@ async def list_tools() -> list[Tool]:
                             "AWS account, region, services needed, etc."
                         )
                     },
+                    "project_path": {
+                        "type": "string",
+                        "description": (
+                            "Optional path to the project directory. Signals in the tree such as *.tf files, "
+                            ".github/, serverless.yml or cdk.json add the matching services (terraform, github, "
+                            "aws) to the required services. Rescans only revisit changed directories."
+                        )
+                    },
                     "confidence_threshold": {
                         "type": "number",
                         "description": (
@@ -157,9 +277,42 @@ async def list_tools() -> list[Tool]:
                             "Higher values (e.g., 0.9) only include highly confident matches."
                         )
                     },
+                    "top_k": {
+                        "type": "integer",
+                        "description": (
+                            "Return only this many servers, best first, selected and rejected together. "
+                            "Useful with large registries, where most matches are rejected. Omit for all matches."
+                        )
+                    },
+                    "cursor": {
+                        "type": "integer",
+                        "description": (
+                            "Position in the ranking to start from, for pagination: pass next_cursor from "
+                            "one page to get the next. Defaults to 0."
+                        )
+                    },
+                    "session_id": {
+                        "type": "string",
+                        "description": (
+                            "Optional id for a description that is still being typed. Calls with the same "
+                            "id and a growing task_description only parse the newly typed text, making "
+                            "live suggestions cheap. Keyword analysis only; ignored unless use_llm is false."
+                        )
+                    },
                     "use_llm": {
-                        "type": "boolean",
-                        "description": "Use LLM for semantic analysis. Defaults to false."
+                        "type": ["boolean", "string"],
+                        "enum": [True, False, "auto"],
+                        "description": (
+                            "Use LLM for semantic analysis. With \"auto\", the LLM is only asked when "
+                            "keyword confidence is low. Defaults to false."
+                        )
+                    },
+                    "latency_budget_ms": {
+                        "type": "number",
+                        "description": (
+                            "Maximum milliseconds to wait for LLM analysis. If the LLM has not answered "
+                            "in time the keyword analysis is used. Defaults to 2000."
+                        )
                     }
                 },
                 "required": ["task_description"]
@@ -297,80 +450,199 @@ async def list_tools() -> list[Tool]:
                             "Optional specific metric name to retrieve (e.g., 'task_analysis_ms', 'server_selection_ms'). "
                             "If not provided, returns all available metrics. "
                             "Common metrics: 'task_analysis_ms' (task parsing time), "
-                            "'server_selection_ms' (server matching time). "
+                            "'server_selection_ms' (server matching time), "
+                            "'llm_cache_hits' / 'llm_cache_misses' (LLM analysis cache counters). "
                             "Use without metric_name to see all available metrics first."
                         )
                     }
                 },
                 "required": []
             }
+        ),
+        Tool(
+            name="search_task_history",
+            description=(
+                "Full-text search of past tasks by description and analysis (accounts, regions, tickets, "
+                "services). Use this to find how a similar task was handled before, e.g. which servers were "
+                "configured for 'that DynamoDB migration'. Words are stemmed ('migration' finds 'migrate') and "
+                "results are ranked by relevance, best first, with a highlighted snippet, the stored analysis "
+                "and the selected servers. Results are paginated: pass next_offset from one page as offset "
+                "to get the next."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": (
+                            "Search words, e.g. 'dynamodb migration prod' or 'DEVOPS-123'. "
+                            "Tasks matching more of the words rank higher."
+                        )
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": f"Results per page (1-{MAX_SEARCH_LIMIT}). Defaults to {DEFAULT_SEARCH_LIMIT}."
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Number of results to skip, for pagination. Defaults to 0."
+                    },
+                    "successful_only": {
+                        "type": "boolean",
+                        "description": "If true, only return tasks that completed successfully. Defaults to false."
+                    }
+                },
+                "required": ["query"]
+            }
         )
     ]
 
 
+def _get_sampling_fn() -> Optional[SamplingFn]:
+    """Sampling function of the client session serving this request, if any."""
+    try:
+        return app.request_context.session.create_message
+    except (LookupError, AttributeError):
+        return None
+
+
+def _get_parse_session(session_id: str) -> ParseSession:
+    """Get or start the parse session of an as-you-type description."""
+    session = _parse_sessions.pop(session_id, None)
+    if session is None:
+        session = task_analyzer.parser.session()
+        if len(_parse_sessions) >= MAX_PARSE_SESSIONS:
+            _parse_sessions.popitem(last=False)
+    _parse_sessions[session_id] = session
+    return session
+
+
+async def _analyze_task(task_desc: str, arguments: dict) -> TaskAnalysis:
+    """Analyze a task according to the use_llm argument.
+    
+    use_llm=true hedges keyword and LLM analysis, use_llm=false (the default)
+    uses keywords only, and use_llm="auto" runs the confidence-gated cascade,
+    which asks the LLM only when keyword confidence is low. The cascade is
+    opt-in because keyword confidence stays below the escalation threshold
+    for most tasks that only name services. LLM analysis is bounded
+    by the latency_budget_ms argument; when it expires the keyword analysis
+    is used instead. A session_id without use_llm parses incrementally,
+    scanning only the text appended since the session's last call. Services
+    detected under the project_path argument and the results of analyzer
+    plugins triggered by the description are added to every analysis.
+    """
+    analysis = await _analyze_description(task_desc, arguments)
+    analysis = await task_analyzer.with_plugins(analysis, task_desc)
+    project_path = arguments.get("project_path", "")
+    if project_path and project_scanner.cached(project_path) is None:
+        # Walk a project seen for the first time off the event loop
+        await asyncio.to_thread(project_scanner.scan, project_path)
+    return task_analyzer.with_project_context(analysis, project_path)
+
+
+async def _analyze_description(task_desc: str, arguments: dict) -> TaskAnalysis:
+    """Analyze the task description alone; see ``_analyze_task``."""
+    use_llm = arguments.get("use_llm", False)
+    session_id = arguments.get("session_id")
+    if session_id is not None and not use_llm:
+        return task_analyzer.from_parsed(_get_parse_session(session_id).update(task_desc))
+    
+    sampling_fn = _get_sampling_fn() if use_llm else None
+    if sampling_fn is None:
+        return task_analyzer.analyze(task_desc)
+    
+    budget_ms = arguments.get("latency_budget_ms", DEFAULT_LLM_BUDGET_MS)
+    if use_llm == "auto":
+        return await task_analyzer.analyze_cascade(task_desc, sampling_fn, budget_ms=budget_ms)
+    
+    parsed = await llm_analyzer.analyze_hedged(task_desc, sampling_fn, budget_ms)
+    return task_analyzer.from_parsed(parsed)
+
+
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     """Handle tool calls."""
     
-    use_llm = arguments.get("use_llm", False)
-    
     if name == "analyze_task":
         task_desc = arguments["task_description"]
+        llm_error = None
         
-        if use_llm and hasattr(app, 'request_context'):
-            # Use LLM sampling if available
-            try:
-                llm_result = await llm_analyzer.analyze_with_llm(
-                    task_desc,
-                    app.request_context.session.create_message
-                )
-                analysis_dict = {
-                    "aws_account": llm_result.aws_account,
-                    "aws_region": llm_result.aws_region,
-                    "jira_ticket": llm_result.jira_ticket,
-                    "required_services": llm_result.required_services,
-                    "confidence": llm_result.confidence,
-                    "source": llm_result.source
-                }
-            except Exception as e:
-                # Fallback to keyword analysis
-                analyzer = TaskAnalyzer()
-                analysis = analyzer.analyze(task_desc)
-                analysis_dict = {
-                    "aws_account": analysis.aws_account,
-                    "aws_region": analysis.aws_region,
-                    "jira_ticket": analysis.jira_ticket,
-                    "required_services": analysis.required_services,
-                    "confidence": analysis.confidence,
-                    "source": "keyword_fallback",
-                    "llm_error": str(e)
-                }
-        else:
-            # Use keyword-based analysis
-            analyzer = TaskAnalyzer()
-            analysis = analyzer.analyze(task_desc)
-            analysis_dict = {
-                "aws_account": analysis.aws_account,
-                "aws_region": analysis.aws_region,
-                "jira_ticket": analysis.jira_ticket,
-                "required_services": analysis.required_services,
-                "confidence": analysis.confidence,
-                "source": "keyword"
-            }
+        try:
+            analysis = await _analyze_task(task_desc, arguments)
+        except Exception as e:
+            # Fallback to keyword analysis
+            analysis = task_analyzer.analyze(task_desc, arguments.get("project_path", ""))
+            analysis.source = "keyword_fallback"
+            llm_error = str(e)
+        
+        analysis_dict = {
+            "aws_account": analysis.aws_account,
+            "aws_region": analysis.aws_region,
+            "aws_accounts": analysis.aws_accounts,
+            "aws_regions": analysis.aws_regions,
+            "jira_ticket": analysis.jira_ticket,
+            "required_services": analysis.required_services,
+            "project_services": analysis.project_services,
+            "plugin_results": analysis.plugin_results,
+            "confidence": analysis.confidence,
+            "source": analysis.source
+        }
+        if llm_error:
+            analysis_dict["llm_error"] = llm_error
         
         return [TextContent(
             type="text",
             text=json.dumps(analysis_dict, indent=2)
         )]
     
+    elif name == "analyze_tasks_batch":
+        task_descs = arguments["task_descriptions"]
+        sampling_fn = _get_sampling_fn() if arguments.get("use_llm", False) else None
+        analyses: Sequence[Union[TaskAnalysis, KeywordAnalysis]]
+        if sampling_fn is None:
+            analyses = task_analyzer.analyze_many(task_descs)
+        else:
+            parsed_tasks = await llm_analyzer.analyze_many_with_llm(task_descs, sampling_fn)
+            analyses = [task_analyzer.from_parsed(parsed) for parsed in parsed_tasks]
+        
+        return [TextContent(
+            type="text",
+            text=json.dumps({
+                "analyses": [
+                    {
+                        "aws_account": analysis.aws_account,
+                        "aws_region": analysis.aws_region,
+                        "aws_accounts": analysis.aws_accounts,
+                        "aws_regions": analysis.aws_regions,
+                        "jira_ticket": analysis.jira_ticket,
+                        "required_services": analysis.required_services,
+                        "confidence": analysis.confidence,
+                        "source": analysis.source
+                    }
+                    for analysis in analyses
+                ],
+                "count": len(analyses)
+            }, indent=2)
+        )]
+    
     elif name == "select_servers":
-        analyzer = TaskAnalyzer()
-        analysis = analyzer.analyze(arguments["task_description"])
+        analysis = await _analyze_task(arguments["task_description"], arguments)
         
         registry = ServerRegistry()
         threshold = arguments.get("confidence_threshold", 0.7)
-        selector = ServerSelector(registry, confidence_threshold=threshold)
-        selection = selector.select(analysis)
+        selector = ServerSelector(
+            registry,
+            confidence_threshold=threshold,
+            history_index=history_index,
+            learner=pattern_learner,
+        )
+        top_k = arguments.get("top_k")
+        selection = selector.select(
+            analysis,
+            arguments["task_description"],
+            top_k=None if top_k is None else max(int(top_k), 1),
+            cursor=max(int(arguments.get("cursor", 0)), 0),
+        )
         
         result = {
             "selected_servers": [
@@ -387,8 +659,12 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
                     "confidence": s.confidence
                 }
                 for s in selection.rejected_servers
-            ]
+            ],
+            "total_matches": selection.decision_report["total_matches"],
+            "next_cursor": selection.decision_report["next_cursor"]
         }
+        if "history_match" in selection.decision_report:
+            result["history_match"] = selection.decision_report["history_match"]
         
         return [TextContent(
             type="text",
@@ -402,13 +678,12 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         dry_run = arguments.get("dry_run", False)
         
         # 1. Analyze task
-        analyzer = TaskAnalyzer()
-        analysis = analyzer.analyze(task_desc)
+        analysis = await _analyze_task(task_desc, arguments)
         
         # 2. Select servers
         registry = ServerRegistry()
-        selector = ServerSelector(registry)
-        selection = selector.select(analysis)
+        selector = ServerSelector(registry, history_index=history_index, learner=pattern_learner)
+        selection = selector.select(analysis, task_desc)
         
         # 3. Prepare configurations
         server_configs = []
@@ -417,25 +692,35 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             if server_info:
                 config = {
                     "name": server_match.server_name,
+                    "server": server_match.server_name,
                     "authentication_type": server_info.get("authentication_type", "none"),
                     "env": {}
                 }
                 
-                if server_match.server_name == "aws-api-mcp" and analysis.aws_account:
-                    config["env"]["AWS_PROFILE"] = analysis.aws_account
-                    config["env"]["AWS_REGION"] = analysis.aws_region or "us-east-1"
+                targets = analysis.aws_targets() if server_match.server_name == "aws-api-mcp" else []
+                if not targets:
+                    server_configs.append(config)
+                    continue
                 
-                server_configs.append(config)
+                # One instance per (account, region) pair
+                for account, region in targets:
+                    instance = dict(config, env={"AWS_PROFILE": account, "AWS_REGION": region})
+                    if len(targets) > 1:
+                        instance["name"] = f"{server_match.server_name}-{account}-{region}"
+                    server_configs.append(instance)
         
         result = {
             "analysis": {
                 "aws_account": analysis.aws_account,
                 "aws_region": analysis.aws_region,
+                "aws_accounts": analysis.aws_accounts,
+                "aws_regions": analysis.aws_regions,
                 "jira_ticket": analysis.jira_ticket,
                 "confidence": analysis.confidence
             },
             "selected_servers": [s.server_name for s in selection.selected_servers],
             "configured_servers": len(server_configs),
+            "server_instances": [c["name"] for c in server_configs],
             "dry_run": dry_run
         }
         
@@ -454,6 +739,10 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             # User will see credential status in result
             if not all(credential_results.values()):
                 result["warnings"] = ["Some credentials failed to prepare - servers may not work correctly"]
+                result["warnings"].extend(
+                    f"AWS SSO renewal failed for profile {profile}: {error}"
+                    for profile, error in credential_manager.renewal_errors.items()
+                )
             
             # 5. Write configuration
             from mcp_switchboard.config.models import AgentPlatform
@@ -465,11 +754,11 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             # Create MCP server configs (list format expected by ConfigWriter)
             mcp_configs = []
             for config in server_configs:
-                server_info = registry.get_server(config["name"])
+                server_info = registry.get_server(config["server"])
                 mcp_config = {
                     "name": config["name"],
                     "command": server_info.get("command", "uvx"),
-                    "args": server_info.get("args", [config["name"]]),
+                    "args": server_info.get("args", [config["server"]]),
                     "env": config.get("env", {})
                 }
                 mcp_configs.append(mcp_config)
@@ -485,7 +774,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             validator = HealthValidator(max_retries=2, timeout=10)
             validator.set_server_manager(server_manager)
             
-            # Validate all configured servers
+            # Validate all configured servers (started concurrently)
             health_checks = await validator.validate_servers(server_configs)
             
             result["health"] = {
@@ -640,6 +929,15 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         
         if metric_name:
             stats = collector.get_stats(metric_name)
+            counters = collector.get_all_counters()
+            if stats is None and metric_name in counters:
+                return [TextContent(
+                    type="text",
+                    text=json.dumps({
+                        "metric": metric_name,
+                        "value": counters[metric_name]
+                    }, indent=2)
+                )]
             if stats is None:
                 return [TextContent(
                     type="text",
@@ -659,23 +957,63 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
                 type="text",
                 text=json.dumps({
                     "metrics": all_stats,
+                    "counters": collector.get_all_counters(),
                     "count": len(all_stats)
                 }, indent=2)
             )]
     
+    elif name == "search_task_history":
+        limit = min(max(int(arguments.get("limit", DEFAULT_SEARCH_LIMIT)), 1), MAX_SEARCH_LIMIT)
+        offset = max(int(arguments.get("offset", 0)), 0)
+        page = state_manager.search_tasks(
+            arguments["query"],
+            limit=limit,
+            offset=offset,
+            successful_only=arguments.get("successful_only", False),
+        )
+        
+        results = []
+        for task in page["results"]:
+            selection = json.loads(task["selection_json"] or "{}")
+            results.append({
+                "task_id": task["id"],
+                "task_description": task["task_description"],
+                "snippet": task["snippet"],
+                "agent_type": task["agent_type"],
+                "created_at": task["created_at"],
+                "success": None if task["success"] is None else bool(task["success"]),
+                "analysis": json.loads(task["analysis_json"] or "null"),
+                "selected_servers": selected_servers(selection),
+                "score": -task["rank"]
+            })
+        
+        next_offset = offset + len(results)
+        return [TextContent(
+            type="text",
+            text=json.dumps({
+                "query": arguments["query"],
+                "results": results,
+                "total": page["total"],
+                "offset": offset,
+                "next_offset": next_offset if next_offset < page["total"] else None
+            }, indent=2)
+        )]
+    
     raise ValueError(f"Unknown tool: {name}")
 
 
 async def main():
     """Run MCP server."""
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(
-            read_stream,
-            write_stream,
-            app.create_initialization_options()
-        )
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await app.run(
+                read_stream,
+                write_stream,
+                app.create_initialization_options()
+            )
+    finally:
+        project_scanner.stop()
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
@@ -3,10 +3,32 @@ from __future__ import annotations
 import sqlite3
 import json
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Sequence, Tuple
 from datetime import datetime
 
 
+# Filler words dropped from search queries so they do not outrank real terms
+SEARCH_STOPWORDS = frozenset({
+    "a", "an", "and", "at", "by", "did", "do", "for", "from", "how", "in", "is",
+    "it", "of", "on", "or", "our", "that", "the", "these", "this", "those", "to",
+    "was", "we", "what", "when", "with",
+})
+
+
+def selected_servers(selection: Any) -> List[str]:
+    """Server names recorded in a selection_json payload.
+    
+    A payload that is not an object, or whose server list is not a list,
+    records no servers.
+    """
+    if not isinstance(selection, dict):
+        return []
+    if "selected_servers" in selection:
+        return [s["server_name"] for s in selection["selected_servers"]]
+    servers = selection.get("servers", [])
+    return list(servers) if isinstance(servers, list) else []
+
+
 class StateManager:
     """Manage task history and metrics in SQLite database."""
     
@@ -19,8 +41,47 @@ class StateManager:
         """Initialize database with schema."""
         schema_path = Path(__file__).parent / "schema.sql"
         conn = sqlite3.connect(self.db_path)
+        has_search_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'"
+        ).fetchone() is not None
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+        unkeyed = bool(columns) and "seq" not in columns
+        if unkeyed:
+            # Databases created before tasks.seq: set the old table and
+            # everything built on it aside, keeping foreign keys pointing at "tasks"
+            conn.executescript(
+                "DROP TRIGGER IF EXISTS tasks_fts_insert;"
+                "DROP TRIGGER IF EXISTS tasks_fts_delete;"
+                "DROP TRIGGER IF EXISTS tasks_fts_update;"
+                "DROP VIEW IF EXISTS task_search_text;"
+                "DROP TABLE IF EXISTS tasks_fts;"
+                "DROP INDEX IF EXISTS idx_tasks_agent;"
+                "DROP INDEX IF EXISTS idx_tasks_completed;"
+                "PRAGMA legacy_alter_table = ON;"
+                "ALTER TABLE tasks RENAME TO tasks_unkeyed;"
+                "PRAGMA legacy_alter_table = OFF;"
+            )
         with open(schema_path) as f:
             conn.executescript(f.read())
+        if unkeyed:
+            # Current rowids become seq, so existing history indexes stay valid;
+            # the insert trigger indexes every task for search
+            conn.execute(
+                "INSERT INTO tasks (seq, id, task_description, agent_type, project_path, "
+                "created_at, completed_at, success, analysis_json, selection_json) "
+                "SELECT rowid, id, task_description, agent_type, project_path, "
+                "created_at, completed_at, success, analysis_json, selection_json "
+                "FROM tasks_unkeyed ORDER BY rowid"
+            )
+            conn.execute("DROP TABLE tasks_unkeyed")
+            conn.commit()
+        elif not has_search_index:
+            # Databases created before full-text search: index existing tasks once
+            conn.execute(
+                "INSERT INTO tasks_fts (rowid, task_description, analysis) "
+                "SELECT seq, task_description, analysis FROM task_search_text"
+            )
+            conn.commit()
         conn.close()
     
     def create_task(
@@ -132,3 +193,119 @@ class StateManager:
         conn.close()
         
         return results
+    
+    def search_tasks(
+        self,
+        query: str,
+        limit: int = 10,
+        offset: int = 0,
+        successful_only: bool = False,
+    ) -> Dict[str, Any]:
+        """Full-text search of task descriptions and analyses.
+        
+        Tasks matching any non-filler word of ``query``, in the description
+        or in a value of the stored analysis, are ranked by BM25 so tasks
+        matching more and rarer words come first; description matches weigh
+        double.
+        
+        Args:
+            query: Free-text search terms
+            limit: Max results per page
+            offset: Results to skip, for pagination
+            successful_only: Only return tasks that completed successfully
+        
+        Returns:
+            Dict with the page of ``results`` and the ``total`` match count
+        """
+        terms = query.split()
+        terms = [t for t in terms if t.lower() not in SEARCH_STOPWORDS] or terms
+        if not terms:
+            return {"results": [], "total": 0}
+        # Quote every term so input such as "us-east-1" is not read as query syntax
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        where = "tasks_fts MATCH ?" + (" AND t.success = 1" if successful_only else "")
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM tasks_fts JOIN tasks t ON t.seq = tasks_fts.rowid WHERE {where}",
+            (match,),
+        ).fetchone()[0]
+        cursor = conn.execute(
+            "SELECT t.id, t.task_description, t.agent_type, t.project_path, t.created_at, "
+            "t.completed_at, t.success, t.analysis_json, t.selection_json, "
+            "snippet(tasks_fts, 0, '[', ']', '...', 16) AS snippet, "
+            "bm25(tasks_fts, 2.0, 1.0) AS rank "
+            f"FROM tasks_fts JOIN tasks t ON t.seq = tasks_fts.rowid WHERE {where} "
+            "ORDER BY rank LIMIT ? OFFSET ?",
+            (match, limit, offset),
+        )
+        results = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        return {"results": results, "total": total}
+    
+    def iter_successful_tasks(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Stream every successful task with its analysis and selection.
+        
+        Rows are fetched in batches so arbitrarily large histories can be
+        consumed without loading them into memory.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(
+                "SELECT task_description, analysis_json, selection_json "
+                "FROM tasks WHERE success = 1"
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
+    
+    def iter_completed_successes(
+        self,
+        after: Tuple[str, int] = ("", 0),
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream successful tasks completed after a (completed_at, rowid) mark.
+        
+        Rows come in completion order with their ``rowid``, so a consumer can
+        remember the last mark it saw and later fetch only newer completions.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(
+                "SELECT seq AS rowid, completed_at, task_description, analysis_json, selection_json FROM tasks "
+                "WHERE success = 1 AND completed_at IS NOT NULL AND (completed_at, seq) > (?, ?) "
+                "ORDER BY completed_at, seq",
+                after,
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
+    
+    def get_tasks_by_rowid(self, rowids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        """Get tasks by rowid, the ``seq`` column, which VACUUM keeps."""
+        if not rowids:
+            return {}
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        placeholders = ", ".join("?" * len(rowids))
+        cursor = conn.execute(
+            f"SELECT seq AS rowid, * FROM tasks WHERE seq IN ({placeholders})",
+            [int(r) for r in rowids],
+        )
+        results = {row["rowid"]: dict(row) for row in cursor.fetchall()}
+        conn.close()
+        return results
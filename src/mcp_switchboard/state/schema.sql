@@ -1,7 +1,10 @@
 -- State management schema for mcp-switchboard
 
+-- seq is the rowid, declared so VACUUM keeps it and the search index,
+-- history index and sync marks that refer to tasks by it stay valid
 CREATE TABLE IF NOT EXISTS tasks (
-    id TEXT PRIMARY KEY,
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
     task_description TEXT NOT NULL,
     agent_type TEXT NOT NULL,
     project_path TEXT,
@@ -32,5 +35,38 @@ CREATE TABLE IF NOT EXISTS metrics (
 );
 
 CREATE INDEX IF NOT EXISTS idx_tasks_agent ON tasks(agent_type);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed_at);
 CREATE INDEX IF NOT EXISTS idx_server_usage_task ON server_usage(task_id);
 CREATE INDEX IF NOT EXISTS idx_metrics_task ON metrics(task_id);
+
+-- Full-text search over task history. The analysis is indexed by its text
+-- values only, so JSON keys such as "aws_account" do not match every task,
+-- and words are stemmed so "migration" finds "migrate". Rows are keyed by
+-- tasks.seq.
+CREATE VIEW IF NOT EXISTS task_search_text AS
+SELECT
+    seq,
+    task_description,
+    CASE WHEN json_valid(analysis_json) THEN (
+        SELECT group_concat(value, ' ') FROM json_tree(analysis_json) WHERE type = 'text'
+    ) END AS analysis
+FROM tasks;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    task_description, analysis, tokenize = 'porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts (rowid, task_description, analysis)
+    SELECT seq, task_description, analysis FROM task_search_text WHERE seq = new.seq;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    DELETE FROM tasks_fts WHERE rowid = old.seq;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF task_description, analysis_json ON tasks BEGIN
+    DELETE FROM tasks_fts WHERE rowid = old.seq;
+    INSERT INTO tasks_fts (rowid, task_description, analysis)
+    SELECT seq, task_description, analysis FROM task_search_text WHERE seq = new.seq;
+END;
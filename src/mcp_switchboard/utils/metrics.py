@@ -1,20 +1,33 @@
 """Performance metrics collection."""
 import time
 import functools
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, TypeVar, cast
 from collections import defaultdict
 
 
 class MetricsCollector:
     """Collect and aggregate performance metrics."""
     
-    def __init__(self):
+    def __init__(self) -> None:
         self._metrics: Dict[str, List[float]] = defaultdict(list)
+        self._counters: Dict[str, int] = defaultdict(int)
     
-    def record(self, metric_name: str, value: float):
+    def record(self, metric_name: str, value: float) -> None:
         """Record a metric value."""
         self._metrics[metric_name].append(value)
     
+    def increment(self, counter_name: str, amount: int = 1) -> None:
+        """Increment a counter."""
+        self._counters[counter_name] += amount
+    
+    def get_counter(self, counter_name: str) -> int:
+        """Get the current value of a counter."""
+        return self._counters.get(counter_name, 0)
+    
+    def get_all_counters(self) -> Dict[str, int]:
+        """Get all counters."""
+        return dict(self._counters)
+    
     def get_stats(self, metric_name: str) -> Optional[Dict[str, float]]:
         """Get statistics for a metric."""
         values = self._metrics.get(metric_name, [])
@@ -36,10 +49,13 @@ class MetricsCollector:
             for name in self._metrics.keys()
         }
     
-    def clear(self):
-        """Clear all metrics."""
+    def clear(self) -> None:
+        """Clear all metrics and counters."""
         self._metrics.clear()
+        self._counters.clear()
+
 
+F = TypeVar("F", bound=Callable[..., Any])
 
 # Global metrics collector
 _collector = MetricsCollector()
@@ -50,11 +66,11 @@ def get_collector() -> MetricsCollector:
     return _collector
 
 
-def timed(metric_name: str):
+def timed(metric_name: str) -> Callable[[F], F]:
     """Decorator to time function execution and record metric."""
-    def decorator(func):
+    def decorator(func: F) -> F:
         @functools.wraps(func)
-        async def async_wrapper(*args, **kwargs):
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
             start = time.perf_counter()
             try:
                 return await func(*args, **kwargs)
@@ -63,7 +79,7 @@ def timed(metric_name: str):
                 _collector.record(metric_name, duration)
         
         @functools.wraps(func)
-        def sync_wrapper(*args, **kwargs):
+        def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
             start = time.perf_counter()
             try:
                 return func(*args, **kwargs)
@@ -74,7 +90,7 @@ def timed(metric_name: str):
         # Return appropriate wrapper based on function type
         import asyncio
         if asyncio.iscoroutinefunction(func):
-            return async_wrapper
-        return sync_wrapper
+            return cast(F, async_wrapper)
+        return cast(F, sync_wrapper)
     
     return decorator
@@ -1,9 +1,12 @@
 """Performance benchmarking for mcp-switchboard components."""
 import time
 import statistics
-from typing import List, Dict, Any
+import tracemalloc
+from functools import partial
+from typing import Iterable, List, Dict, Any, Set
 from mcp_switchboard.analyzer.parser import TaskParser
 from mcp_switchboard.analyzer.analyzer import TaskAnalyzer
+from mcp_switchboard.selector.scoring import RegistryMatrix
 from mcp_switchboard.selector.selector import ServerSelector
 from mcp_switchboard.config.registry import ServerRegistry
 from mcp_switchboard.cache import TaskCache
@@ -79,6 +82,132 @@ def benchmark_task_cache():
     return benchmark(run)
 
 
+def measure_allocations(func, iterations: int = 1000) -> Dict[str, float]:
+    """Measure per-call time and memory of ``func``.
+    
+    ``peak_bytes`` is the most memory a call had allocated at once and
+    ``retained_bytes`` the size of what it returned.
+    """
+    results = [func() for _ in range(10)]  # warm caches before measuring
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    mean_us = (time.perf_counter() - start) / iterations * 1e6
+    
+    tracemalloc.start()
+    peaks = []
+    retained = []
+    for _ in range(100):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        results.append(func())
+        current, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+        retained.append(current - before)
+    tracemalloc.stop()
+    
+    return {
+        "mean_us": mean_us,
+        "peak_bytes": statistics.median(peaks),
+        "retained_bytes": statistics.median(retained),
+    }
+
+
+def benchmark_keyword_fast_path() -> Dict[str, Dict[str, float]]:
+    """Compare keyword analysis result types.
+    
+    ``two_models`` is the former analyze path (ParsedTask, then TaskAnalysis),
+    ``one_model`` the current ``analyze`` and ``keyword_analysis`` the
+    model-free result used by ``analyze_many``.
+    """
+    parser = TaskParser()
+    analyzer = TaskAnalyzer()
+    task = "Deploy ECS service to prod Tokyo using Jira DEVOPS-123"
+    
+    return {
+        "two_models": measure_allocations(lambda: analyzer.from_parsed(parser.parse(task))),
+        "one_model": measure_allocations(lambda: analyzer.analyze(task)),
+        "keyword_analysis": measure_allocations(lambda: parser.scan(task)),
+    }
+
+
+def synthetic_registry(size: int) -> ServerRegistry:
+    """Built-in registry padded to ``size`` entries drawn from 500 capabilities."""
+    registry = ServerRegistry()
+    for i in range(size - len(registry.servers)):
+        registry.add_server(f"internal-{i}-mcp", {
+            "capabilities": [f"cap{i % 500}", f"cap{(i * 7 + 3) % 500}"],
+            "confidence_keywords": [f"svc{i}"],
+        })
+    return registry
+
+
+def loop_scores(registry: ServerRegistry, capabilities: Iterable[str], keyword_servers: Set[str]) -> List[float]:
+    """Base confidence of every server computed one server at a time.
+    
+    The per-server loop selection used before RegistryMatrix: a capability
+    match is worth 0.6 and a keyword match 0.2.
+    """
+    required = set(capabilities)
+    scores = []
+    for name in registry.list_servers():
+        score = 0.6 if required & set(registry.get_server(name).get("capabilities", [])) else 0.0
+        if name in keyword_servers:
+            score += 0.2
+        scores.append(min(score, 1.0))
+    return scores
+
+
+def benchmark_registry_scoring(sizes=(1000, 10000, 100000)) -> Dict[int, Dict[str, float]]:
+    """Compare scoring every registry entry with the per-server loop and the matrix.
+    
+    Learning is off, so both paths measure base confidence only.
+    """
+    results = {}
+    for size in sizes:
+        registry = synthetic_registry(size)
+        selector = ServerSelector(registry, use_learning=False)
+        analysis = TaskAnalyzer(registry).analyze("Deploy ECS service to prod Tokyo using Jira DEVOPS-123")
+        keyword_servers = selector._keyword_servers(analysis)
+        matrix = RegistryMatrix.compile(registry)
+        
+        loop = partial(loop_scores, registry, analysis.required_capabilities, keyword_servers)
+        vectorized = partial(matrix.scores, analysis.required_capabilities, keyword_servers)
+        
+        iterations = max(3, 100000 // size)
+        loop_ms = benchmark(loop, iterations)["median"]
+        matrix_ms = benchmark(vectorized, iterations * 10)["median"]
+        results[size] = {"loop_ms": loop_ms, "matrix_ms": matrix_ms, "speedup": loop_ms / matrix_ms}
+    return results
+
+
+def print_scoring_results(results: Dict[int, Dict[str, float]]):
+    """Print registry scoring comparison."""
+    print("\n" + "="*70)
+    print("REGISTRY SCORING (median per selection)")
+    print("="*70)
+    for size, stats in results.items():
+        print(
+            f"  {size:>7} servers  loop {stats['loop_ms']:9.3f} ms  "
+            f"matrix {stats['matrix_ms']:7.3f} ms  ({stats['speedup']:.0f}x)"
+        )
+    print()
+
+
+def print_allocation_results(results: Dict[str, Dict[str, float]]):
+    """Print keyword result type comparison."""
+    print("\n" + "="*70)
+    print("KEYWORD ANALYSIS RESULT TYPES (per call)")
+    print("="*70)
+    for path, stats in results.items():
+        print(
+            f"  {path:<18} {stats['mean_us']:8.1f} us  "
+            f"peak {stats['peak_bytes']:8.0f} B  retained {stats['retained_bytes']:8.0f} B"
+        )
+    print()
+
+
 def run_all_benchmarks() -> Dict[str, Dict[str, float]]:
     """Run all benchmarks and return results."""
     print("Running performance benchmarks...\n")
@@ -141,3 +270,5 @@ def print_results(results: Dict[str, Dict[str, float]]):
 if __name__ == "__main__":
     results = run_all_benchmarks()
     print_results(results)
+    print_allocation_results(benchmark_keyword_fast_path())
+    print_scoring_results(benchmark_registry_scoring())
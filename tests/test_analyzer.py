@@ -40,7 +40,183 @@ def test_confidence_calculation():
     analyzer = TaskAnalyzer()
     
     minimal = analyzer.analyze("Do something")
-    partial = analyzer.analyze("Deploy to prod")
+    partial = analyzer.analyze("Deploy to prod Tokyo")
     complete = analyzer.analyze("Deploy ECS to prod Tokyo using DEVOPS-123")
     
     assert minimal.confidence < partial.confidence < complete.confidence
+
+
+def test_aws_targets():
+    """Test account/region pairs for multi-target tasks."""
+    analyzer = TaskAnalyzer()
+    
+    result = analyzer.analyze("Compare prod Tokyo and prod Virginia")
+    assert result.aws_targets() == [("prod", "ap-northeast-1"), ("prod", "us-east-1")]
+    
+    result = analyzer.analyze("Deploy Lambda to dev")
+    assert result.aws_targets() == [("dev", "us-east-1")]
+    
+    result = analyzer.analyze("Write documentation")
+    assert result.aws_targets() == []
+
+
+def test_analyze_with_project_path(tmp_path):
+    """Test services detected in the project tree are added."""
+    from mcp_switchboard.analyzer.project_scanner import ProjectScanner
+    
+    (tmp_path / "project").mkdir()
+    (tmp_path / "project" / "main.tf").write_text("")
+    analyzer = TaskAnalyzer(project_scanner=ProjectScanner(tmp_path / "index"))
+    
+    plain = analyzer.analyze("Deploy ECS to prod")
+    result = analyzer.analyze("Deploy ECS to prod", str(tmp_path / "project"))
+    
+    assert result.project_services == ["terraform"]
+    assert result.required_services == plain.required_services + ["terraform"]
+    assert "terraform" in result.required_capabilities
+    assert result.confidence == plain.confidence
+
+
+def test_analyze_without_project_path_skips_scanner():
+    """Test no scanner is created or timed until a project path is given."""
+    from mcp_switchboard.utils.metrics import get_collector
+    
+    get_collector().clear()
+    analyzer = TaskAnalyzer()
+    analyzer.analyze("Deploy ECS to prod")
+    
+    assert analyzer._project_scanner is None
+    assert get_collector().get_stats("project_scan_ms") is None
+
+
+def test_analyze_many():
+    """Test batch analysis matches single analysis, in input order."""
+    analyzer = TaskAnalyzer()
+    tasks = [
+        "Deploy ECS to prod Tokyo using DEVOPS-123",
+        "Write documentation",
+        "Deploy ECS to prod Tokyo using DEVOPS-123",
+    ]
+    
+    results = analyzer.analyze_many(tasks)
+    
+    assert len(results) == 3
+    assert analyzer.from_parsed(results[0]) == analyzer.analyze(tasks[0])
+    assert results[0].model_dump() == analyzer.analyze(tasks[0]).model_dump()
+    assert not results[1].required_services
+    assert results[2] is results[0]
+    # source is a field, so a relabelled copy carries it into the model
+    assert analyzer.from_parsed(results[0]._replace(source="local")).source == "local"
+
+
+class FakeSampling:
+    """Sampling function stub that counts calls."""
+    
+    def __init__(self, response: str, delay: float = 0.0):
+        self.response = response
+        self.delay = delay
+        self.calls = 0
+    
+    async def __call__(self, **kwargs):
+        import asyncio
+        from types import SimpleNamespace
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(content=SimpleNamespace(text=self.response))
+
+
+LLM_RESPONSE = (
+    '{"aws_account": "dev", "aws_region": null, "jira_ticket": null, '
+    '"required_services": ["aws"], "required_capabilities": ["aws"], "confidence": 0.9}'
+)
+
+
+@pytest.mark.asyncio
+async def test_cascade_stops_at_confident_keywords():
+    """Test confident keyword analyses never reach the LLM."""
+    from mcp_switchboard.analyzer.llm_analyzer import LLMTaskAnalyzer
+    from mcp_switchboard.utils.metrics import get_collector
+    
+    get_collector().clear()
+    analyzer = TaskAnalyzer(llm_analyzer=LLMTaskAnalyzer())
+    sampling = FakeSampling(LLM_RESPONSE)
+    
+    result = await analyzer.analyze_cascade("Deploy ECS to prod Tokyo", sampling)
+    
+    assert result.source == "keyword"
+    assert sampling.calls == 0
+    assert get_collector().get_counter("cascade_keyword_hits") == 1
+    assert get_collector().get_stats("cascade_keyword_ms")["count"] == 1
+    assert get_collector().get_stats("cascade_llm_ms") is None
+
+
+@pytest.mark.asyncio
+async def test_cascade_escalates_low_confidence():
+    """Test low-confidence keyword analyses are escalated and merged."""
+    from mcp_switchboard.analyzer.llm_analyzer import LLMTaskAnalyzer
+    from mcp_switchboard.utils.metrics import get_collector
+    
+    get_collector().clear()
+    analyzer = TaskAnalyzer(llm_analyzer=LLMTaskAnalyzer())
+    sampling = FakeSampling(LLM_RESPONSE)
+    
+    result = await analyzer.analyze_cascade("spin up the thing for the new feature", sampling)
+    
+    assert sampling.calls == 1
+    assert result.source == "hybrid"
+    assert result.aws_account == "dev"
+    assert "aws" in result.required_services
+    assert get_collector().get_counter("cascade_requests") == 1
+    assert get_collector().get_counter("cascade_llm_hits") == 1
+    assert get_collector().get_stats("cascade_llm_ms")["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cascade_keyword_on_llm_deadline():
+    """Test the keyword analysis is used when the LLM misses its budget."""
+    from mcp_switchboard.analyzer.llm_analyzer import LLMTaskAnalyzer
+    
+    llm = LLMTaskAnalyzer()
+    analyzer = TaskAnalyzer(llm_analyzer=llm)
+    
+    result = await analyzer.analyze_cascade(
+        "spin up the thing", FakeSampling(LLM_RESPONSE, delay=5), budget_ms=20
+    )
+    
+    assert result.source == "keyword_deadline"
+    for task in llm._inflight.values():
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_cascade_deadline_names_answering_stage():
+    """Test a missed LLM budget is labelled with the stage that answered."""
+    from mcp_switchboard.analyzer.classifier import TaskClassifier
+    from mcp_switchboard.analyzer.llm_analyzer import LLMTaskAnalyzer
+    
+    llm = LLMTaskAnalyzer()
+    classifier = TaskClassifier.train([
+        ("spin up the pods", ["kubernetes"], ["kubernetes"]),
+        ("spin up the cluster pods", ["kubernetes"], ["kubernetes"]),
+        ("review the merge request", ["github"], ["github"]),
+    ])
+    analyzer = TaskAnalyzer(llm_analyzer=llm, classifier=classifier)
+    
+    result = await analyzer.analyze_cascade(
+        "spin up the pods", FakeSampling(LLM_RESPONSE, delay=5), threshold=1.0, budget_ms=20
+    )
+    
+    assert result.source == "local_deadline"
+    assert "kubernetes" in result.required_services
+    for task in llm._inflight.values():
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_cascade_without_llm_analyzer():
+    """Test the cascade degrades to keyword analysis without an LLM analyzer."""
+    analyzer = TaskAnalyzer()
+    
+    result = await analyzer.analyze_cascade("spin up the thing", FakeSampling(LLM_RESPONSE))
+    
+    assert result.source == "keyword"
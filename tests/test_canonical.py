@@ -0,0 +1,35 @@
+"""Tests for canonical task descriptions."""
+from mcp_switchboard.analyzer.canonical import canonical_key, canonicalize
+
+
+def test_canonicalize_collapses_phrasings():
+    """Test near-identical phrasings share one canonical form."""
+    forms = {
+        canonicalize("DEVOPS-123: Deploy ECS to Production in N. Virginia!"),
+        canonicalize("devops-456 deploy ecs to prod in us-east-1"),
+        canonicalize("  [OPS-9] Deploy ECS to PROD in northern virginia  "),
+    }
+    assert len(forms) == 1
+    assert forms.pop().split() == ["TICKET", "deploy", "ecs", "to", "prod", "in", "us-east-1"]
+
+
+def test_canonicalize_keeps_meaningful_tokens():
+    """Test region codes and words containing digits survive."""
+    assert canonicalize("Restart ec2 and sync s3 in eu-west-1") == (
+        "restart ec2 and sync s3 in eu-west-1"
+    )
+    assert canonicalize("Scale to 12 replicas by 2024-05-01, v1.2.3") == "scale to replicas by v1"
+
+
+def test_canonicalize_maps_synonyms():
+    """Test account and region synonyms map to normalized names."""
+    assert canonicalize("check staging in Tokyo") == "check staging in ap-northeast-1"
+    assert canonicalize("check stg in Tokyo") == canonicalize("check staging in ap-northeast-1")
+    assert canonicalize("production") == "prod"
+
+
+def test_canonical_key_scope():
+    """Test keys differ by scope and ignore rephrasing."""
+    assert canonical_key("Deploy to prod", "m1") == canonical_key("deploy to PRODUCTION!", "m1")
+    assert canonical_key("Deploy to prod", "m1") != canonical_key("Deploy to prod", "m2")
+    assert canonical_key("Deploy to prod") != canonical_key("Deploy to dev")
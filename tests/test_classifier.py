@@ -0,0 +1,120 @@
+"""Tests for the local task classifier."""
+import pytest
+from mcp_switchboard.analyzer.analyzer import TaskAnalyzer
+from mcp_switchboard.analyzer.classifier import TaskClassifier, examples_from_state
+from mcp_switchboard.state.manager import StateManager
+
+
+EXAMPLES = [
+    ("roll out the new build to the cluster", ["kubernetes"], ["kubernetes", "deployment"]),
+    ("scale the cluster pods", ["kubernetes"], ["kubernetes"]),
+    ("restart pods in the cluster", ["kubernetes"], ["kubernetes"]),
+    ("review the open merge request", ["github"], ["github", "pr"]),
+    ("approve the merge request", ["github"], ["github", "pr"]),
+    ("comment on the merge request", ["github"], ["github"]),
+] * 5
+
+
+def test_predicts_trained_vocabulary():
+    """Test the model learns services from descriptions without keywords."""
+    classifier = TaskClassifier.train(EXAMPLES)
+    
+    services, capabilities, probability = classifier.predict("roll the cluster pods")
+    assert services == ["kubernetes"]
+    assert "kubernetes" in capabilities
+    assert probability >= 0.7
+    
+    services, _, _ = classifier.predict("look at that merge request")
+    assert services == ["github"]
+
+
+def test_predicts_nothing_for_unknown_text():
+    """Test unfamiliar descriptions yield no prediction."""
+    classifier = TaskClassifier.train(EXAMPLES)
+    
+    assert classifier.predict("order lunch") == ([], [], 0.0)
+
+
+def test_chunked_training_matches_single_pass():
+    """Test chunk size does not change the fitted model."""
+    single = TaskClassifier.train(EXAMPLES)
+    chunked = TaskClassifier.train(EXAMPLES, chunk_size=4)
+    
+    assert single.labels == chunked.labels
+    assert single.weights == pytest.approx(chunked.weights)
+    assert single.trained_on == chunked.trained_on == len(EXAMPLES)
+
+
+def test_save_and_load(tmp_path):
+    """Test the model round-trips through its serialized form."""
+    classifier = TaskClassifier.train(EXAMPLES, n_features=1024)
+    path = classifier.save(tmp_path / TaskClassifier.FILENAME)
+    
+    loaded = TaskClassifier.load(path)
+    assert loaded.labels == classifier.labels
+    assert loaded.n_features == 1024
+    assert loaded.predict_proba("scale pods") == classifier.predict_proba("scale pods")
+    assert TaskClassifier.load(tmp_path / "missing.npz") is None
+
+
+def test_default_path_next_to_state_db(tmp_path):
+    """Test the model lives next to the state database."""
+    path = TaskClassifier.default_path(str(tmp_path / "state.db"))
+    assert path == tmp_path / TaskClassifier.FILENAME
+
+
+def test_examples_from_state(tmp_path):
+    """Test labels come from stored analyses and the servers that worked."""
+    state = StateManager(str(tmp_path / "state.db"))
+    state.create_task("t1", "triage the incident board", "cursor", "/p")
+    state.update_task(
+        "t1",
+        analysis={"required_services": [], "required_capabilities": []},
+        selection={"selected_servers": [{"server_name": "atlassian-mcp"}]},
+        success=True,
+    )
+    state.create_task("t2", "failed task", "cursor", "/p")
+    state.update_task("t2", analysis={"required_services": ["aws"]}, success=False)
+    
+    examples = list(examples_from_state(state))
+    assert examples == [("triage the incident board", ["jira"], ["confluence", "jira"])]
+
+
+def test_examples_from_state_skips_malformed_rows(tmp_path):
+    """Test rows with undecodable or malformed analyses do not abort training."""
+    import sqlite3
+    
+    state = StateManager(str(tmp_path / "state.db"))
+    for task_id in ("t1", "t2", "t3", "t4"):
+        state.create_task(task_id, "triage the incident board", "cursor", "/p")
+        state.update_task(task_id, analysis={"required_services": ["jira"]}, success=True)
+    
+    conn = sqlite3.connect(str(tmp_path / "state.db"))
+    conn.execute("UPDATE tasks SET analysis_json = '{not json' WHERE id = 't1'")
+    conn.execute("UPDATE tasks SET selection_json = '[]' WHERE id = 't3'")
+    conn.execute("""UPDATE tasks SET analysis_json = '{"required_services": "aws"}' WHERE id = 't4'""")
+    conn.commit()
+    conn.close()
+    
+    examples = list(examples_from_state(state))
+    assert examples == [("triage the incident board", ["jira"], [])]
+
+
+@pytest.mark.asyncio
+async def test_cascade_local_stage():
+    """Test the classifier answers low-confidence tasks before the LLM."""
+    from mcp_switchboard.utils.metrics import get_collector
+    
+    get_collector().clear()
+    classifier = TaskClassifier.train(EXAMPLES)
+    analyzer = TaskAnalyzer(classifier=classifier)
+    
+    result = await analyzer.analyze_cascade("roll out the new build to the cluster in prod")
+    
+    assert result.source == "local"
+    assert result.confidence == classifier.predict("roll out the new build to the cluster in prod")[2]
+    assert result.aws_account == "prod"
+    assert "kubernetes" in result.required_services
+    assert "deployment" in result.required_capabilities
+    assert get_collector().get_counter("cascade_local_hits") == 1
+    assert get_collector().get_stats("cascade_local_ms")["count"] == 1
@@ -0,0 +1,68 @@
+"""Tests for CLI batch mode."""
+import io
+import json
+import pytest
+from mcp_switchboard.cli import run_batch, _process_chunk
+
+
+def test_process_chunk():
+    """Test a chunk yields one result per record, echoing extra fields."""
+    lines = [
+        json.dumps({"id": "T-1", "task_description": "Deploy ECS to prod Tokyo"}),
+        json.dumps("Update Terraform infrastructure"),
+        json.dumps({"id": "T-3", "summary": "missing description"}),
+        "{not json",
+    ]
+    
+    results = [json.loads(line) for line in _process_chunk(list(enumerate(lines, 1)))]
+    
+    assert results[0]["id"] == "T-1"
+    assert results[0]["analysis"]["aws_region"] == "ap-northeast-1"
+    assert "aws-api-mcp" in [s["name"] for s in results[0]["selected_servers"]]
+    assert "terraform" in results[1]["analysis"]["required_services"]
+    assert "error" in results[2]
+    # Invalid records keep their parsed fields and input line number
+    assert results[2]["id"] == "T-3"
+    assert results[2]["line"] == 3
+    assert results[3]["line"] == 4
+    assert "error" in results[3]
+
+
+def test_run_batch_preserves_order():
+    """Test batch results come back in input order across workers."""
+    tasks = [f"DEVOPS-{i}: deploy lambda to prod" for i in range(25)]
+    input_stream = io.StringIO("".join(json.dumps({"id": i, "task_description": t}) + "\n"
+                                       for i, t in enumerate(tasks)))
+    output_stream = io.StringIO()
+    
+    count = run_batch(input_stream, output_stream, workers=2, chunk_size=3)
+    
+    results = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+    assert count == 25
+    assert [r["id"] for r in results] == list(range(25))
+    assert results[7]["analysis"]["jira_ticket"] == "DEVOPS-7"
+
+
+def test_main_batch_files(tmp_path, monkeypatch):
+    """Test --batch reads and writes files, keeping output written before a failure."""
+    import sys
+    from mcp_switchboard import cli
+    
+    input_path = tmp_path / "tickets.jsonl"
+    output_path = tmp_path / "results.jsonl"
+    input_path.write_text(json.dumps({"id": "T-1", "task_description": "Deploy ECS to prod"}) + "\n")
+    monkeypatch.setattr(sys, "argv", [
+        "mcp-switchboard", "--batch", str(input_path), "--output", str(output_path), "--workers", "1",
+    ])
+    
+    assert cli.main() == 0
+    assert json.loads(output_path.read_text())["id"] == "T-1"
+    
+    def failing_batch(input_stream, output_stream, workers, chunk_size):
+        output_stream.write("partial\n")
+        raise RuntimeError("worker died")
+    
+    monkeypatch.setattr(cli, "run_batch", failing_batch)
+    with pytest.raises(RuntimeError):
+        cli.main()
+    assert output_path.read_text() == "partial\n"
@@ -67,3 +67,39 @@ def test_get_config_path():
     path = get_config_path(AgentPlatform.CURSOR)
     assert ".cursor" in str(path)
     assert "mcp.json" in str(path)
+
+
+def test_server_registry_version():
+    """Test registry version tracks content changes."""
+    registry = ServerRegistry()
+    assert registry.version == ServerRegistry().version
+    
+    original = registry.version
+    registry.add_server("test-mcp", {"capabilities": ["test"]})
+    assert registry.version != original
+    
+    assert registry.remove_server("test-mcp")
+    assert registry.version == original
+    assert not registry.remove_server("test-mcp")
+
+
+def test_server_registry_load_file(tmp_path):
+    """Test merging an additional registry file."""
+    extra = tmp_path / "registry.yaml"
+    extra.write_text("servers:\n  internal-mcp:\n    capabilities: [\"internal\"]\n")
+    
+    registry = ServerRegistry()
+    registry.load_file(extra)
+    assert registry.get_servers_by_capability("internal") == ["internal-mcp"]
+
+
+def test_server_registry_indexes():
+    """Test the capability index follows registry changes."""
+    registry = ServerRegistry()
+    assert registry.get_servers_by_capability("unknown") == []
+    
+    registry.add_server("aws-extra-mcp", {"capabilities": ["aws"], "confidence_keywords": ["ec2"]})
+    assert registry.get_servers_by_capability("aws") == ["aws-api-mcp", "aws-extra-mcp"]
+    
+    registry.remove_server("aws-extra-mcp")
+    assert registry.get_servers_by_capability("aws") == ["aws-api-mcp"]
@@ -91,3 +91,52 @@ def test_credential_manager_token_key():
     }
     key = manager._get_token_key(github_config)
     assert key == "github:testuser"
+
+
+@pytest.mark.asyncio
+async def test_credential_manager_shared_aws_profile():
+    """Test instances sharing an AWS profile renew it once."""
+    manager = CredentialManager()
+    renewed = []
+    
+    async def fake_renew(profile):
+        renewed.append(profile)
+        return True
+    
+    manager.aws_sso.renew_if_needed = fake_renew
+    
+    configs = [
+        {"name": "aws-api-mcp-prod-ap-northeast-1", "authentication_type": "aws_sso",
+         "env": {"AWS_PROFILE": "prod"}},
+        {"name": "aws-api-mcp-prod-us-east-1", "authentication_type": "aws_sso",
+         "env": {"AWS_PROFILE": "prod"}},
+        {"name": "test-server", "authentication_type": "none"},
+    ]
+    
+    results = await manager.prepare_credentials(configs)
+    assert renewed == ["prod"]
+    assert all(results.values())
+    assert list(results) == [c["name"] for c in configs]
+
+
+@pytest.mark.asyncio
+async def test_credential_manager_renewal_failure_per_profile():
+    """Test a renewal that raises fails only its own profile."""
+    manager = CredentialManager()
+    
+    async def fake_renew(profile):
+        if profile == "dev":
+            raise RuntimeError("sso portal unreachable")
+        return True
+    
+    manager.aws_sso.renew_if_needed = fake_renew
+    
+    configs = [
+        {"name": "aws-dev", "authentication_type": "aws_sso", "env": {"AWS_PROFILE": "dev"}},
+        {"name": "aws-prod", "authentication_type": "aws_sso", "env": {"AWS_PROFILE": "prod"}},
+    ]
+    
+    results = await manager.prepare_credentials(configs)
+    assert results == {"aws-dev": False, "aws-prod": True}
+    assert list(manager.renewal_errors) == ["dev"]
+    assert isinstance(manager.renewal_errors["dev"], RuntimeError)
@@ -0,0 +1,131 @@
+"""Tests for the task history nearest-neighbour index."""
+import pytest
+from mcp_switchboard.analyzer.analyzer import TaskAnalyzer
+from mcp_switchboard.config.registry import ServerRegistry
+from mcp_switchboard.selector.history_index import TaskHistoryIndex
+from mcp_switchboard.selector.selector import ServerSelector
+from mcp_switchboard.state.manager import StateManager
+
+
+@pytest.fixture
+def state(tmp_path):
+    """State database with a few completed tasks."""
+    manager = StateManager(str(tmp_path / "state.db"))
+    tasks = [
+        ("Deploy ECS to prod in Tokyo DEVOPS-1", ["aws-api-mcp", "atlassian-mcp"]),
+        ("Rotate IAM keys for staging", ["aws-api-mcp"]),
+        ("Update terraform modules for the vpc", ["terraform-registry-mcp"]),
+    ]
+    for i, (description, servers) in enumerate(tasks):
+        manager.create_task(f"task-{i}", description, "cursor", "/tmp")
+        manager.update_task(
+            f"task-{i}",
+            selection={"selected_servers": [
+                {"server_name": name, "confidence": 0.9} for name in servers
+            ]},
+            success=True,
+        )
+    manager.create_task("failed", "Deploy ECS to dev", "cursor", "/tmp")
+    manager.update_task("failed", success=False)
+    return manager
+
+
+def make_index(tmp_path, state):
+    return TaskHistoryIndex(tmp_path / "index", state_manager=state, sync_interval=3600)
+
+
+def test_query_ranks_similar_tasks(tmp_path, state):
+    """Test rephrasings of a past task are nearest, failures are not indexed."""
+    index = make_index(tmp_path, state)
+    assert index.sync() == 3
+    
+    matches = index.query("deploy ecs to production in tokyo OPS-7", k=2)
+    assert len(matches) == 2
+    assert state.get_tasks_by_rowid([matches[0].rowid])[matches[0].rowid]["id"] == "task-0"
+    assert matches[0].distance == pytest.approx(0.0, abs=1e-6)
+    assert matches[1].distance > 0.5
+    
+    assert index.query("", k=2) == []
+
+
+def test_sync_is_incremental_and_persistent(tmp_path, state):
+    """Test only new completions are added and the index survives reopening."""
+    index = make_index(tmp_path, state)
+    index.sync()
+    assert index.sync() == 0
+    
+    state.create_task("task-new", "Check github actions on main", "cursor", "/tmp")
+    state.update_task("task-new", success=True)
+    assert index.sync() == 1
+    
+    reopened = TaskHistoryIndex.load(tmp_path / "index", state_manager=state)
+    assert len(reopened) == 4
+    assert reopened.sync() == 0
+    assert reopened.query("check github actions on main", k=1)[0].distance < 1e-6
+
+
+def test_index_grows_past_capacity(tmp_path, state):
+    """Test appends beyond the allocated rows grow the data files."""
+    index = make_index(tmp_path, state)
+    capacity = index.capacity
+    index.add((rowid, f"task about service {rowid}") for rowid in range(capacity + 10))
+    
+    assert len(index) == capacity + 10
+    assert index.capacity >= capacity + 10
+    assert TaskHistoryIndex.load(tmp_path / "index", state_manager=state).count == capacity + 10
+
+
+def test_load_missing_index(tmp_path, state):
+    """Test loading returns None before the index is built."""
+    assert TaskHistoryIndex.load(tmp_path / "missing", state_manager=state) is None
+
+
+def test_selector_reuses_past_selection(tmp_path, state):
+    """Test a near-identical past success supplies the selection."""
+    index = TaskHistoryIndex.build(tmp_path / "index", state_manager=state)
+    selector = ServerSelector(ServerRegistry(), use_learning=False, history_index=index)
+    description = "Rotate IAM keys for staging!"
+    analysis = TaskAnalyzer().analyze(description)
+    
+    result = selector.select(analysis, description)
+    assert [s.server_name for s in result.selected_servers] == ["aws-api-mcp"]
+    assert result.selected_servers[0].confidence == 0.9
+    assert result.decision_report["history_match"]["task_id"] == "task-1"
+    assert result.decision_report["history_match"]["distance"] < 1e-6
+    
+    # Unrelated tasks are scored as usual
+    description = "Review github pull request"
+    result = selector.select(TaskAnalyzer().analyze(description), description)
+    assert "history_match" not in result.decision_report
+
+
+def test_default_path_follows_state_database(tmp_path, state):
+    """Test the index lives next to the state manager's database."""
+    index = TaskHistoryIndex.build(state_manager=state)
+    assert index.path == tmp_path / TaskHistoryIndex.DIRNAME
+    assert len(TaskHistoryIndex.load(state_manager=state)) == 3
+
+
+def test_sync_without_new_tasks_skips_write(tmp_path, state):
+    """Test an idle sync leaves the metadata file alone."""
+    index = TaskHistoryIndex.build(tmp_path / "index", state_manager=state)
+    index._write_meta = lambda: pytest.fail("metadata rewritten without new rows")
+    assert index.sync() == 0
+
+
+def test_selector_ignores_stale_rowid(tmp_path, state):
+    """Test a row whose description no longer matches is not reused."""
+    import sqlite3
+    
+    index = TaskHistoryIndex.build(tmp_path / "index", state_manager=state)
+    selector = ServerSelector(ServerRegistry(), use_learning=False, history_index=index)
+    
+    # As if the index had been built from another database
+    conn = sqlite3.connect(str(state.db_path))
+    conn.execute("UPDATE tasks SET task_description = 'Update terraform modules' WHERE id = 'task-1'")
+    conn.commit()
+    conn.close()
+    
+    description = "Rotate IAM keys for staging"
+    result = selector.select(TaskAnalyzer().analyze(description), description)
+    assert "history_match" not in result.decision_report
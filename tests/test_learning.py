@@ -0,0 +1,99 @@
+"""Tests for historical pattern learning."""
+import pytest
+from mcp_switchboard.analyzer.analyzer import TaskAnalyzer
+from mcp_switchboard.config.registry import ServerRegistry
+from mcp_switchboard.selector.learning import PatternLearner, task_fingerprint
+from mcp_switchboard.selector.selector import ServerSelector
+from mcp_switchboard.state.manager import StateManager
+
+
+def complete(manager, task_id, account, services, servers, success=True):
+    """Record a completed task with its analysis and selected servers."""
+    manager.create_task(task_id, f"Task {task_id}", "cursor", "/tmp")
+    manager.update_task(
+        task_id,
+        analysis={"aws_account": account, "required_services": services},
+        selection={"selected_servers": [{"server_name": s, "confidence": 0.9} for s in servers]},
+        success=success,
+    )
+
+
+@pytest.fixture
+def state(tmp_path):
+    """State database with prod ECS history."""
+    manager = StateManager(str(tmp_path / "state.db"))
+    complete(manager, "t1", "prod", ["aws"], ["aws-api-mcp", "github-mcp"])
+    complete(manager, "t2", "prod", ["aws"], ["aws-api-mcp"])
+    complete(manager, "t3", "dev", ["aws"], ["terraform-registry-mcp"])
+    complete(manager, "t4", "prod", ["aws"], ["atlassian-mcp"], success=False)
+    return manager
+
+
+def test_counts_successful_tasks_by_fingerprint(state):
+    """Test shares and boosts come from successful tasks with the same fingerprint."""
+    learner = PatternLearner(state)
+    fingerprint = task_fingerprint("prod", ["aws"])
+    
+    assert learner.server_shares(fingerprint) == {"aws-api-mcp": 1.0, "github-mcp": 0.5}
+    assert learner.boost_confidence("github-mcp", 0.6, fingerprint) == pytest.approx(0.7)
+    assert learner.boost_confidence("atlassian-mcp", 0.6, fingerprint) == 0.6
+    assert learner.boost_confidence("aws-api-mcp", 0.9, fingerprint) == 1.0
+    assert learner.get_recommendations(fingerprint, ["aws-api-mcp"]) == [
+        {"server_name": "github-mcp", "confidence": 0.5, "usage_count": 1}
+    ]
+    assert learner.server_shares(task_fingerprint("staging", ["aws"])) == {}
+
+
+def test_history_is_read_once_then_incrementally(state):
+    """Test only tasks completed since the last sync are read, and only when due."""
+    learner = PatternLearner(state, sync_interval=3600)
+    fingerprint = task_fingerprint("prod", ["aws"])
+    reads = []
+    stream = state.iter_completed_successes
+    state.iter_completed_successes = lambda after: reads.append(after) or stream(after)
+    
+    for _ in range(100):
+        learner.boost_confidence("aws-api-mcp", 0.6, fingerprint)
+    assert len(reads) == 1
+    
+    complete(state, "t5", "prod", ["aws"], ["github-mcp"])
+    assert learner.sync() == 1
+    assert reads[-1] != ("", 0)
+    assert learner.server_shares(fingerprint) == {"aws-api-mcp": 2 / 3, "github-mcp": 2 / 3}
+
+
+def test_sync_skips_malformed_rows(state):
+    """Test rows with malformed selections or services are skipped, not retried."""
+    import sqlite3
+    
+    learner = PatternLearner(state)
+    fingerprint = task_fingerprint("prod", ["aws"])
+    assert learner.sync() == 3
+    
+    complete(state, "t5", "prod", ["aws"], ["github-mcp"])
+    complete(state, "t6", "prod", ["aws"], ["github-mcp"])
+    complete(state, "t7", "prod", ["aws"], ["github-mcp"])
+    conn = sqlite3.connect(str(state.db_path))
+    conn.execute("UPDATE tasks SET selection_json = '[]' WHERE id = 't5'")
+    conn.execute("""UPDATE tasks SET analysis_json = '{"aws_account": "prod", "required_services": "aws"}' WHERE id = 't6'""")
+    conn.commit()
+    conn.close()
+    
+    assert learner.sync() == 1
+    assert learner.sync() == 0
+    assert learner.server_shares(fingerprint) == {"aws-api-mcp": 2 / 3, "github-mcp": 2 / 3}
+
+
+def test_selector_boosts_from_shared_learner(state):
+    """Test selection boosts servers from learned patterns."""
+    learner = PatternLearner(state)
+    selector = ServerSelector(ServerRegistry(), learner=learner)
+    analysis = TaskAnalyzer().analyze("Deploy ECS to prod")
+    assert task_fingerprint(analysis.aws_account, analysis.required_services) == "prod:aws"
+    
+    result = selector.select(analysis)
+    confidences = {m.server_name: m.confidence for m in result.selected_servers + result.rejected_servers}
+    
+    assert confidences["aws-api-mcp"] == 1.0
+    assert confidences["github-mcp"] == pytest.approx(0.1)
+    assert "terraform-registry-mcp" not in confidences
@@ -98,3 +98,331 @@ def test_analyze_hybrid_merges_services():
     assert "monitoring" in result.required_services
     assert result.source == "hybrid"
     assert result.confidence == 0.9
+
+
+class FakeSampling:
+    """Sampling function stub that counts calls."""
+    
+    def __init__(self, response: str):
+        self.response = response
+        self.calls = 0
+    
+    async def __call__(self, **kwargs):
+        from types import SimpleNamespace
+        self.calls += 1
+        return SimpleNamespace(content=SimpleNamespace(text=self.response))
+
+
+LLM_RESPONSE = (
+    '{"aws_account": "prod", "aws_region": "ap-northeast-1", "jira_ticket": "DEVOPS-1", '
+    '"required_services": ["aws"], "required_capabilities": ["aws"], "confidence": 0.95}'
+)
+
+
+@pytest.mark.asyncio
+async def test_analyze_with_llm_uses_cache(tmp_path):
+    """Test repeated descriptions are served from the persistent cache."""
+    from mcp_switchboard.analyzer.llm_cache import LLMAnalysisCache
+    
+    cache = LLMAnalysisCache(db_path=str(tmp_path / "cache.db"))
+    analyzer = LLMTaskAnalyzer(cache=cache)
+    sampling = FakeSampling(LLM_RESPONSE)
+    
+    first = await analyzer.analyze_with_llm("Deploy ECS to prod  Tokyo", sampling)
+    second = await analyzer.analyze_with_llm("deploy ecs to prod tokyo", sampling)
+    
+    assert sampling.calls == 1
+    assert second == first
+    assert second.source == "llm"
+    
+    # A different model must not reuse the entry
+    other = LLMTaskAnalyzer(model="other-model", cache=cache)
+    await other.analyze_with_llm("Deploy ECS to prod Tokyo", sampling)
+    assert sampling.calls == 2
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_analyze_with_llm_cache_shares_rephrasings(tmp_path):
+    """Test canonically equal descriptions share an entry but keep their ticket."""
+    from mcp_switchboard.analyzer.llm_cache import LLMAnalysisCache
+    
+    cache = LLMAnalysisCache(db_path=str(tmp_path / "cache.db"))
+    analyzer = LLMTaskAnalyzer(cache=cache)
+    sampling = FakeSampling(LLM_RESPONSE)
+    
+    await analyzer.analyze_with_llm("DEVOPS-1: deploy ECS to production in Tokyo", sampling)
+    result = await analyzer.analyze_with_llm("OPS-42 deploy ecs to prod in ap-northeast-1!", sampling)
+    
+    assert sampling.calls == 1
+    assert result.jira_ticket == "OPS-42"
+    assert result.jira_project == "OPS"
+    assert result.aws_account == "prod"
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_analyze_with_llm_does_not_cache_fallback(tmp_path):
+    """Test keyword fallbacks are not cached."""
+    from mcp_switchboard.analyzer.llm_cache import LLMAnalysisCache
+    
+    cache = LLMAnalysisCache(db_path=str(tmp_path / "cache.db"))
+    analyzer = LLMTaskAnalyzer(cache=cache)
+    sampling = FakeSampling("not json")
+    
+    await analyzer.analyze_with_llm("Deploy ECS to prod", sampling)
+    await analyzer.analyze_with_llm("Deploy ECS to prod", sampling)
+    
+    assert sampling.calls == 2
+    assert cache.get_stats()["total_entries"] == 0
+    cache.close()
+
+
+def test_llm_cache_lru_and_ttl(tmp_path):
+    """Test LRU eviction and TTL expiry."""
+    from mcp_switchboard.analyzer.llm_cache import LLMAnalysisCache
+    
+    cache = LLMAnalysisCache(db_path=str(tmp_path / "cache.db"), max_entries=2)
+    cache.set("a", ParsedTask(aws_account="prod"))
+    cache.set("b", ParsedTask(aws_account="dev"))
+    assert cache.get("a") is not None  # "a" is now most recently used
+    cache.set("c", ParsedTask(aws_account="uat"))
+    
+    assert cache.get("b") is None
+    assert cache.get("a").aws_account == "prod"
+    assert cache.get("c").aws_account == "uat"
+    
+    cache.ttl_seconds = -1
+    assert cache.get("a") is None
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_analyze_with_llm_coalesces_concurrent_requests():
+    """Test concurrent identical analyses share one sampling call."""
+    import asyncio
+    
+    class SlowSampling(FakeSampling):
+        async def __call__(self, **kwargs):
+            await asyncio.sleep(0.05)
+            return await super().__call__(**kwargs)
+    
+    analyzer = LLMTaskAnalyzer()
+    sampling = SlowSampling(LLM_RESPONSE)
+    
+    results = await asyncio.gather(
+        analyzer.analyze_with_llm("Deploy ECS to prod Tokyo", sampling),
+        analyzer.analyze_with_llm("deploy ECS to prod   tokyo", sampling),
+        analyzer.analyze_with_llm("Deploy ECS to prod Tokyo", sampling),
+        analyzer.analyze_with_llm("Fix Lambda in dev", sampling),
+    )
+    
+    assert sampling.calls == 2
+    assert results[0] == results[1] == results[2]
+    assert results[0] is not results[1]
+    assert analyzer._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_analyze_hedged_merges_fast_llm():
+    """Test an LLM answer within budget is merged with keyword results."""
+    analyzer = LLMTaskAnalyzer()
+    sampling = FakeSampling(LLM_RESPONSE)
+    
+    result = await analyzer.analyze_hedged(
+        "Deploy ECS to prod Tokyo and Virginia", sampling, budget_ms=1000
+    )
+    
+    assert result.source == "hybrid"
+    assert result.jira_ticket == "DEVOPS-1"
+    assert result.aws_regions == ["ap-northeast-1", "us-east-1"]
+
+
+@pytest.mark.asyncio
+async def test_analyze_hedged_returns_keyword_at_deadline():
+    """Test the keyword result is returned once the budget expires."""
+    import asyncio
+    import time
+    
+    class HangingSampling(FakeSampling):
+        async def __call__(self, **kwargs):
+            await asyncio.sleep(5)
+            return await super().__call__(**kwargs)
+    
+    analyzer = LLMTaskAnalyzer()
+    start = time.perf_counter()
+    result = await analyzer.analyze_hedged(
+        "Deploy ECS to prod Tokyo", HangingSampling(LLM_RESPONSE), budget_ms=50
+    )
+    elapsed = time.perf_counter() - start
+    
+    assert result.source == "keyword_deadline"
+    assert result.aws_account == "prod"
+    assert "aws" in result.required_services
+    assert elapsed < 1
+    
+    for task in analyzer._inflight.values():
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_analyze_hedged_llm_failure():
+    """Test an LLM failure within budget yields the keyword result."""
+    analyzer = LLMTaskAnalyzer()
+    
+    result = await analyzer.analyze_hedged(
+        "Deploy ECS to prod Tokyo", FakeSampling("no json here"), budget_ms=1000
+    )
+    
+    assert result.source == "keyword_fallback"
+    assert result.aws_region == "ap-northeast-1"
+
+
+class BatchSampling(FakeSampling):
+    """Sampling stub answering batch prompts with a per-index JSON array."""
+    
+    def __init__(self, answers):
+        super().__init__("")
+        self.answers = answers
+        self.prompts = []
+    
+    async def __call__(self, **kwargs):
+        import json
+        import re
+        prompt = kwargs["messages"][0].content.text
+        self.prompts.append(prompt)
+        indices = [int(i) for i in re.findall(r"^(\d+)\. ", prompt, re.MULTILINE)]
+        self.response = json.dumps([
+            dict(self.answers[i], index=i) for i in indices if i in self.answers
+        ])
+        return await super().__call__(**kwargs)
+
+
+BATCH_ANSWER = {
+    "aws_account": "prod", "aws_region": "ap-northeast-1", "jira_ticket": None,
+    "required_services": ["aws"], "required_capabilities": ["aws"], "confidence": 0.9,
+}
+
+
+@pytest.mark.asyncio
+async def test_analyze_many_with_llm_single_request():
+    """Test many tasks are analyzed in one sampling request, in input order."""
+    analyzer = LLMTaskAnalyzer()
+    sampling = BatchSampling({0: BATCH_ANSWER, 1: dict(BATCH_ANSWER, aws_account="dev")})
+    
+    results = await analyzer.analyze_many_with_llm(
+        ["deploy api", "fix lambda", "deploy api"], sampling
+    )
+    
+    assert sampling.calls == 1
+    assert [r.aws_account for r in results] == ["prod", "dev", "prod"]
+    assert all(r.source == "llm" for r in results)
+    assert results[0] is not results[2]
+
+
+@pytest.mark.asyncio
+async def test_analyze_many_with_llm_per_item_fallback():
+    """Test missing or malformed items fall back to keywords on their own."""
+    analyzer = LLMTaskAnalyzer()
+    sampling = BatchSampling({
+        0: BATCH_ANSWER,
+        1: dict(BATCH_ANSWER, required_services="not-a-list"),
+    })
+    
+    results = await analyzer.analyze_many_with_llm(
+        ["deploy api", "fix lambda in dev", "update ecs in uat"], sampling
+    )
+    
+    assert results[0].source == "llm"
+    assert results[1].source == "keyword_fallback"
+    assert results[1].aws_account == "dev"
+    assert results[2].source == "keyword_fallback"
+    assert results[2].aws_account == "uat"
+
+
+@pytest.mark.asyncio
+async def test_analyze_many_with_llm_batches_and_cache(tmp_path):
+    """Test batch_size splits requests and cached tasks are not re-sent."""
+    from mcp_switchboard.analyzer.llm_cache import LLMAnalysisCache
+    
+    cache = LLMAnalysisCache(db_path=str(tmp_path / "cache.db"))
+    analyzer = LLMTaskAnalyzer(cache=cache)
+    sampling = BatchSampling({i: BATCH_ANSWER for i in range(5)})
+    descriptions = ["deploy api", "scale workers", "rotate keys", "audit logs", "patch hosts"]
+    
+    await analyzer.analyze_many_with_llm(descriptions, sampling, batch_size=2)
+    assert sampling.calls == 3
+    
+    results = await analyzer.analyze_many_with_llm(descriptions, sampling, batch_size=2)
+    assert sampling.calls == 3
+    assert all(r.source == "llm" for r in results)
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_analyze_many_with_llm_request_failure(capsys):
+    """Test a failed batch request falls back to keywords for every task."""
+    class FailingSampling:
+        async def __call__(self, **kwargs):
+            raise RuntimeError("sampling unavailable")
+    
+    analyzer = LLMTaskAnalyzer()
+    results = await analyzer.analyze_many_with_llm(["deploy to prod"], FailingSampling())
+    
+    assert results[0].source == "keyword_fallback"
+    assert results[0].aws_account == "prod"
+    # stdout carries the stdio transport; failures are logged to stderr
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.asyncio
+async def test_analyze_with_llm_rate_limited_takes_keyword_path(tmp_path):
+    """Test requests over the sampling limit are keyword parsed, not queued."""
+    import asyncio
+    from mcp_switchboard.analyzer.llm_cache import LLMAnalysisCache
+    from mcp_switchboard.analyzer.sampling_limiter import SamplingLimiter
+    
+    class SlowSampling(FakeSampling):
+        async def __call__(self, **kwargs):
+            await asyncio.sleep(0.2)
+            return await super().__call__(**kwargs)
+    
+    cache = LLMAnalysisCache(db_path=str(tmp_path / "llm_cache.db"))
+    analyzer = LLMTaskAnalyzer(
+        cache=cache,
+        limiter=SamplingLimiter(max_concurrent=1, rate=1000, burst=100, max_wait=0.01),
+    )
+    sampling = SlowSampling(LLM_RESPONSE)
+    
+    first, second = await asyncio.gather(
+        analyzer.analyze_with_llm("Deploy ECS to prod Tokyo", sampling),
+        analyzer.analyze_with_llm("Fix Lambda in dev Virginia", sampling),
+    )
+    
+    assert sampling.calls == 1
+    assert first.source == "llm"
+    assert second.source == "keyword_rate_limited"
+    assert second.aws_account == "dev"
+    # Rate-limited results are not cached, so the next request asks the LLM
+    assert (await analyzer.analyze_with_llm("Fix Lambda in dev Virginia", sampling)).source == "llm"
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_analyze_many_with_llm_rate_limited_batches():
+    """Test batches over the sampling limit fall back to keyword parsing."""
+    from mcp_switchboard.analyzer.sampling_limiter import SamplingLimiter
+    
+    analyzer = LLMTaskAnalyzer(
+        limiter=SamplingLimiter(max_concurrent=1, rate=1, burst=1, max_wait=0.01)
+    )
+    sampling = BatchSampling({0: BATCH_ANSWER})
+    
+    results = await analyzer.analyze_many_with_llm(
+        ["Deploy ECS to prod Tokyo", "Fix Lambda in dev", "Rotate keys in staging"],
+        sampling,
+        batch_size=1,
+    )
+    
+    assert sampling.calls == 1
+    assert [r.source for r in results] == ["llm", "keyword_rate_limited", "keyword_rate_limited"]
@@ -8,15 +8,17 @@ async def test_list_tools():
     """Test tool listing."""
     tools = await list_tools()
     
-    assert len(tools) == 7
+    assert len(tools) == 9
     tool_names = [t.name for t in tools]
     assert "setup_mcp_servers" in tool_names
     assert "analyze_task" in tool_names
+    assert "analyze_tasks_batch" in tool_names
     assert "select_servers" in tool_names
     assert "manage_servers" in tool_names
     assert "rollback_configuration" in tool_names
     assert "list_snapshots" in tool_names
     assert "get_metrics" in tool_names
+    assert "search_task_history" in tool_names
 
 
 @pytest.mark.asyncio
@@ -38,6 +40,70 @@ async def test_analyze_task_tool():
     assert data["confidence"] > 0.8
 
 
+@pytest.mark.asyncio
+async def test_analyze_task_tool_session():
+    """Test analyze_task with a session_id parses growing prefixes."""
+    import json
+    from mcp_switchboard import server
+    
+    results = []
+    for text in ("Deploy ECS to pr", "Deploy ECS to prod", "Deploy ECS to prod Tokyo"):
+        result = await call_tool("analyze_task", {"task_description": text, "session_id": "typing-1"})
+        results.append(json.loads(result[0].text))
+    
+    assert results[0]["aws_account"] is None
+    assert results[1]["aws_account"] == "prod"
+    assert results[2]["aws_region"] == "ap-northeast-1"
+    assert "typing-1" in server._parse_sessions
+
+
+@pytest.mark.asyncio
+async def test_search_task_history_tool(tmp_path, monkeypatch):
+    """Test search_task_history returns ranked pages with selections."""
+    import json
+    from mcp_switchboard import server
+    from mcp_switchboard.state.manager import StateManager
+    
+    manager = StateManager(str(tmp_path / "state.db"))
+    for i in range(3):
+        manager.create_task(f"task-{i}", f"Migrate DynamoDB table {i}", "cursor", "/tmp")
+        manager.update_task(f"task-{i}", selection={"servers": ["aws-api-mcp"]}, success=True)
+    monkeypatch.setattr(server, "state_manager", manager)
+    
+    result = await call_tool("search_task_history", {"query": "dynamodb migration", "limit": 2})
+    data = json.loads(result[0].text)
+    assert data["total"] == 3
+    assert len(data["results"]) == 2
+    assert data["next_offset"] == 2
+    assert data["results"][0]["selected_servers"] == ["aws-api-mcp"]
+    assert data["results"][0]["success"] is True
+    
+    result = await call_tool("search_task_history", {"query": "dynamodb", "offset": 2})
+    data = json.loads(result[0].text)
+    assert len(data["results"]) == 1
+    assert data["next_offset"] is None
+
+
+@pytest.mark.asyncio
+async def test_analyze_tasks_batch_tool():
+    """Test analyze_tasks_batch tool."""
+    result = await call_tool(
+        "analyze_tasks_batch",
+        {"task_descriptions": [
+            "Deploy ECS to prod Tokyo using DEVOPS-123",
+            "Update Terraform infrastructure",
+            "Deploy ECS to prod Tokyo using DEVOPS-123",
+        ]}
+    )
+    
+    import json
+    data = json.loads(result[0].text)
+    assert data["count"] == 3
+    assert data["analyses"][0]["jira_ticket"] == "DEVOPS-123"
+    assert "terraform" in data["analyses"][1]["required_services"]
+    assert data["analyses"][2] == data["analyses"][0]
+
+
 @pytest.mark.asyncio
 async def test_select_servers_tool():
     """Test select_servers tool."""
@@ -62,6 +128,22 @@ async def test_select_servers_tool():
     assert "aws-api-mcp" in server_names
 
 
+@pytest.mark.asyncio
+async def test_select_servers_tool_pagination():
+    """Test select_servers returns pages of the ranking with a cursor."""
+    import json
+    arguments = {"task_description": "Deploy ECS to prod using DEVOPS-123", "top_k": 1}
+    
+    first = json.loads((await call_tool("select_servers", arguments))[0].text)
+    second = json.loads((await call_tool("select_servers", dict(arguments, cursor=first["next_cursor"])))[0].text)
+    
+    assert first["total_matches"] == 2
+    assert first["next_cursor"] == 1
+    assert second["next_cursor"] is None
+    names = [s["name"] for page in (first, second) for s in page["selected_servers"]]
+    assert sorted(names) == ["atlassian-mcp", "aws-api-mcp"]
+
+
 @pytest.mark.asyncio
 async def test_setup_mcp_servers_dry_run():
     """Test full setup in dry-run mode."""
@@ -85,6 +167,25 @@ async def test_setup_mcp_servers_dry_run():
     assert "Dry-run complete" in data["status"]
 
 
+@pytest.mark.asyncio
+async def test_setup_mcp_servers_multi_region():
+    """Test one AWS server instance per account/region pair."""
+    result = await call_tool(
+        "setup_mcp_servers",
+        {
+            "task_description": "Compare ECS in prod Tokyo and prod Virginia",
+            "agent_type": "cursor",
+            "dry_run": True
+        }
+    )
+    
+    import json
+    data = json.loads(result[0].text)
+    assert data["analysis"]["aws_regions"] == ["ap-northeast-1", "us-east-1"]
+    assert "aws-api-mcp-prod-ap-northeast-1" in data["server_instances"]
+    assert "aws-api-mcp-prod-us-east-1" in data["server_instances"]
+
+
 @pytest.mark.asyncio
 async def test_unknown_tool():
     """Test error handling for unknown tool."""
@@ -76,3 +76,167 @@ def test_parse_minimal_task():
     assert result.aws_region is None
     assert result.jira_ticket is None
     assert len(result.mentioned_services) == 0
+
+
+def test_parse_respects_word_boundaries():
+    """Test short keywords do not match inside longer words."""
+    parser = TaskParser()
+    
+    result = parser.parse("Deploy to prod")
+    assert "github" not in result.mentioned_services
+    
+    result = parser.parse("Write an artful summary")
+    assert "terraform" not in result.mentioned_services
+    
+    result = parser.parse("Open a PR for the tf module")
+    assert "github" in result.mentioned_services
+    assert "terraform" in result.mentioned_services
+
+
+def test_parse_matches_plurals_and_hyphens():
+    """Test plural and hyphenated forms of keywords still match."""
+    parser = TaskParser()
+    
+    for text, service in [
+        ("Archive stale repos", "github"),
+        ("Archive stale repositories", "github"),
+        ("Close the tickets", "jira"),
+        ("Triage open bugs", "jira"),
+        ("Merge the pull-request", "github"),
+    ]:
+        assert service in parser.parse(text).mentioned_services, text
+    
+    assert "jira" in parser.session().update("Triage open bugs").mentioned_services
+    assert "github" not in parser.parse("Process the payment").mentioned_services
+
+
+def test_parse_account_priority():
+    """Test account aliases resolve in priority order, not text order."""
+    parser = TaskParser()
+    
+    result = parser.parse("Test the production rollout")
+    assert result.aws_account == "prod"
+
+
+def test_keyword_matcher_multi_token():
+    """Test matcher handles multi-word and punctuated keywords in one pass."""
+    from mcp_switchboard.analyzer.matcher import KeywordMatcher
+    
+    matcher = KeywordMatcher([
+        ("pull request", "github"),
+        ("request", "http"),
+        ("devops-", "jira"),
+        ("eu-west-1", "region"),
+    ])
+    
+    hits = matcher.find_all("Review pull  request for DEVOPS-12 in eu-west-1")
+    assert hits == ["github", "http", "jira", "region"]
+    assert matcher.find("requested") == set()
+    assert matcher.find_all("Merge pull-requests") == ["github", "http"]
+    assert len(matcher) == 4
+
+
+def test_parse_services_from_registry():
+    """Test service keywords come from the server registry."""
+    from mcp_switchboard.config.registry import ServerRegistry
+    
+    registry = ServerRegistry()
+    parser = TaskParser(registry)
+    assert "kubernetes" not in parser.parse("Scale the k8s deployment").mentioned_services
+    
+    registry.add_server("kubernetes-mcp", {
+        "capabilities": ["kubernetes"],
+        "confidence_keywords": ["k8s", "kubectl"],
+    })
+    result = parser.parse("Scale the k8s deployment")
+    assert "kubernetes" in result.mentioned_services
+
+
+def test_parse_services_match_builtin_table():
+    """Test registry keywords keep the services the built-in table gave."""
+    parser = TaskParser()
+    
+    assert parser.parse("Review PRs on git").mentioned_services == ["github"]
+    assert parser.parse("Review GitHub PR #456").mentioned_services == ["github"]
+    assert parser.parse("Update Terraform infrastructure").mentioned_services == ["terraform"]
+    assert parser.parse("Move the workload to the cloud").mentioned_services == ["aws"]
+    # A capability named by a keyword does not pull in the server's other services
+    assert parser.parse("Create confluence page").mentioned_services == ["confluence"]
+
+
+def test_dictionary_cached_by_registry_version():
+    """Test the compiled dictionary is rebuilt only when the registry changes."""
+    from mcp_switchboard.config.registry import ServerRegistry
+    
+    first = TaskParser.compile_dictionary(ServerRegistry())
+    assert TaskParser.compile_dictionary(ServerRegistry()) is first
+    
+    registry = ServerRegistry()
+    registry.add_server("extra-mcp", {"capabilities": ["extra"]})
+    assert TaskParser.compile_dictionary(registry) is not first
+
+
+def test_parse_multiple_regions_and_accounts():
+    """Test every mentioned account and region is extracted."""
+    parser = TaskParser()
+    
+    result = parser.parse("Compare prod Tokyo and staging Virginia failover")
+    assert result.aws_accounts == ["prod", "staging"]
+    assert result.aws_regions == ["ap-northeast-1", "us-east-1"]
+    assert result.aws_account == "prod"
+    assert result.aws_region == "ap-northeast-1"
+
+
+def test_parse_literal_region_codes():
+    """Test literal region codes are recognized and not taken for tickets."""
+    parser = TaskParser()
+    
+    result = parser.parse("Replicate the bucket from eu-west-1 to São Paulo")
+    assert result.aws_regions == ["eu-west-1", "sa-east-1"]
+    assert result.jira_ticket is None
+    
+    result = parser.parse("Fix DEVOPS-9 in ap-southeast-2")
+    assert result.jira_ticket == "DEVOPS-9"
+    assert result.aws_region == "ap-southeast-2"
+
+
+def test_parse_session_matches_full_parse():
+    """Test incremental parsing of every prefix matches a full parse."""
+    parser = TaskParser()
+    session = parser.session()
+    text = "Deploy ECS to prod Hong Kong and eu-west-1 for DEVOPS-123, then review the github PR"
+    
+    for i in range(1, len(text) + 1):
+        assert session.update(text[:i]) == parser.scan(text[:i])
+
+
+def test_parse_session_scans_only_appended_text():
+    """Test completed tokens are kept and a trailing word stays provisional."""
+    session = TaskParser().session()
+    
+    result = session.update("deploy to pro")
+    assert result.aws_accounts == ()
+    assert session._end == len("deploy to")
+    
+    result = session.update("deploy to prod")
+    assert result.aws_accounts == ("prod",)
+    
+    result = session.update("deploy to production in tokyo DEVOPS-12")
+    assert result.aws_accounts == ("prod",)
+    assert result.aws_regions == ("ap-northeast-1",)
+    assert result.jira_ticket == "DEVOPS-12"
+    
+    result = session.update("deploy to production in tokyo DEVOPS-123 now")
+    assert result.jira_ticket == "DEVOPS-123"
+
+
+def test_parse_session_restarts_after_deletion():
+    """Test text that does not extend the previous update is parsed afresh."""
+    session = TaskParser().session()
+    
+    session.update("deploy to prod tokyo ABC-12 ")
+    result = session.update("deploy to dev")
+    
+    assert result.aws_accounts == ("dev",)
+    assert result.aws_regions == ()
+    assert result.jira_ticket is None
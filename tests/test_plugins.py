@@ -0,0 +1,120 @@
+"""Tests for lazily loaded analyzer plugins."""
+import sys
+import time
+from importlib.metadata import EntryPoint
+import pytest
+from mcp_switchboard.analyzer.analyzer import TaskAnalyzer
+from mcp_switchboard.analyzer.plugins import AnalyzerPlugins
+
+PLUGIN_MODULES = {
+    "tfplan_plugin": '''
+import asyncio
+
+async def analyze(task_description):
+    await asyncio.sleep(0.2)
+    return {"required_services": ["terraform"], "details": {"plan": True}}
+''',
+    "k8s_plugin": '''
+import time
+
+def analyze(task_description):
+    time.sleep(0.2)
+    return {"required_services": ["kubernetes"], "required_capabilities": ["kubernetes", "deployment"]}
+''',
+    "broken_plugin": '''
+def analyze(task_description):
+    raise RuntimeError("boom")
+''',
+    "slow_plugin": '''
+import time
+
+def analyze(task_description):
+    time.sleep(1)
+''',
+}
+
+
+@pytest.fixture
+def plugin_path(tmp_path, monkeypatch):
+    """Directory on sys.path holding the plugin modules."""
+    for name, source in PLUGIN_MODULES.items():
+        (tmp_path / f"{name}.py").write_text(source)
+        sys.modules.pop(name, None)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    for name in PLUGIN_MODULES:
+        sys.modules.pop(name, None)
+
+
+def entry_point(keyword, module):
+    return EntryPoint(name=keyword, value=f"{module}:analyze", group=AnalyzerPlugins.GROUP)
+
+
+@pytest.mark.asyncio
+async def test_plugins_load_only_when_triggered(plugin_path):
+    """Test plugins are imported on their first trigger keyword."""
+    plugins = AnalyzerPlugins([
+        entry_point("terraform plan", "tfplan_plugin"),
+        entry_point("tfplan", "tfplan_plugin"),
+        entry_point("manifest", "k8s_plugin"),
+    ])
+    assert len(plugins) == 2
+    
+    assert await plugins.run("Deploy ECS to prod") == {}
+    assert "tfplan_plugin" not in sys.modules
+    
+    results = await plugins.run("Review the terraform plan, then the tfplan output")
+    assert list(results) == ["tfplan_plugin:analyze"]
+    assert results["tfplan_plugin:analyze"].details == {"plan": True}
+    assert "tfplan_plugin" in sys.modules
+    assert "k8s_plugin" not in sys.modules
+
+
+@pytest.mark.asyncio
+async def test_plugins_run_concurrently_and_isolate_failures(plugin_path, capsys):
+    """Test triggered plugins fan out, and failures or timeouts are skipped."""
+    plugins = AnalyzerPlugins([
+        entry_point("plan", "tfplan_plugin"),
+        entry_point("manifest", "k8s_plugin"),
+        entry_point("broken", "broken_plugin"),
+        entry_point("slow", "slow_plugin"),
+        entry_point("missing", "no_such_plugin"),
+    ], timeout=0.5)
+    
+    start = time.perf_counter()
+    results = await plugins.run("apply the plan and manifest; broken slow missing")
+    elapsed = time.perf_counter() - start
+    
+    assert list(results) == ["tfplan_plugin:analyze", "k8s_plugin:analyze"]
+    assert elapsed < 0.9
+    # Failures are logged to stderr, away from the stdio transport
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.asyncio
+async def test_analyzer_merges_plugin_results(plugin_path):
+    """Test plugin services are merged into the analysis."""
+    analyzer = TaskAnalyzer(plugins=AnalyzerPlugins([
+        entry_point("plan", "tfplan_plugin"),
+        entry_point("manifest", "k8s_plugin"),
+    ]))
+    description = "Deploy ECS to prod from the plan and manifest"
+    
+    analysis = await analyzer.with_plugins(analyzer.analyze(description), description)
+    assert analysis.required_services == ["aws", "terraform", "kubernetes"]
+    assert analysis.required_capabilities == ["aws", "terraform", "kubernetes", "deployment"]
+    assert analysis.plugin_results == {"tfplan_plugin:analyze": {"plan": True}, "k8s_plugin:analyze": {}}
+
+
+def test_plugins_discovered_from_metadata(plugin_path):
+    """Test installed entry points are found without importing the plugin."""
+    dist_info = plugin_path / "tfplan_plugin-1.0.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: tfplan-plugin\nVersion: 1.0\n")
+    (dist_info / "entry_points.txt").write_text(
+        f"[{AnalyzerPlugins.GROUP}]\ntfplan = tfplan_plugin:analyze\n"
+    )
+    
+    plugins = AnalyzerPlugins()
+    assert plugins.triggered("check the tfplan") == ["tfplan_plugin:analyze"]
+    assert "tfplan_plugin" not in sys.modules
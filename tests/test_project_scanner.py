@@ -0,0 +1,91 @@
+"""Tests for the incremental project scanner."""
+import os
+from mcp_switchboard.analyzer.project_scanner import IgnoreRules, ProjectScanner
+
+
+def make_project(root):
+    """Project with terraform, GitHub workflows and an ignored CDK app."""
+    (root / "infra").mkdir(parents=True)
+    (root / "infra" / "main.tf").write_text("")
+    (root / ".github" / "workflows").mkdir(parents=True)
+    (root / "vendor").mkdir()
+    (root / "vendor" / "cdk.json").write_text("{}")
+    (root / "src" / "app").mkdir(parents=True)
+    (root / ".gitignore").write_text("vendor/\n")
+    return root
+
+
+def test_gitignore_rules():
+    """Test anchoring, directory-only patterns, globstar and negation."""
+    rules = IgnoreRules().extended("", "node_modules/\n*.log\n!keep.log\n/build\ndocs/**/*.tf\n")
+    rules = rules.extended("sub", "*.tf\n")
+    
+    assert rules.ignored("node_modules", True)
+    assert rules.ignored("a/node_modules", True)
+    assert not rules.ignored("node_modules", False)
+    assert rules.ignored("a/b.log", False)
+    assert not rules.ignored("a/keep.log", False)
+    assert rules.ignored("build", True)
+    assert not rules.ignored("a/build", True)
+    assert rules.ignored("docs/y.tf", False)
+    assert rules.ignored("docs/x/y.tf", False)
+    assert rules.ignored("sub/main.tf", False)
+    assert not rules.ignored("main.tf", False)
+
+
+def test_scan_detects_signals(tmp_path):
+    """Test signals are detected and ignored paths skipped."""
+    project = make_project(tmp_path / "project")
+    scanner = ProjectScanner(tmp_path / "index")
+    
+    context = scanner.scan(str(project))
+    assert context.services == ["github", "terraform"]
+    assert context.evidence["terraform"] == "infra/main.tf"
+    
+    assert scanner.scan(str(tmp_path / "missing")).services == []
+
+
+def test_rescan_only_touches_changed_directories(tmp_path):
+    """Test unchanged directories are reused, from memory and from disk."""
+    project = make_project(tmp_path / "project")
+    scanner = ProjectScanner(tmp_path / "index")
+    first = scanner.scan(str(project))
+    
+    second = scanner.scan(str(project))
+    assert second.scanned == 0
+    assert second.reused == first.scanned
+    
+    (project / "src" / "app" / "serverless.yml").write_text("")
+    third = scanner.scan(str(project))
+    assert third.scanned == 1
+    assert "aws" in third.services
+    
+    # A new scanner starts from the persisted index
+    assert ProjectScanner(tmp_path / "index").scan(str(project)).scanned == 0
+
+
+def test_rescan_follows_gitignore_edits(tmp_path):
+    """Test editing a .gitignore in place rescans the directories it governs."""
+    project = make_project(tmp_path / "project")
+    scanner = ProjectScanner(tmp_path / "index")
+    scanner.scan(str(project))
+    
+    gitignore = project / ".gitignore"
+    mtime_ns = os.stat(project).st_mtime_ns
+    gitignore.write_text("infra/\n")
+    os.utime(gitignore, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+    
+    context = scanner.scan(str(project))
+    assert context.services == ["aws", "github"]
+    assert context.evidence["aws"] == "vendor/cdk.json"
+
+
+def test_rescan_drops_removed_directories(tmp_path):
+    """Test signals of deleted directories disappear."""
+    project = make_project(tmp_path / "project")
+    scanner = ProjectScanner(tmp_path / "index")
+    scanner.scan(str(project))
+    
+    (project / "infra" / "main.tf").unlink()
+    (project / "infra").rmdir()
+    assert scanner.scan(str(project)).services == ["github"]
@@ -0,0 +1,128 @@
+"""Tests for the live project context watcher."""
+import time
+import pytest
+from mcp_switchboard.analyzer.project_watcher import WatchedProjectScanner
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll ``condition`` until it holds or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "polling"])
+def watcher(request, tmp_path):
+    """Watched scanner in each detection mode."""
+    scanner = WatchedProjectScanner(
+        tmp_path / "index", poll_interval=0.1, debounce=0.02, use_inotify=request.param
+    )
+    if request.param and scanner.mode != "inotify":
+        pytest.skip("inotify unavailable")
+    yield scanner
+    scanner.stop()
+
+
+def test_watcher_tracks_changes(watcher, tmp_path):
+    """Test new signals, new directories and .gitignore edits are picked up."""
+    project = tmp_path / "project"
+    (project / "src").mkdir(parents=True)
+    assert watcher.scan(str(project)).services == []
+    
+    (project / "src" / "main.tf").write_text("")
+    assert wait_for(lambda: watcher.scan(str(project)).services == ["terraform"])
+    
+    (project / "deploy" / "app").mkdir(parents=True)
+    (project / "deploy" / "app" / "cdk.json").write_text("{}")
+    assert wait_for(lambda: watcher.scan(str(project)).services == ["aws", "terraform"])
+    
+    (project / ".gitignore").write_text("deploy/\n")
+    assert wait_for(lambda: watcher.scan(str(project)).services == ["terraform"])
+
+
+def test_watched_scan_answers_from_memory(tmp_path):
+    """Test repeat scans do not walk the tree."""
+    project = tmp_path / "project"
+    (project / "infra").mkdir(parents=True)
+    (project / "infra" / "main.tf").write_text("")
+    scanner = WatchedProjectScanner(tmp_path / "index", poll_interval=60)
+    try:
+        first = scanner.scan(str(project))
+        assert scanner.scan(str(project)) is first
+    finally:
+        scanner.stop()
+
+
+def test_watcher_evicts_least_recent_project(tmp_path):
+    """Test only max_projects projects are kept hot."""
+    scanner = WatchedProjectScanner(tmp_path / "index", poll_interval=60, max_projects=1)
+    try:
+        for name in ("a", "b"):
+            (tmp_path / name).mkdir()
+            scanner.scan(str(tmp_path / name))
+        assert list(scanner._contexts) == [scanner.project_root(str(tmp_path / "b"))]
+    finally:
+        scanner.stop()
+
+
+def test_watch_limit_falls_back_to_polling_quietly(tmp_path, capsys):
+    """Test running out of inotify watches polls the project without touching stdout."""
+    import errno
+    
+    scanner = WatchedProjectScanner(tmp_path / "index", poll_interval=60)
+    if scanner.mode != "inotify":
+        scanner.stop()
+        pytest.skip("inotify unavailable")
+    
+    def exhausted(path, mask=0):
+        raise OSError(errno.ENOSPC, "No space left on device", path)
+    
+    scanner._inotify.add_watch = exhausted
+    try:
+        (tmp_path / "project").mkdir()
+        root = scanner.project_root(str(tmp_path / "project"))
+        scanner.scan(root)
+        assert root in scanner._polled
+        assert capsys.readouterr().out == ""
+    finally:
+        scanner.stop()
+
+
+def test_refresh_walk_does_not_block_hot_scans(tmp_path):
+    """Test a watched project is answered from memory while it is being rewalked."""
+    import threading
+    
+    project = tmp_path / "project"
+    (project / "infra").mkdir(parents=True)
+    (project / "infra" / "main.tf").write_text("")
+    scanner = WatchedProjectScanner(tmp_path / "index", poll_interval=60)
+    try:
+        assert scanner.cached(str(project)) is None
+        first = scanner.scan(str(project))
+        assert scanner.cached(str(project)) is first
+        
+        walking, resume = threading.Event(), threading.Event()
+        walk = scanner.walk
+        
+        def slow_walk(root, old):
+            walking.set()
+            resume.wait(5)
+            return walk(root, old)
+        
+        scanner.walk = slow_walk
+        refresh = threading.Thread(target=scanner._refresh, args=(first.root,))
+        refresh.start()
+        try:
+            assert walking.wait(5)
+            start = time.monotonic()
+            assert scanner.scan(str(project)) is first
+            assert time.monotonic() - start < 1
+        finally:
+            resume.set()
+            refresh.join()
+        assert scanner.scan(str(project)).services == ["terraform"]
+    finally:
+        scanner.stop()
@@ -0,0 +1,87 @@
+"""Tests for the LLM prompt builder."""
+import pytest
+from mcp_switchboard.analyzer.prompt_builder import PromptBuilder, estimate_tokens
+from mcp_switchboard.state.manager import StateManager
+
+
+@pytest.fixture
+def state(tmp_path):
+    """State database with a few successful analyzed tasks."""
+    manager = StateManager(str(tmp_path / "state.db"))
+    tasks = [
+        ("t1", "roll out payments api to prod cluster", {"aws_account": "prod", "required_services": ["kubernetes"]}),
+        ("t2", "rotate jira webhook secret", {"required_services": ["jira"]}),
+        ("t3", "roll out search api to staging cluster", {"aws_account": "staging", "required_services": ["kubernetes"]}),
+        ("t4", "no analysis stored", None),
+    ]
+    for task_id, description, analysis in tasks:
+        manager.create_task(task_id, description, "cursor", "/p")
+        manager.update_task(task_id, analysis=analysis, success=True)
+    return manager
+
+
+def test_build_without_history():
+    """Test the compact prompt carries instructions and the task only."""
+    prompt = PromptBuilder().build("Deploy ECS to prod")
+    
+    assert '"Deploy ECS to prod"' in prompt.text
+    assert "aws_account" in prompt.text
+    assert prompt.examples == 0
+    assert prompt.tokens == estimate_tokens(prompt.text)
+
+
+def test_similar_examples_ranked(state):
+    """Test the most similar past tasks are retrieved first."""
+    builder = PromptBuilder(state, k=2)
+    
+    examples = builder.similar_examples("roll out billing api to prod cluster")
+    
+    assert len(examples) == 2
+    assert "payments api to prod" in examples[0]
+    assert "search api to staging" in examples[1]
+    assert '"aws_account":"prod"' in examples[0]
+
+
+def test_similar_examples_refreshed(state):
+    """Test tasks completed after the first load become examples once stale."""
+    builder = PromptBuilder(state, k=1, refresh_interval=3600)
+    builder.similar_examples("rotate github deploy key")
+    
+    state.create_task("t5", "rotate github deploy key", "cursor", "/p")
+    state.update_task("t5", analysis={"required_services": ["github"]}, success=True)
+    assert not any("github deploy key" in e for e in builder.similar_examples("rotate github deploy key"))
+    
+    builder.refresh_interval = 0
+    assert "github deploy key" in builder.similar_examples("rotate github deploy key")[0]
+
+
+def test_build_includes_few_shot(state):
+    """Test retrieved examples are placed before the task."""
+    prompt = PromptBuilder(state, k=1).build("roll out billing api to prod cluster")
+    
+    assert prompt.examples == 1
+    assert prompt.text.index("payments api") < prompt.text.index("billing api")
+
+
+def test_build_respects_token_budget(state):
+    """Test examples are dropped to stay within the token budget."""
+    generous = PromptBuilder(state, token_budget=1000).build("roll out api to cluster")
+    tight = PromptBuilder(state, token_budget=90).build("roll out api to cluster")
+    
+    assert generous.examples == 2
+    assert tight.examples == 0
+    assert tight.tokens < generous.tokens
+
+
+def test_prompt_tokens_recorded():
+    """Test sent prompt sizes are reported in metrics."""
+    from mcp_switchboard.analyzer.llm_analyzer import LLMTaskAnalyzer
+    from mcp_switchboard.utils.metrics import get_collector
+    
+    get_collector().clear()
+    analyzer = LLMTaskAnalyzer()
+    prompt = analyzer._create_analysis_prompt("Deploy ECS to prod")
+    
+    stats = get_collector().get_stats("llm_prompt_tokens")
+    assert stats["count"] == 1
+    assert stats["total"] == estimate_tokens(prompt)
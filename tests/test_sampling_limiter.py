@@ -0,0 +1,112 @@
+"""Tests for the sampling limiter."""
+import asyncio
+import time
+import pytest
+from mcp_switchboard.analyzer.sampling_limiter import SamplingLimiter
+from mcp_switchboard.utils.metrics import get_collector
+
+
+async def hold(limiter: SamplingLimiter, seconds: float) -> bool:
+    """Hold a slot for a while, returning whether it was admitted."""
+    async with limiter.slot() as admitted:
+        if admitted:
+            await asyncio.sleep(seconds)
+        return admitted
+
+
+@pytest.mark.asyncio
+async def test_limits_inflight_requests():
+    """Test no more than max_concurrent requests run at once."""
+    limiter = SamplingLimiter(max_concurrent=2, rate=1000, burst=100, max_wait=5)
+    peak = 0
+    
+    async def request():
+        nonlocal peak
+        async with limiter.slot() as admitted:
+            assert admitted
+            peak = max(peak, limiter.inflight)
+            await asyncio.sleep(0.01)
+    
+    await asyncio.gather(*(request() for _ in range(10)))
+    
+    assert peak == 2
+    assert limiter.inflight == 0
+    assert limiter.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_after_max_wait():
+    """Test requests that cannot get a slot in time are rejected."""
+    get_collector().clear()
+    limiter = SamplingLimiter(max_concurrent=1, rate=1000, burst=100, max_wait=0.05)
+    
+    start = time.monotonic()
+    results = await asyncio.gather(hold(limiter, 0.5), hold(limiter, 0), hold(limiter, 0))
+    
+    assert results == [True, False, False]
+    assert time.monotonic() - start < 1
+    assert get_collector().get_counter("sampling_rejected") == 2
+    assert get_collector().get_stats("sampling_queue_ms")["count"] == 3
+    assert limiter.inflight == 0
+    assert limiter.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_requests():
+    """Test requests beyond the burst wait for tokens or are rejected."""
+    limiter = SamplingLimiter(max_concurrent=10, rate=20, burst=2, max_wait=0.12)
+    
+    start = time.monotonic()
+    results = await asyncio.gather(*(hold(limiter, 0) for _ in range(6)))
+    
+    # Two from the burst, then one token every 50ms within the 120ms wait
+    assert results == [True, True, True, True, False, False]
+    assert 0.09 < time.monotonic() - start < 0.5
+    assert limiter.inflight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    """Test cancelling a queued request leaves the slot count intact."""
+    limiter = SamplingLimiter(max_concurrent=1, rate=1000, burst=100, max_wait=5)
+    holder = asyncio.ensure_future(hold(limiter, 0.05))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(hold(limiter, 0))
+    await asyncio.sleep(0.01)
+    
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert await holder
+    
+    assert limiter.inflight == 0
+    assert await hold(limiter, 0)
+
+
+@pytest.mark.asyncio
+async def test_timed_out_waiter_does_not_leak_slot(monkeypatch):
+    """Test a slot handed over on the tick a wait times out is released."""
+    limiter = SamplingLimiter(max_concurrent=1, rate=1000, burst=100, max_wait=5)
+    assert await limiter.acquire()
+    
+    async def wait_for(waiter, timeout):
+        # The holder releases on the same tick the timeout fires
+        limiter.release()
+        assert waiter.done()
+        raise asyncio.TimeoutError
+    
+    monkeypatch.setattr(asyncio, "wait_for", wait_for)
+    assert not await limiter.acquire()
+    monkeypatch.undo()
+    
+    assert limiter.inflight == 0
+    assert limiter.queued == 0
+    assert await hold(limiter, 0)
+
+
+def test_rejects_invalid_limits():
+    """Test limits must be positive."""
+    with pytest.raises(ValueError):
+        SamplingLimiter(max_concurrent=0)
+    with pytest.raises(ValueError):
+        SamplingLimiter(rate=0)
@@ -0,0 +1,78 @@
+"""Tests for vectorized registry scoring."""
+import random
+import pytest
+from mcp_switchboard.config.registry import ServerRegistry
+from mcp_switchboard.selector.scoring import RegistryMatrix
+
+
+def reference_confidence(server_config, required, keyword_match):
+    """Base confidence of one server, as the per-server loop computed it."""
+    score = 0.6 if set(server_config.get("capabilities", [])) & set(required) else 0.0
+    return min(score + (0.2 if keyword_match else 0.0), 1.0)
+
+
+def test_scores_match_per_server_loop():
+    """Test matrix scores equal the per-server confidence calculation."""
+    rng = random.Random(7)
+    registry = ServerRegistry()
+    vocabulary = [f"cap{i}" for i in range(50)]
+    for i in range(500):
+        registry.add_server(f"server-{i}", {"capabilities": rng.sample(vocabulary, rng.randint(0, 3))})
+    matrix = RegistryMatrix.compile(registry)
+    
+    for _ in range(20):
+        required = rng.sample(vocabulary + ["aws", "unknown"], 3)
+        keyword_servers = set(rng.sample(matrix.names, 10))
+        
+        scores = matrix.scores(required, keyword_servers)
+        
+        expected = [
+            reference_confidence(registry.get_server(name), required, name in keyword_servers)
+            for name in matrix.names
+        ]
+        assert scores.tolist() == expected
+
+
+def test_scores_apply_learning_boost():
+    """Test shares boost servers by up to 0.2, capped at 1."""
+    registry = ServerRegistry()
+    matrix = RegistryMatrix.compile(registry)
+    
+    scores = matrix.scores(
+        ["aws"], ["aws-api-mcp"], {"aws-api-mcp": 1.0, "github-mcp": 0.5, "gone-mcp": 1.0}
+    )
+    by_name = dict(zip(matrix.names, scores.tolist()))
+    
+    assert by_name["aws-api-mcp"] == 1.0
+    assert by_name["github-mcp"] == pytest.approx(0.1)
+    assert by_name["atlassian-mcp"] == 0.0
+
+
+def test_compile_is_cached_by_version():
+    """Test the matrix is rebuilt only when the registry changes."""
+    registry = ServerRegistry()
+    matrix = RegistryMatrix.compile(registry)
+    assert RegistryMatrix.compile(ServerRegistry()) is matrix
+    
+    registry.add_server("new-mcp", {"capabilities": ["aws"]})
+    updated = RegistryMatrix.compile(registry)
+    
+    assert updated is not matrix
+    assert len(updated) == len(matrix) + 1
+    assert updated.scores(["aws"])[updated.positions["new-mcp"]] == pytest.approx(0.6)
+
+
+def test_rank_partial_matches_full_sort():
+    """Test ranking only the best entries agrees with a full stable sort."""
+    import numpy as np
+    registry = ServerRegistry()
+    for i in range(1000):
+        registry.add_server(f"server-{i}", {"capabilities": []})
+    matrix = RegistryMatrix.compile(registry)
+    scores = np.random.default_rng(3).choice([0.0, 0.2, 0.6, 0.8, 1.0], size=len(matrix))
+    
+    full = matrix.rank(scores)
+    
+    assert full.tolist() == sorted(np.flatnonzero(scores > 0).tolist(), key=lambda i: (-scores[i], i))
+    for count in (0, 1, 10, 333, len(full), len(full) + 5):
+        assert matrix.rank(scores, count).tolist() == full[:count].tolist()
@@ -32,6 +32,21 @@ def test_select_servers_terraform():
     assert "terraform-registry-mcp" in selected_names
 
 
+def test_select_servers_matches_baseline_phrasings():
+    """Test capability names and keywords select the same servers as before."""
+    registry = ServerRegistry()
+    analyzer = TaskAnalyzer()
+    selector = ServerSelector(registry)
+    
+    result = selector.select(analyzer.analyze("Review PRs on git"))
+    assert [(s.server_name, s.confidence) for s in result.selected_servers] == [("github-mcp", 0.8)]
+    
+    analysis = analyzer.analyze("Create confluence page")
+    assert "jira" not in analysis.required_services
+    result = selector.select(analysis)
+    assert [s.server_name for s in result.selected_servers] == ["atlassian-mcp"]
+
+
 def test_confidence_threshold():
     """Test confidence threshold filtering."""
     registry = ServerRegistry()
@@ -69,3 +84,86 @@ def test_decision_report():
     assert "task_analysis" in result.decision_report
     assert "selected_count" in result.decision_report
     assert result.decision_report["threshold"] == 0.7
+
+
+def test_select_keyword_analysis_unconverted():
+    """Test keyword analyses are selected for as their TaskAnalysis would be."""
+    registry = ServerRegistry()
+    analyzer = TaskAnalyzer()
+    selector = ServerSelector(registry, use_learning=False)
+    
+    keyword_analysis = analyzer.analyze_many(["Deploy ECS to prod using DEVOPS-123"])[0]
+    analysis = analyzer.from_parsed(keyword_analysis)
+    
+    result = selector.select(keyword_analysis)
+    expected = selector.select(analysis)
+    assert result.selected_servers == expected.selected_servers
+    report = result.decision_report["task_analysis"]
+    assert report == {key: value for key, value in analysis.model_dump().items() if key in report}
+
+
+def test_selector_scores_large_registry():
+    """Test selection over a large registry matches only relevant servers."""
+    registry = ServerRegistry()
+    for i in range(2000):
+        registry.add_server(f"internal-{i}-mcp", {
+            "capabilities": [f"internal-{i}"],
+            "confidence_keywords": [f"svc{i}"],
+        })
+    selector = ServerSelector(registry, use_learning=False)
+    
+    analysis = TaskAnalyzer(registry).analyze("Deploy ECS to prod using DEVOPS-123")
+    result = selector.select(analysis)
+    
+    assert {s.server_name for s in result.selected_servers} == {"atlassian-mcp", "aws-api-mcp"}
+    assert all(s.server_name.startswith(("atlassian", "aws")) for s in result.rejected_servers)
+
+
+def test_selector_applies_learning_boost():
+    """Test servers used by similar past tasks are boosted."""
+    class Learner:
+        def server_shares(self, fingerprint):
+            return {"terraform-registry-mcp": 1.0, "aws-api-mcp": 0.5}
+    
+    selector = ServerSelector(ServerRegistry(), use_learning=False)
+    selector.use_learning, selector._learner = True, Learner()
+    
+    analysis = TaskAnalyzer().analyze("Deploy ECS to prod")
+    confidences = {
+        m.server_name: m.confidence
+        for m in selector.select(analysis).selected_servers + selector.select(analysis).rejected_servers
+    }
+    
+    assert confidences["aws-api-mcp"] == pytest.approx(0.9)
+    assert confidences["terraform-registry-mcp"] == pytest.approx(0.2)
+
+
+def test_select_top_k_pages_match_full_ranking():
+    """Test pages of the ranking concatenate to the full selection."""
+    registry = ServerRegistry()
+    for i in range(300):
+        registry.add_server(f"internal-{i}-mcp", {"capabilities": ["aws"] if i % 3 else ["jira"]})
+    selector = ServerSelector(registry, use_learning=False)
+    analysis = TaskAnalyzer(registry).analyze("Deploy ECS to prod using DEVOPS-123")
+    
+    full = selector.select(analysis)
+    ranking = full.selected_servers + full.rejected_servers
+    assert full.decision_report["next_cursor"] is None
+    
+    pages = []
+    cursor = 0
+    while cursor is not None:
+        page = selector.select(analysis, top_k=7, cursor=cursor)
+        assert len(page.selected_servers) + len(page.rejected_servers) <= 7
+        pages.extend(page.selected_servers + page.rejected_servers)
+        cursor = page.decision_report["next_cursor"]
+    
+    assert [m.server_name for m in pages] == [m.server_name for m in ranking]
+    assert page.decision_report["total_matches"] == len(ranking)
+
+
+def test_select_top_k_rejects_non_positive():
+    """Test top_k must be positive."""
+    selector = ServerSelector(ServerRegistry(), use_learning=False)
+    with pytest.raises(ValueError):
+        selector.select(TaskAnalyzer().analyze("Deploy ECS"), top_k=0)
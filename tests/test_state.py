@@ -1,4 +1,5 @@
 """Tests for state manager."""
+import json
 import pytest
 import tempfile
 from pathlib import Path
@@ -107,3 +108,108 @@ def test_get_nonexistent_task(temp_db):
     manager = StateManager(temp_db)
     task = manager.get_task("nonexistent")
     assert task is None
+
+
+def test_iter_successful_tasks(temp_db):
+    """Test streaming successful tasks in batches."""
+    manager = StateManager(temp_db)
+    for i in range(5):
+        manager.create_task(f"task-{i}", f"Task {i}", "cursor", "/test")
+        manager.update_task(f"task-{i}", selection={"servers": ["github-mcp"]}, success=i != 2)
+    
+    tasks = list(manager.iter_successful_tasks(batch_size=2))
+    assert len(tasks) == 4
+    assert {t["task_description"] for t in tasks} == {"Task 0", "Task 1", "Task 3", "Task 4"}
+    assert json.loads(tasks[0]["selection_json"]) == {"servers": ["github-mcp"]}
+
+
+def test_search_tasks(temp_db):
+    """Test ranked full-text search over descriptions and analyses."""
+    manager = StateManager(temp_db)
+    manager.create_task("migrate", "Migrate DynamoDB table orders to on-demand", "cursor", "/test")
+    manager.update_task("migrate", analysis={"aws_account": "prod", "aws_region": "us-east-1"}, success=True)
+    manager.create_task("backup", "Check DynamoDB backups", "kiro", "/test")
+    manager.create_task("deploy", "Deploy ECS service", "cursor", "/test")
+    manager.update_task("deploy", analysis={"aws_account": "dev"}, success=False)
+    
+    page = manager.search_tasks("that dynamodb migration")
+    assert page["total"] == 2
+    assert [t["id"] for t in page["results"]] == ["migrate", "backup"]
+    assert "[Migrate]" in page["results"][0]["snippet"]
+    
+    # Analysis values are searchable, JSON keys are not
+    assert [t["id"] for t in manager.search_tasks("us-east-1")["results"]] == ["migrate"]
+    assert manager.search_tasks("aws_account")["total"] == 0
+    
+    assert manager.search_tasks("dev", successful_only=True)["total"] == 0
+    assert manager.search_tasks("")["total"] == 0
+
+
+def test_search_tasks_pagination_and_sync(temp_db):
+    """Test pagination and that the index follows updates and deletes."""
+    manager = StateManager(temp_db)
+    for i in range(5):
+        manager.create_task(f"task-{i}", f"Rotate keys batch {i}", "cursor", "/test")
+    
+    first = manager.search_tasks("rotate", limit=2)
+    second = manager.search_tasks("rotate", limit=2, offset=2)
+    assert first["total"] == 5
+    assert len(first["results"]) == len(second["results"]) == 2
+    assert not {t["id"] for t in first["results"]} & {t["id"] for t in second["results"]}
+    
+    manager.update_task("task-0", analysis={"jira_ticket": "SEC-42"})
+    assert [t["id"] for t in manager.search_tasks("SEC-42")["results"]] == ["task-0"]
+    
+    import sqlite3
+    conn = sqlite3.connect(temp_db)
+    conn.execute("DELETE FROM tasks WHERE id = 'task-0'")
+    conn.commit()
+    conn.close()
+    assert manager.search_tasks("SEC-42")["total"] == 0
+
+
+def test_search_index_backfills_existing_tasks(temp_db):
+    """Test databases created without the search index are indexed on open."""
+    import sqlite3
+    manager = StateManager(temp_db)
+    manager.create_task("old", "Resize the RDS instance", "cursor", "/test")
+    conn = sqlite3.connect(temp_db)
+    conn.execute("DROP TABLE tasks_fts")
+    conn.commit()
+    conn.close()
+    
+    assert StateManager(temp_db).search_tasks("rds")["total"] == 1
+
+
+def test_tasks_without_seq_are_migrated(temp_db):
+    """Test databases keyed only by the implicit rowid keep their rowids as seq."""
+    import sqlite3
+    conn = sqlite3.connect(temp_db)
+    conn.executescript("""
+        CREATE TABLE tasks (
+            id TEXT PRIMARY KEY, task_description TEXT NOT NULL, agent_type TEXT NOT NULL,
+            project_path TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP, success BOOLEAN, analysis_json TEXT, selection_json TEXT
+        );
+        CREATE INDEX idx_tasks_completed ON tasks(completed_at);
+        CREATE TABLE server_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, task_id TEXT NOT NULL, server_name TEXT NOT NULL,
+            confidence FLOAT, success BOOLEAN, startup_time_ms INTEGER,
+            FOREIGN KEY (task_id) REFERENCES tasks(id)
+        );
+        INSERT INTO tasks (rowid, id, task_description, agent_type) VALUES (7, 'old', 'Resize the RDS instance', 'cursor');
+    """)
+    conn.close()
+    
+    manager = StateManager(temp_db)
+    manager.create_task("new", "Resize the ECS service", "cursor", "/test")
+    
+    assert list(manager.get_tasks_by_rowid([7])[7].items())[:3] == [("rowid", 7), ("seq", 7), ("id", "old")]
+    assert manager.get_tasks_by_rowid([8])[8]["id"] == "new"
+    assert manager.search_tasks("resize")["total"] == 2
+    conn = sqlite3.connect(temp_db)
+    schema = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE sql IS NOT NULL"))
+    conn.close()
+    assert "tasks_unkeyed" not in schema
+    assert "REFERENCES tasks(id)" in schema["server_usage"]
+    assert "idx_tasks_completed" in schema